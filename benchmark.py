@@ -0,0 +1,462 @@
+"""Набор бенчмарков менеджера веб-проектов, работающий без дисплея.
+
+Генерирует синтетические деревья проектов и реестры сайтов, замеряет
+сканирование структуры, поиск, хранилище и отдачу файлов сервером проекта
+(нагрузочный тест параллельными локальными HTTP-клиентами) и сохраняет
+результаты в JSON для сравнения между версиями.
+
+Примеры:
+    python benchmark.py --output bench_new.json
+    python benchmark.py --full --only scan,serve
+    python benchmark.py --output bench_new.json --compare bench_old.json
+"""
+import argparse
+import functools
+import http.client
+import http.server
+import json
+import os
+import platform
+import random
+import shutil
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import website_build as build
+import website_core as core
+import website_server as srv
+
+QUICK_SITE_COUNTS = [100, 1000, 10000]
+FULL_SITE_COUNTS = [100, 1000, 10000, 50000]
+QUICK_FILE_COUNTS = [1000, 10000]
+FULL_FILE_COUNTS = [1000, 10000, 100000, 500000]
+
+WORDS = ["landing", "portfolio", "shop", "blog", "admin", "dashboard", "promo", "docs", "api", "react",
+         "vue", "static", "gallery", "news", "client", "agency", "studio", "demo", "test", "legacy"]
+TAGS = ["html", "css", "js", "react", "vue", "sass", "php", "jquery", "bootstrap", "tailwind"]
+EXTENSIONS = [".html", ".css", ".js", ".json", ".md", ".png", ".svg", ".woff2"]
+
+
+def make_registry(site_count, seed=1):
+    """Создает синтетический реестр сайтов."""
+    rng = random.Random(seed)
+    websites = {}
+    for i in range(site_count):
+        name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}"
+        websites[name] = {
+            "name": name,
+            "path": f"/projects/{rng.choice(WORDS)}/{name}",
+            "main_file": "index.html",
+            "description": " ".join(rng.choice(WORDS) for _ in range(8)),
+            "tags": rng.sample(TAGS, 3),
+            "added_date": "2024-01-01 12:00:00"
+        }
+    return websites
+
+
+def make_project_tree(root, file_count, files_per_dir=50, seed=1):
+    """Создает синтетическое дерево проекта из file_count небольших файлов."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    dirs = [root]
+    created = 0
+    while created < file_count:
+        parent = rng.choice(dirs)
+        current = os.path.join(parent, f"dir{len(dirs)}")
+        os.makedirs(current, exist_ok=True)
+        dirs.append(current)
+        for _ in range(min(files_per_dir, file_count - created)):
+            extension = rng.choice(EXTENSIONS)
+            with open(os.path.join(current, f"file{created}{extension}"), "w", encoding="utf-8") as f:
+                f.write(f".class-{created} {{ color: red; }} /* {rng.choice(WORDS)} */\n" * 4)
+            created += 1
+    # Игнорируемая папка, которую сканер должен пропускать
+    node_modules = os.path.join(root, "node_modules", "pkg")
+    os.makedirs(node_modules, exist_ok=True)
+    with open(os.path.join(node_modules, "index.js"), "w", encoding="utf-8") as f:
+        f.write("module.exports = {};\n")
+    return root
+
+
+def make_served_site(root, asset_count=60, asset_size=20000):
+    """Создает сайт со страницей и asset_count ресурсами для нагрузочного теста."""
+    os.makedirs(root, exist_ok=True)
+    links = []
+    for i in range(asset_count):
+        name = f"asset{i}.css" if i % 2 else f"asset{i}.js"
+        with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+            f.write((f"/* {name} */ .rule-{i} {{ margin: {i}px; }}\n" * (asset_size // 40))[:asset_size])
+        links.append(name)
+    with open(os.path.join(root, "index.html"), "w", encoding="utf-8") as f:
+        f.write("<html><body>" + "".join(f'<link href="{name}">' for name in links) + "</body></html>")
+    return ["/index.html"] + ["/" + name for name in links]
+
+
+def timed(func, repeat=3):
+    """Выполняет func repeat раз и возвращает (минимальное время, медиана, результат последнего запуска)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times), result
+
+
+class BenchmarkRunner:
+    """Собирает результаты замеров."""
+
+    def __init__(self, workdir, repeat):
+        self.workdir = workdir
+        self.repeat = repeat
+        self.results = []
+
+    def record(self, group, name, seconds, median=None, **params):
+        """Сохраняет результат и печатает его."""
+        entry = {"group": group, "name": name, "params": params,
+                 "seconds": round(seconds, 6), "median_seconds": round(median if median is not None else seconds, 6)}
+        self.results.append(entry)
+        params_text = ", ".join(f"{key}={value}" for key, value in params.items())
+        print(f"  {group}/{name} [{params_text}]: {seconds * 1000:.2f} мс")
+        return entry
+
+    def measure(self, group, name, func, repeat=None, **params):
+        """Замеряет func и сохраняет результат."""
+        best, median, result = timed(func, repeat or self.repeat)
+        self.record(group, name, best, median, **params)
+        return result
+
+    # --- Сканирование структуры папок ---
+
+    def bench_scan(self, file_counts):
+        """Сканирование одного уровня, полный обход, кэш снимков и такт наблюдателя."""
+        print("Сканирование:")
+        for file_count in file_counts:
+            root = make_project_tree(os.path.join(self.workdir, f"tree_{file_count}"), file_count)
+            ignore = core.DEFAULT_IGNORE_PATTERNS
+
+            self.measure("scan", "scan_directory_level", lambda: core.scan_directory_level(root, ignore), files=file_count)
+            self.measure("scan", "legacy_os_walk_string", lambda: legacy_tree_string(root), files=file_count)
+            self.measure("scan", "iter_project_files", lambda: sum(1 for _ in core.iter_project_files(root, ignore)),
+                         files=file_count)
+
+            cache = core.DirectorySnapshotCache(os.path.join(self.workdir, f"tree_cache_{file_count}.json"))
+            dir_paths = [root] + [entry[0] for entry in os.walk(root)][1:]
+
+            def fill_cache():
+                for dir_path in dir_paths:
+                    dirs, files = core.scan_directory_level(dir_path, ignore)
+                    cache.set_level(root, dir_path, os.stat(dir_path).st_mtime, dirs, files, ignore)
+                cache.save()
+
+            def validate_cache():
+                fresh = core.DirectorySnapshotCache(cache.cache_file)
+                fresh.load()
+                return sum(1 for dir_path in dir_paths
+                           if fresh.get_level(root, dir_path, ignore)["mtime"] != os.stat(dir_path).st_mtime)
+
+            self.measure("scan", "snapshot_cache_fill", fill_cache, repeat=1, files=file_count)
+            self.measure("scan", "snapshot_cache_load_validate", validate_cache, files=file_count)
+
+            stats_cache = core.ProjectStatsCache(os.path.join(self.workdir, f"stats_cache_{file_count}.json"))
+            self.measure("scan", "stats_full", lambda: stats_cache.refresh(root, ignore, force=True), repeat=1,
+                         files=file_count)
+            self.measure("scan", "stats_incremental", lambda: stats_cache.refresh(root, ignore), files=file_count)
+
+            hash_cache = core.FileHashCache(os.path.join(self.workdir, f"hash_cache_{file_count}.json"))
+            projects = {"tree": root}
+            self.measure("scan", "duplicates_cold", lambda: core.find_duplicates(projects, hash_cache, ignore), repeat=1,
+                         files=file_count)
+            self.measure("scan", "duplicates_cached", lambda: core.find_duplicates(projects, hash_cache, ignore),
+                         files=file_count)
+
+            watcher = srv.ProjectWatcher(root, lambda paths: None, ignore)
+            self.measure("scan", "watcher_initial_scan", lambda: watcher.scan_dir(root), repeat=1, files=file_count)
+            self.measure("scan", "watcher_tick", watcher.check, files=file_count)
+
+    # --- Поиск ---
+
+    def bench_search(self, site_counts):
+        """Построение индекса, поисковые запросы и инкрементальные обновления."""
+        print("Поиск:")
+        queries = ["la", "landing", "shop-blog", "react", "zzz-not-found"]
+        for site_count in site_counts:
+            websites = make_registry(site_count)
+            index = core.SearchIndex()
+            self.measure("search", "index_rebuild", lambda: index.rebuild(websites), sites=site_count)
+            for query in queries:
+                self.measure("search", "indexed_query", lambda: index.search(query), sites=site_count, query=query)
+                self.measure("search", "legacy_linear_query", lambda: legacy_search(websites, query),
+                             sites=site_count, query=query)
+
+            name = next(iter(websites))
+            site_data = websites[name]
+
+            def update_one():
+                index.remove(name)
+                index.add(name, site_data)
+
+            self.measure("search", "incremental_update", update_one, sites=site_count)
+
+            # Фильтр по тегам: индекс тегов против прохода по всем сайтам
+            tags = core.TagIndex()
+            self.measure("search", "tag_index_rebuild", lambda: tags.rebuild(websites), sites=site_count)
+            self.measure("search", "tag_filter", lambda: tags.select(["html"], ["react", "vue"], ["php"]),
+                         sites=site_count)
+            self.measure("search", "legacy_tag_filter", lambda: legacy_tag_filter(websites, "html"), sites=site_count)
+            self.measure("search", "tag_counts", lambda: tags.counts(), sites=site_count)
+            self.measure("search", "legacy_all_tags", lambda: legacy_all_tags(websites), sites=site_count)
+
+    # --- Хранилище ---
+
+    def bench_storage(self, site_counts):
+        """Импорт, загрузка и запись одной записи в SQLite против перезаписи websites.json."""
+        print("Хранилище:")
+        for site_count in site_counts:
+            websites = make_registry(site_count)
+            json_file = os.path.join(self.workdir, f"websites_{site_count}.json")
+            db_file = os.path.join(self.workdir, f"websites_{site_count}.db")
+
+            def legacy_save():
+                with open(json_file, "w") as f:
+                    json.dump(websites, f, indent=4)
+
+            def legacy_load():
+                with open(json_file, "r") as f:
+                    return json.load(f)
+
+            self.measure("storage", "legacy_json_save_all", legacy_save, sites=site_count)
+            self.measure("storage", "legacy_json_load", legacy_load, sites=site_count)
+
+            store = core.WebsiteStore(db_file)
+            self.measure("storage", "sqlite_import_json", lambda: store.import_json(json_file), repeat=1, sites=site_count)
+            self.measure("storage", "sqlite_load_all", store.load_all, sites=site_count)
+
+            name = next(iter(websites))
+            self.measure("storage", "sqlite_put_one", lambda: store.put(name, websites[name]), sites=site_count)
+
+    # --- Сервер ---
+
+    def bench_serve(self, clients, requests_per_client):
+        """Нагрузочный тест сервера проекта параллельными клиентами."""
+        print("Сервер:")
+        site_root = os.path.join(self.workdir, "served_site")
+        paths = make_served_site(site_root)
+
+        legacy_handler = functools.partial(QuietLegacyHandler, directory=site_root)
+        legacy = socketserver.TCPServer(("127.0.0.1", 0), legacy_handler)
+        self.load_test("legacy_tcpserver", legacy, paths, clients, requests_per_client, keep_alive=False)
+
+        for encoding in ("identity", "gzip"):
+            server = srv.ProjectHTTPServer(("127.0.0.1", 0), site_root)
+            self.load_test("project_server", server, paths, clients, requests_per_client,
+                           keep_alive=True, accept_encoding=encoding)
+
+        # Тот же сайт после сборки: минифицированные файлы и заранее сжатые .gz
+        build_root = os.path.join(self.workdir, "served_site_build")
+        self.measure("serve", "build_full", lambda: build.build_project(site_root, build_root), repeat=1,
+                     files=len(paths))
+        self.measure("serve", "build_incremental", lambda: build.build_project(site_root, build_root), files=len(paths))
+        with open(os.path.join(build_root, build.MANIFEST_NAME), "r", encoding="utf-8") as f:
+            outputs = json.load(f)["files"]
+        built_paths = ["/" + outputs[path.lstrip("/")]["output"] for path in paths]
+        server = srv.ProjectHTTPServer(("127.0.0.1", 0), build_root)
+        self.load_test("project_server_build", server, built_paths, clients, requests_per_client,
+                       keep_alive=True, accept_encoding="gzip")
+
+        # Шлюз: тот же сайт под несколькими именами на одном порту, запросы вперемешку по префиксам
+        websites = {f"site-{i}": {"path": site_root} for i in range(4)}
+        gateway_paths = [f"/site-{i % 4}{path}" for i, path in enumerate(paths)]
+        server = srv.GatewayHTTPServer(("127.0.0.1", 0), websites)
+        self.load_test("gateway_server", server, gateway_paths, clients, requests_per_client,
+                       keep_alive=True, accept_encoding="gzip")
+
+        # Перемотка видео: запросы диапазонов по 1 МБ в разных местах крупного файла
+        media_size = 256 * 1024 * 1024
+        with open(os.path.join(site_root, "video.mp4"), "wb") as f:
+            f.truncate(media_size)
+        chunk = 1024 * 1024
+        ranges = [f"bytes={offset}-{offset + chunk - 1}" for offset in range(0, media_size, media_size // 64)]
+        server = srv.ProjectHTTPServer(("127.0.0.1", 0), site_root)
+        self.load_test("project_server_ranges", server, ["/video.mp4"], clients, requests_per_client,
+                       keep_alive=True, ranges=ranges)
+
+    def load_test(self, name, server, paths, clients, requests_per_client, keep_alive, accept_encoding="identity",
+                  ranges=None):
+        """Запускает сервер и clients потоков, каждый из которых делает requests_per_client запросов.
+
+        Если заданы ranges, запросы по очереди получают эти заголовки Range.
+        """
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def client(client_index):
+            connection = None
+            local_latencies = []
+            try:
+                for i in range(requests_per_client):
+                    if connection is None:
+                        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                    headers = {"Accept-Encoding": accept_encoding}
+                    if ranges:
+                        headers["Range"] = ranges[(client_index * 7 + i) % len(ranges)]
+                    start = time.perf_counter()
+                    connection.request("GET", paths[(client_index + i) % len(paths)], headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    local_latencies.append(time.perf_counter() - start)
+                    if not keep_alive or response.will_close:
+                        connection.close()
+                        connection = None
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(repr(e))
+            finally:
+                if connection is not None:
+                    connection.close()
+                with lock:
+                    latencies.extend(local_latencies)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        start = time.perf_counter()
+        for client_thread in threads:
+            client_thread.start()
+        for client_thread in threads:
+            client_thread.join()
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        server.server_close()
+
+        latencies.sort()
+        entry = self.record("serve", name, elapsed, clients=clients, requests=len(latencies),
+                            accept_encoding=accept_encoding)
+        entry["requests_per_second"] = round(len(latencies) / elapsed, 1) if elapsed else 0
+        entry["p50_ms"] = round(srv.ServerMetrics.percentile(latencies, 0.50) * 1000, 3)
+        entry["p95_ms"] = round(srv.ServerMetrics.percentile(latencies, 0.95) * 1000, 3)
+        entry["errors"] = len(errors)
+        print(f"    {entry['requests_per_second']} запросов/с, p50={entry['p50_ms']} мс, p95={entry['p95_ms']} мс, "
+              f"ошибок: {len(errors)}")
+
+
+class QuietLegacyHandler(http.server.SimpleHTTPRequestHandler):
+    """Исходный обработчик без вывода журнала в stderr."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def legacy_tree_string(path):
+    """Исходный алгоритм: полный os.walk со сборкой одной строки."""
+    tree_str = ""
+    for root_path, dirs, files in os.walk(path):
+        level = root_path.replace(path, '').count(os.sep)
+        indent = ' ' * 4 * level
+        tree_str += f"{indent}[{os.path.basename(root_path)}/]\n"
+        subindent = ' ' * 4 * (level + 1)
+        for f in files:
+            tree_str += f"{subindent}{f}\n"
+    return tree_str
+
+
+def legacy_search(websites, query):
+    """Исходный алгоритм: линейный поиск по названию и описанию."""
+    query = query.lower()
+    return [name for name, data in websites.items()
+            if query in name.lower() or query in data.get("description", "").lower()]
+
+
+def legacy_tag_filter(websites, tag):
+    """Исходный фильтр: проход по всем сайтам для одного тега."""
+    return [name for name, data in websites.items() if tag in data.get("tags", [])]
+
+
+def legacy_all_tags(websites):
+    """Исходный сбор тегов: обход всех сайтов после каждой правки."""
+    all_tags = set()
+    for site_data in websites.values():
+        all_tags.update(site_data.get("tags", []))
+    return sorted(all_tags)
+
+
+def compare_results(current, baseline_file):
+    """Печатает изменение времени относительно сохраненных результатов."""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(entry):
+        return entry["group"], entry["name"], json.dumps(entry["params"], sort_keys=True)
+
+    baseline_entries = {key(entry): entry for entry in baseline["results"]}
+    print(f"\nСравнение с {baseline_file}:")
+    for entry in current:
+        old = baseline_entries.get(key(entry))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = entry["seconds"] / old["seconds"]
+        marker = "  РЕГРЕССИЯ" if ratio > 1.2 else ""
+        print(f"  {entry['group']}/{entry['name']} {entry['params']}: "
+              f"{old['seconds'] * 1000:.2f} -> {entry['seconds'] * 1000:.2f} мс (x{ratio:.2f}){marker}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки менеджера веб-проектов (без графического интерфейса).")
+    parser.add_argument("--full", action="store_true",
+                        help="большие наборы данных: до 50k сайтов и 500k файлов")
+    parser.add_argument("--only", default="scan,search,storage,serve",
+                        help="группы через запятую: scan, search, storage, serve")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов каждого замера")
+    parser.add_argument("--clients", type=int, default=8, help="число параллельных HTTP-клиентов")
+    parser.add_argument("--requests", type=int, default=300, help="запросов на одного клиента")
+    parser.add_argument("--output", default="bench_results.json", help="файл для результатов в JSON")
+    parser.add_argument("--compare", help="JSON с прошлыми результатами для сравнения")
+    parser.add_argument("--keep", action="store_true", help="не удалять сгенерированные данные")
+    args = parser.parse_args(argv)
+
+    groups = {group.strip() for group in args.only.split(",") if group.strip()}
+    site_counts = FULL_SITE_COUNTS if args.full else QUICK_SITE_COUNTS
+    file_counts = FULL_FILE_COUNTS if args.full else QUICK_FILE_COUNTS
+
+    workdir = tempfile.mkdtemp(prefix="wm_bench_")
+    runner = BenchmarkRunner(workdir, args.repeat)
+    started = time.perf_counter()
+    try:
+        if "scan" in groups:
+            runner.bench_scan(file_counts)
+        if "search" in groups:
+            runner.bench_search(site_counts)
+        if "storage" in groups:
+            runner.bench_storage(site_counts)
+        if "serve" in groups:
+            runner.bench_serve(args.clients, args.requests)
+    finally:
+        if args.keep:
+            print(f"Данные сохранены в {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "full": args.full,
+        "total_seconds": round(time.perf_counter() - started, 2),
+        "results": runner.results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"\nРезультаты сохранены в {args.output}")
+
+    if args.compare:
+        compare_results(runner.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
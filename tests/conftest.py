@@ -0,0 +1,34 @@
+"""Общие настройки и фикстуры тестов: модули проекта лежат в корне репозитория."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def write_file():
+    """Возвращает функцию, записывающую текст или байты в файл и создающую недостающие папки."""
+    def write(path, content):
+        os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+        if isinstance(content, bytes):
+            with open(path, "wb") as f:
+                f.write(content)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def make_project(tmp_path, write_file):
+    """Возвращает функцию, создающую папку проекта из словаря {относительный путь: содержимое}."""
+    def make(name, files):
+        root = os.path.join(str(tmp_path), name)
+        os.makedirs(root, exist_ok=True)
+        for rel_path, content in files.items():
+            write_file(os.path.join(root, *rel_path.split("/")), content)
+        return root
+    return make
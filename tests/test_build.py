@@ -0,0 +1,130 @@
+"""Тесты сборки проектов: минификация, хэши в именах ресурсов и инкрементальный манифест."""
+import gzip
+import json
+import os
+import posixpath
+
+from website_build import (MANIFEST_NAME, build_project, content_hash, find_references, fingerprint_name,
+                           minify_css, minify_html, minify_js, resolve_reference)
+
+
+FILES = {
+    "index.html": '<html>\n  <head>\n    <link rel="stylesheet" href="css/site.css">\n  </head>\n'
+                  '  <body>\n    <!-- комментарий -->\n    <img src="img/logo.png">\n'
+                  '    <script src="js/app.js"></script>\n  </body>\n</html>\n',
+    "css/site.css": "/* стили */\nbody {\n    background: url('../img/logo.png');\n    color: red;\n}\n" * 10,
+    "js/app.js": "// код\nvar re = /ab+c/;\nvar s = 'a  b';\nconsole.log( s );\n",
+    "img/logo.png": "PNG",
+    ".git/HEAD": "ref: refs/heads/main",
+}
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_manifest_files(out_dir):
+    with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)["files"]
+
+
+def test_resolve_reference():
+    assert resolve_reference("../img/a.png?v=1#x", "css/site.css") == "img/a.png"
+    assert resolve_reference("/js/app.js", "pages/about.html") == "js/app.js"
+    assert resolve_reference("my%20file.css", "index.html") == "my file.css"
+    for ref in ("https://example.com/a.js", "//cdn/a.js", "#top", "data:image/png;base64,xx", "../../up.css",
+                "dir/", "{{ asset }}"):
+        assert resolve_reference(ref, "index.html") is None
+
+
+def test_find_references():
+    html = '<link href="a.css"><img src="img/b.png"><a href="https://x.org">x</a><div style="background:url(c.png)">'
+    assert find_references(html, "index.html") == {"a.css", "img/b.png", "c.png"}
+    assert find_references("@import 'base.css'; a { background: url(\"../i.png\") }", "css/x.css") == \
+        {"css/base.css", "i.png"}
+    assert find_references("import x from './mod.js'; import('../lazy.js')", "js/app.js") == \
+        {"js/mod.js", "lazy.js"}
+
+
+def test_minifiers_keep_strings_and_regexes():
+    assert minify_css("a  {  color: red ;  }\n/* c */ b { content: ' x  y ' }") == "a{color:red}b{content:' x  y '}"
+    # Пробел перед двоеточием значим в селекторах (a :hover)
+    assert minify_css("a :hover { }") == "a :hover{}"
+    js = minify_js("// c\nvar re = /a  b/g;\nvar s = \"x  // y\";\nreturn /c/.test(s);\n")
+    assert "/a  b/g" in js and '"x  // y"' in js and "// c" not in js
+    html = minify_html("<p>\n   text  </p>\n<!-- c --><pre>  keep\n  </pre>")
+    assert html == "<p> text </p> <pre>  keep\n  </pre>"
+
+
+def test_fingerprint_name():
+    assert fingerprint_name("css/site.css", "0123456789abcdef") == "css/site.01234567.css"
+
+
+def test_build_fingerprints_and_rewrites_references(tmp_path, make_project):
+    project = make_project("src", FILES)
+    out_dir = str(tmp_path / "out")
+    summary = build_project(project, out_dir)
+    assert summary["files"] == 4 and summary["built"] == 4 and summary["removed"] == 0
+    # Служебные папки вроде .git по умолчанию не попадают в сборку
+    assert not os.path.exists(os.path.join(out_dir, ".git"))
+
+    files = load_manifest_files(out_dir)
+    css_out = files["css/site.css"]["output"]
+    logo_out = files["img/logo.png"]["output"]
+    assert logo_out == fingerprint_name("img/logo.png", content_hash(b"PNG"))
+    assert files["index.html"]["output"] == "index.html"
+
+    page = read(os.path.join(out_dir, "index.html"))
+    assert posixpath.basename(css_out) in page and posixpath.basename(logo_out) in page
+    assert "комментарий" not in page
+    css_path = os.path.join(out_dir, *css_out.split("/"))
+    css = read(css_path)
+    assert f"url('../img/{posixpath.basename(logo_out)}')" in css
+    with open(css_path + ".gz", "rb") as f:
+        assert gzip.decompress(f.read()).decode("utf-8") == css
+
+
+def test_incremental_build_rebuilds_only_dependents(tmp_path, make_project, write_file):
+    project = make_project("src", FILES)
+    out_dir = str(tmp_path / "out")
+    build_project(project, out_dir)
+    assert build_project(project, out_dir)["built"] == 0
+
+    old_files = load_manifest_files(out_dir)
+    # Новый логотип меняет его имя, поэтому пересобираются CSS и страница, но не скрипт
+    write_file(os.path.join(project, "img", "logo.png"), "PNG2")
+    summary = build_project(project, out_dir)
+    assert summary["built"] == 3
+    # Старые логотип и CSS; сжатая копия CSS не считается отдельно
+    assert summary["removed"] == 2
+    files = load_manifest_files(out_dir)
+    assert files["js/app.js"]["output"] == old_files["js/app.js"]["output"]
+    assert files["img/logo.png"]["output"] != old_files["img/logo.png"]["output"]
+    # Устаревшие результаты удаляются вместе со сжатой копией CSS
+    assert not os.path.exists(os.path.join(out_dir, *old_files["img/logo.png"]["output"].split("/")))
+    old_css = os.path.join(out_dir, *old_files["css/site.css"]["output"].split("/"))
+    assert not os.path.exists(old_css) and not os.path.exists(old_css + ".gz")
+
+
+def test_options_change_invalidates_manifest(tmp_path, make_project):
+    project = make_project("src", FILES)
+    out_dir = str(tmp_path / "out")
+    build_project(project, out_dir)
+    old_files = load_manifest_files(out_dir)
+    summary = build_project(project, out_dir, minify=False, fingerprint=False)
+    assert summary["built"] == 4
+    # Результаты с хэшами в именах от прошлой сборки удалены: CSS, скрипт и логотип
+    assert summary["removed"] == 3
+    for rel in ("css/site.css", "js/app.js", "img/logo.png"):
+        old_path = os.path.join(out_dir, *old_files[rel]["output"].split("/"))
+        assert not os.path.exists(old_path) and not os.path.exists(old_path + ".gz")
+    assert load_manifest_files(out_dir)["css/site.css"]["output"] == "css/site.css"
+    assert "/* стили */" in read(os.path.join(out_dir, "css", "site.css"))
+
+
+def test_output_inside_project_is_skipped(tmp_path, make_project):
+    project = make_project("src", FILES)
+    out_dir = os.path.join(project, "dist")
+    build_project(project, out_dir)
+    assert build_project(project, out_dir)["files"] == 4
@@ -0,0 +1,70 @@
+"""Тесты командной строки (website_cli) на временной папке данных."""
+import json
+import os
+
+import pytest
+
+from website_cli import main
+
+
+@pytest.fixture
+def run(tmp_path, capsys):
+    """Возвращает функцию, выполняющую команду и возвращающую ее вывод."""
+    data_dir = str(tmp_path / "data")
+    os.makedirs(data_dir)
+
+    def run_command(*argv):
+        main(["--data-dir", data_dir, *argv])
+        return capsys.readouterr().out
+    return run_command
+
+
+def test_add_list_and_search(run, make_project):
+    project = make_project("landing", {"about.html": "", "index.html": "", "css/site.css": ""})
+    assert "успешно добавлен" in run("add", project, "--tags", "html, css", "--description", "Промо")
+    run("add", make_project("shop", {"shop.html": ""}), "--name", "Магазин")
+
+    sites = json.loads(run("list", "--json"))
+    assert list(sites) == ["landing", "Магазин"]
+    assert sites["landing"]["main_file"] == "index.html" and sites["landing"]["tags"] == ["html", "css"]
+    assert sites["Магазин"]["main_file"] == "shop.html"
+    assert run("list", "--tag", "css").split("\t")[0] == "landing"
+    assert list(json.loads(run("search", "промо", "--json"))) == ["landing"]
+
+
+def test_add_requires_html_or_main_file(run, make_project):
+    project = make_project("assets", {"style.css": ""})
+    with pytest.raises(SystemExit):
+        run("add", project)
+    run("add", project, "--main-file", "style.css")
+    assert "assets" in run("list")
+
+
+def test_add_does_not_replace_existing_site_without_force(run, make_project):
+    run("add", make_project("site", {"index.html": ""}), "--description", "Первый")
+    other = make_project("other", {"index.html": ""})
+    with pytest.raises(SystemExit) as error:
+        run("add", other, "--name", "site")
+    assert "--force" in str(error.value)
+    assert json.loads(run("list", "--json"))["site"]["description"] == "Первый"
+    run("add", other, "--name", "site", "--force")
+    assert json.loads(run("list", "--json"))["site"]["path"] == other
+
+
+def test_scan_prints_tree(run, make_project):
+    project = make_project("site", {"index.html": "", "css/site.css": "", "node_modules/lib.js": ""})
+    run("add", project)
+    out = run("scan", "site")
+    assert "[css/]" in out and "site.css" in out and "node_modules" not in out
+    assert out.rstrip().endswith("Папок: 1, файлов: 2")
+    with pytest.raises(SystemExit):
+        run("scan", "missing")
+
+
+def test_import_registers_discovered_projects_once(run, make_project):
+    root = make_project("root", {"a/index.html": "", "b/package.json": "{}", "c/readme.txt": ""})
+    assert run("import", root, "--dry-run").rstrip().endswith("Найдено проектов: 2")
+    assert json.loads(run("list", "--json")) == {}
+    assert "добавлено: 2" in run("import", root)
+    assert "добавлено: 0" in run("import", root)
+    assert list(json.loads(run("list", "--json"))) == ["a", "b"]
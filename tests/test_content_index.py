@@ -0,0 +1,55 @@
+"""Тесты полнотекстового индекса содержимого файлов (ContentIndexer)."""
+import os
+
+from website_core import ContentIndexer
+
+FILES = {
+    "index.html": "<html>\n<button class=\"btn-primary\">Купить</button>\n</html>",
+    "css/style.css": ".btn-primary { color: red; }",
+    "image.png": "btn-primary",
+    "node_modules/lib.js": "btn-primary",
+}
+
+
+def test_index_and_search_lines(tmp_path, make_project):
+    project = make_project("site", FILES)
+    indexer = ContentIndexer(str(tmp_path / "index.db"))
+    assert indexer.index_site("site", project, ["node_modules"]) == (2, 0)
+
+    results = indexer.search("btn-primary")
+    assert sorted(result["path"] for result in results) == [os.path.join("css", "style.css"), "index.html"]
+    page = next(result for result in results if result["path"] == "index.html")
+    assert page["site"] == "site"
+    assert page["lines"] == [(2, "<button class=\"btn-primary\">Купить</button>")]
+    assert indexer.search("купить")[0]["path"] == "index.html"
+
+
+def test_reindex_touches_only_changed_and_removed_files(tmp_path, make_project, write_file):
+    project = make_project("site", FILES)
+    indexer = ContentIndexer(str(tmp_path / "index.db"))
+    indexer.index_site("site", project, ["node_modules"])
+    assert indexer.index_site("site", project, ["node_modules"]) == (0, 0)
+
+    write_file(os.path.join(project, "index.html"), "<p>новый текст</p>")
+    os.remove(os.path.join(project, "css", "style.css"))
+    assert indexer.index_site("site", project, ["node_modules"]) == (1, 1)
+    assert indexer.search("btn-primary") == []
+    assert indexer.search("новый")[0]["path"] == "index.html"
+
+
+def test_special_characters_and_empty_query(tmp_path, make_project):
+    project = make_project("site", FILES)
+    indexer = ContentIndexer(str(tmp_path / "index.db"))
+    indexer.index_site("site", project, ["node_modules"])
+    assert indexer.search("") == []
+    # Кавычки и операторы FTS5 в запросе не вызывают ошибку синтаксиса
+    assert [result["path"] for result in indexer.search("color: \"red*")] == [os.path.join("css", "style.css")]
+    assert len(indexer.search("color: red")) == 1
+
+
+def test_remove_site(tmp_path, make_project):
+    indexer = ContentIndexer(str(tmp_path / "index.db"))
+    indexer.index_site("a", make_project("a", FILES))
+    indexer.index_site("b", make_project("b", FILES))
+    indexer.remove_site("a")
+    assert {result["site"] for result in indexer.search("btn-primary")} == {"b"}
@@ -0,0 +1,49 @@
+"""Тесты поиска проектов в папке для массового импорта (discover_projects, infer_project)."""
+import json
+import os
+
+from website_core import discover_projects, infer_project
+
+IGNORE = ["node_modules", ".git"]
+
+
+def make_root(make_project):
+    """Создает папку с проектами разной глубины и несколькими ложными кандидатами."""
+    return make_project("root", {
+        "landing/index.html": "",
+        "landing/css/site.css": "",
+        "landing/nested/index.html": "",
+        "clients/shop/package.json": json.dumps({"dependencies": {"react": "18"},
+                                                 "devDependencies": {"vite": "5"}}),
+        "clients/shop/src/app.jsx": "",
+        "clients/shop/public/index.html": "",
+        "clients/shop/node_modules/pkg/index.html": "",
+        "docs/readme.txt": "",
+        "deep/a/b/c/index.html": "",
+        "node_modules/lib/index.html": "",
+    })
+
+
+def test_discover_finds_projects_without_descending_into_them(make_project):
+    root = make_root(make_project)
+    sites = discover_projects(root, IGNORE)
+    assert [os.path.relpath(site["path"], root) for site in sites] == \
+        [os.path.join("clients", "shop"), os.path.join("deep", "a", "b", "c"), "landing"]
+    shop, deep, landing = sites
+    assert landing["name"] == "landing" and landing["main_file"] == "index.html"
+    assert landing["tags"] == ["css", "html"]
+    assert shop["main_file"] == os.path.join("public", "index.html")
+    assert shop["tags"] == ["html", "react", "vite"]
+    assert deep["name"] == "c"
+
+
+def test_discover_respects_max_depth(make_project):
+    root = make_root(make_project)
+    names = [site["name"] for site in discover_projects(root, IGNORE, max_depth=2)]
+    assert names == ["shop", "landing"]
+
+
+def test_infer_project_falls_back_to_shallowest_html(make_project):
+    project = make_project("site", {"pages/deep/b.html": "", "pages/a.html": "", "style.scss": ""})
+    assert infer_project(project) == (os.path.join("pages", "a.html"), ["html", "sass"])
+    assert infer_project(make_project("empty", {"package.json": "{broken"})) == ("package.json", [])
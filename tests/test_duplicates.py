@@ -0,0 +1,92 @@
+"""Тесты поиска одинаковых файлов в проектах (find_duplicates, FileHashCache)."""
+import hashlib
+import os
+import threading
+
+from website_core import FileHashCache, find_duplicates
+
+BIG = os.urandom(FileHashCache.PARTIAL_SIZE + 1000)
+
+
+def make_projects(make_project, tmp_path):
+    a = make_project("a", {"logo.png": b"logo" * 100, "video.mp4": BIG})
+    b = make_project("b", {
+        "img/logo.png": b"logo" * 100,
+        "video.mp4": BIG,
+        # Тот же размер и то же начало, но другой конец: отличается только полный хэш
+        "other.mp4": BIG[:-1] + bytes([BIG[-1] ^ 1]),
+        "unique.txt": b"u" * 400,
+        "node_modules/logo.png": b"logo" * 100,
+    })
+    return {"a": a, "b": b, "missing": str(tmp_path / "none")}
+
+
+def test_groups_sorted_by_wasted_space(tmp_path, make_project):
+    projects = make_projects(make_project, tmp_path)
+    cache = FileHashCache(str(tmp_path / "hashes.json"))
+    groups = find_duplicates(projects, cache, ["node_modules"])
+
+    assert [group["size"] for group in groups] == [len(BIG), 400]
+    video, logo = groups
+    assert video["files"] == [{"site": "a", "path": "video.mp4"}, {"site": "b", "path": "video.mp4"}]
+    assert video["wasted"] == len(BIG)
+    assert video["hash"] == hashlib.blake2b(BIG, digest_size=16).hexdigest()
+    assert logo["files"] == [{"site": "a", "path": "logo.png"}, {"site": "b", "path": os.path.join("img", "logo.png")}]
+    assert logo["hash"]
+
+
+def test_min_size_and_overlapping_projects(tmp_path, make_project):
+    projects = make_projects(make_project, tmp_path)
+    projects["a again"] = projects["a"]
+    groups = find_duplicates(projects, FileHashCache(str(tmp_path / "hashes.json")), ["node_modules"],
+                             min_size=1000)
+    # Один и тот же файл двух записей о сайте не считается дубликатом
+    assert len(groups) == 1 and len(groups[0]["files"]) == 2
+
+
+def test_cache_is_reused_and_invalidated(tmp_path, make_project, write_file, monkeypatch):
+    projects = make_projects(make_project, tmp_path)
+    cache_file = str(tmp_path / "hashes.json")
+    cache = FileHashCache(cache_file)
+    first = find_duplicates(projects, cache, ["node_modules"])
+    cache.save()
+
+    reloaded = FileHashCache(cache_file)
+    reloaded.load()
+    reads = []
+    original_open = open
+
+    def counting_open(path, *args, **kwargs):
+        reads.append(path)
+        return original_open(path, *args, **kwargs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr("builtins.open", counting_open)
+        assert find_duplicates(projects, reloaded, ["node_modules"]) == first
+    assert reads == []
+
+    write_file(os.path.join(projects["b"], "video.mp4"), os.urandom(len(BIG)))
+    groups = find_duplicates(projects, reloaded, ["node_modules"])
+    assert [group["size"] for group in groups] == [400]
+
+
+def test_progress_reports_stages(tmp_path, make_project):
+    projects = make_projects(make_project, tmp_path)
+    stages = []
+    find_duplicates(projects, FileHashCache(str(tmp_path / "hashes.json")), progress=stages.append)
+    assert stages[0] == "scan" and "partial" in stages and "full" in stages
+
+
+def test_cancel_returns_nothing(tmp_path, make_project):
+    projects = make_projects(make_project, tmp_path)
+    cancel_event = threading.Event()
+    stages = []
+
+    def progress(stage):
+        stages.append(stage)
+        if stage == "partial":
+            cancel_event.set()
+
+    assert find_duplicates(projects, FileHashCache(str(tmp_path / "hashes.json")), progress=progress,
+                           cancel_event=cancel_event) == []
+    assert stages[0] == "scan" and "full" not in stages
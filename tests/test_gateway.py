@@ -0,0 +1,154 @@
+"""Тесты шлюза, раздающего все сайты на одном порту (GatewayHTTPServer)."""
+import http.client
+import os
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+from website_server import GATEWAY_NAME, GatewayHTTPServer, ServerManager, gateway_host_label
+
+
+@pytest.fixture
+def websites(make_project):
+    a = make_project("a", {"index.html": "<html><body>A</body></html>", "css/style.css": "body{}"})
+    b = make_project("b", {"page.html": "<html><body>B</body></html>"})
+    return {
+        "Сайт А": {"path": a, "main_file": "index.html"},
+        "b": {"path": b, "main_file": "page.html"},
+        "no path": {"path": ""},
+    }
+
+
+def start(httpd):
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return httpd
+
+
+@pytest.fixture
+def gateway(websites):
+    httpd = start(GatewayHTTPServer(("127.0.0.1", 0), websites))
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(server, path, host=None, connection=None):
+    connection = connection or http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    headers = {"Host": host} if host else {}
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    return response, response.read()
+
+
+def prefix(name):
+    return "/" + urllib.parse.quote(name)
+
+
+def test_host_label():
+    assert gateway_host_label("My Site (2)") == "my-site-2"
+    assert gateway_host_label("Сайт А") == "сайт-а"
+    assert gateway_host_label("___") == ""
+
+
+def test_routes_by_path_prefix(gateway):
+    response, body = request(gateway, prefix("Сайт А") + "/css/style.css")
+    assert response.status == 200 and body == b"body{}"
+    assert request(gateway, prefix("Сайт А") + "/")[1] == b"<html><body>A</body></html>"
+    assert request(gateway, "/b/page.html")[1] == b"<html><body>B</body></html>"
+    assert request(gateway, "/b/missing.html")[0].status == 404
+    assert request(gateway, "/unknown/")[0].status == 404
+
+
+def test_prefix_without_slash_redirects(gateway):
+    response, _ = request(gateway, "/b?x=1")
+    assert response.status == 301
+    assert response.getheader("Location") == "/b/?x=1"
+
+
+def test_prefix_does_not_escape_site_folder(gateway):
+    assert request(gateway, "/b/../a/index.html")[0].status == 404
+    assert request(gateway, "/b/%2e%2e/a/index.html")[0].status == 404
+
+
+def test_routes_by_host(gateway):
+    port = gateway.server_address[1]
+    response, body = request(gateway, "/page.html", host=f"B.localhost:{port}")
+    assert response.status == 200 and body == b"<html><body>B</body></html>"
+    punycode = gateway_host_label("Сайт А").encode("idna").decode("ascii")
+    assert request(gateway, "/css/style.css", host=f"{punycode}.localhost:{port}")[1] == b"body{}"
+    # Неизвестный хост: выбор по пути
+    assert request(gateway, "/b/page.html", host=f"other.localhost:{port}")[0].status == 200
+
+
+def test_index_lists_sites(gateway):
+    response, body = request(gateway, "/")
+    page = body.decode("utf-8")
+    assert response.status == 200
+    assert "Сайты (2)" in page
+    assert f'href="{prefix("Сайт А")}/index.html"' in page
+    assert 'href="/b/page.html"' in page
+    assert "no path" not in page
+
+
+def test_set_sites_rebuilds_routes(gateway, make_project):
+    connection = http.client.HTTPConnection("127.0.0.1", gateway.server_address[1], timeout=10)
+    assert request(gateway, "/b/page.html", connection=connection)[0].status == 200
+    assert gateway.set_sites({"c": {"path": make_project("c", {"index.html": "C"})}}) == 1
+    # То же keep-alive соединение видит новую таблицу маршрутов
+    assert request(gateway, "/b/page.html", connection=connection)[0].status == 404
+    assert request(gateway, "/c/", connection=connection)[1] == b"C"
+    connection.close()
+
+
+def test_file_cache_is_shared(gateway):
+    request(gateway, "/b/page.html")
+    request(gateway, prefix("Сайт А") + "/index.html")
+    assert len(gateway.file_cache.entries) == 2
+
+
+def test_live_reload_is_per_site_and_lazy(websites, write_file):
+    gateway = start(GatewayHTTPServer(("127.0.0.1", 0), websites, live_reload=True))
+    try:
+        assert all(route.watcher is None for route in gateway.routes[0].values())
+        body = request(gateway, "/b/page.html")[1].decode("utf-8")
+        assert 'EventSource("/b/__livereload")' in body
+        route = gateway.routes[0]["b"]
+        assert route.watcher is not None
+        assert gateway.routes[0]["Сайт А"].watcher is None
+
+        connection = http.client.HTTPConnection("127.0.0.1", gateway.server_address[1], timeout=10)
+        connection.request("GET", "/b/__livereload")
+        response = connection.getresponse()
+        assert response.getheader("Content-Type") == "text/event-stream"
+        assert response.read1(100) == b"retry: 1000\n\n"
+        time.sleep(0.5)
+        write_file(os.path.join(websites["b"]["path"], "page.html"), "changed")
+        event = b""
+        deadline = time.time() + 5
+        while b"reload" not in event and time.time() < deadline:
+            event += response.read1(200)
+        assert event.startswith(b"event: reload") and b"page.html" in event
+        connection.close()
+
+        # Удаленный из таблицы сайт перестает отслеживаться
+        gateway.set_sites({})
+        assert route.closed
+    finally:
+        gateway.shutdown()
+        gateway.server_close()
+
+
+def test_server_manager_gateway(websites):
+    manager = ServerManager(host="127.0.0.1", first_port=18700)
+    try:
+        info = manager.start_gateway(websites)
+        assert manager.start_gateway(websites) is info
+        assert manager.get(GATEWAY_NAME) is info
+        assert request(info["server"], "/b/page.html")[0].status == 200
+        assert manager.update_gateway({}) is True
+        assert request(info["server"], "/b/page.html")[0].status == 404
+    finally:
+        manager.stop_all()
+    assert manager.update_gateway(websites) is False
@@ -0,0 +1,77 @@
+"""Тесты проверки состояния проектов (check_project_health, ProjectHealthCache)."""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from website_core import ProjectHealthCache, check_project_health
+
+
+@pytest.fixture
+def websites(tmp_path, make_project):
+    return {
+        "ok": {"path": make_project("ok", {"index.html": ""}), "main_file": "index.html"},
+        "no main": {"path": make_project("no main", {"about.html": ""}), "main_file": "index.html"},
+        "missing": {"path": str(tmp_path / "none"), "main_file": "index.html"},
+    }
+
+
+def test_check_project_health_statuses(websites):
+    ok = check_project_health(websites["ok"])
+    assert ok["status"] == "ok" and ok["path_exists"] and ok["main_file_exists"] and ok["git"] is None
+    assert ok["mtime"] == max(os.stat(websites["ok"]["path"]).st_mtime,
+                              os.stat(os.path.join(websites["ok"]["path"], "index.html")).st_mtime)
+
+    no_main = check_project_health(websites["no main"])
+    assert no_main["status"] == "no_main_file" and no_main["path_exists"] and not no_main["main_file_exists"]
+
+    missing = check_project_health(websites["missing"])
+    assert missing["status"] == "missing" and not missing["path_exists"] and missing["mtime"] is None
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git не установлен")
+def test_dirty_git_tree(make_project):
+    project = make_project("repo", {"index.html": ""})
+    subprocess.run(["git", "init", "-q"], cwd=project, check=True)
+    # Неотслеживаемый index.html - это незакоммиченное изменение
+    assert check_project_health({"path": project, "main_file": "index.html"})["status"] == "dirty"
+
+
+def test_check_many_rechecks_only_stale_entries(websites, tmp_path):
+    cache = ProjectHealthCache(str(tmp_path / "health.json"))
+    progress = []
+    results = cache.check_many(websites, progress=lambda done, total: progress.append((done, total)))
+    assert {name: result["status"] for name, result in results.items()} == \
+        {"ok": "ok", "no main": "no_main_file", "missing": "missing"}
+    assert progress[-1] == (3, 3)
+
+    # Свежие результаты не перепроверяются
+    assert cache.check_many(websites) == {}
+    # Измененный основной файл делает запись устаревшей
+    websites["no main"]["main_file"] = "about.html"
+    assert {name: result["status"] for name, result in cache.check_many(websites).items()} == {"no main": "ok"}
+    # Записи старше max_age проверяются заново
+    assert sorted(cache.check_many(websites, max_age=0)) == ["missing", "no main", "ok"]
+
+
+def test_results_are_saved_and_removed_sites_pruned(websites, tmp_path):
+    cache_file = str(tmp_path / "health.json")
+    cache = ProjectHealthCache(cache_file)
+    cache.check_many(websites)
+    cache.save()
+
+    reloaded = ProjectHealthCache(cache_file)
+    reloaded.load()
+    assert reloaded.get("missing")["status"] == "missing"
+    del websites["missing"]
+    assert reloaded.check_many(websites) == {}
+    assert reloaded.get("missing") is None and reloaded.dirty
+
+
+def test_check_many_without_prune_keeps_other_sites(websites, tmp_path):
+    cache = ProjectHealthCache(str(tmp_path / "health.json"))
+    cache.check_many(websites)
+    # Проверка одного сайта не трогает записи остальных
+    assert list(cache.check_many({"ok": websites["ok"]}, max_age=0, prune=False)) == ["ok"]
+    assert cache.get("missing")["status"] == "missing" and cache.get("no main") is not None
@@ -0,0 +1,108 @@
+"""Тесты проверки ссылок проекта (website_links) на временном сервере и заданном порту."""
+import asyncio
+import threading
+
+import pytest
+
+import website_server
+from website_links import check_project, collect_references, fetch_paths
+
+FILES = {
+    "index.html": '<link href="css/site.css"><img src="img/logo.png"><a href="about/">О нас</a>'
+                  '<a href="https://example.com/">внешняя</a><a href="#top">якорь</a>'
+                  '<img src="img/missing.png"><script src="js/app.js?v=2"></script>',
+    "about/index.html": '<a href="../index.html">назад</a><a href="../contacts.html">контакты</a>',
+    "css/site.css": "body { background: url('../img/logo.png'); } .x { background: url(../img/bg.jpg) }",
+    "js/app.js": "console.log(1);",
+    "img/logo.png": b"PNG" * 400,
+    "img/big.jpg": b"x" * 5000,
+}
+
+
+class CountingServer(website_server.ProjectHTTPServer):
+    """Сервер проекта, запоминающий число соединений и наибольшее число одновременных."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = 0
+        self.max_active = 0
+
+    def process_request(self, request, client_address):
+        super().process_request(request, client_address)
+        with self.connections_lock:
+            self.opened += 1
+            self.max_active = max(self.max_active, len(self.active_connections))
+
+
+@pytest.fixture
+def project(make_project):
+    return make_project("site", FILES)
+
+
+def start(httpd):
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return httpd
+
+
+def broken_targets(report):
+    return sorted((item["source"], item["target"], item["reason"]) for item in report["broken"])
+
+
+def test_collect_references(project):
+    scanned, references = collect_references(project)
+    assert scanned == 3
+    assert sorted(references) == ["about/index.html", "contacts.html", "css/site.css", "img/bg.jpg",
+                                  "img/logo.png", "img/missing.png", "index.html", "js/app.js"]
+    assert sorted(references["img/logo.png"]) == [("css/site.css", "../img/logo.png"),
+                                                  ("index.html", "img/logo.png")]
+
+
+def test_temporary_server_finds_missing_files(project, monkeypatch):
+    servers = []
+
+    def make_server(*args, **kwargs):
+        servers.append(CountingServer(*args, **kwargs))
+        return servers[-1]
+
+    monkeypatch.setattr(website_server, "ProjectHTTPServer", make_server)
+    report = check_project(project, max_asset_size=1000)
+    assert broken_targets(report) == [
+        ("about/index.html", "contacts.html", "файл не найден"),
+        ("css/site.css", "img/bg.jpg", "файл не найден"),
+        ("index.html", "img/missing.png", "файл не найден"),
+    ]
+    assert report["files"] == 3 and report["targets"] == 8 and report["references"] == 9
+    assert report["oversized"] == [{"path": "img/logo.png", "size": 1200}]
+    # Временный сервер поднят на время проверки и закрыт после нее
+    assert len(servers) == 1 and servers[0].opened >= 1
+    assert servers[0].socket.fileno() == -1
+
+
+def test_given_port_is_used_and_http_errors_are_reported(project, make_project):
+    # Сервер на порту раздает другую папку: файлы есть на диске, но сервер отвечает 404
+    other = make_project("other", {"index.html": "", "css/site.css": ""})
+    httpd = start(CountingServer(("127.0.0.1", 0), other))
+    try:
+        report = check_project(project, port=httpd.server_address[1])
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    reasons = {target: reason for _, target, reason in broken_targets(report)}
+    assert reasons["img/logo.png"] == "HTTP 404" and reasons["js/app.js"] == "HTTP 404"
+    assert "css/site.css" not in reasons and "index.html" not in reasons
+    assert httpd.opened >= 1
+
+
+def test_fetch_paths_keeps_concurrency_bounded(project):
+    httpd = start(CountingServer(("127.0.0.1", 0), project))
+    paths = ["index.html", "css/site.css", "js/app.js", "img/logo.png", "img/big.jpg"] * 6
+    try:
+        results = asyncio.run(fetch_paths("127.0.0.1", httpd.server_address[1], paths, concurrency=2))
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert sorted(results) == sorted(set(paths))
+    assert all(status == 200 for status, _, _ in results.values())
+    assert results["img/big.jpg"][:2] == (200, 5000)
+    # Два клиента, каждый со своим keep-alive соединением
+    assert httpd.opened == 2 and httpd.max_active <= 2
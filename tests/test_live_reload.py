@@ -0,0 +1,115 @@
+"""Тесты автообновления: наблюдение за файлами (ProjectWatcher) и поток событий сервера."""
+import http.client
+import os
+import threading
+import time
+
+from website_server import LIVE_RELOAD_SCRIPT, ProjectHTTPServer, ProjectWatcher, inject_live_reload_script
+
+FILES = {
+    "index.html": "<html><body>Привет</body></html>",
+    "css/style.css": "body{}",
+    "node_modules/lib.js": "",
+}
+
+
+def test_check_reports_added_changed_and_removed_files(make_project, write_file):
+    project = make_project("site", FILES)
+    watcher = ProjectWatcher(project, lambda paths: None, ["node_modules"])
+    watcher.scan_dir(project)
+    assert watcher.check() == set()
+
+    added = write_file(os.path.join(project, "css", "new.css"), "a{}")
+    write_file(os.path.join(project, "node_modules", "other.js"), "")
+    assert watcher.check() == {added}
+
+    style = os.path.join(project, "css", "style.css")
+    write_file(style, "body{color:red}")
+    assert watcher.check() == {style}
+
+    os.remove(added)
+    assert watcher.check() == {added}
+
+
+def test_watcher_reports_write_after_debounce(make_project, write_file):
+    project = make_project("site", FILES)
+    events = []
+    received = threading.Event()
+
+    def on_change(paths):
+        events.append(paths)
+        received.set()
+
+    watcher = ProjectWatcher(project, on_change, interval=0.05, debounce=0.1)
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        page = write_file(os.path.join(project, "index.html"), "<html><body>Изменено</body></html>")
+        assert received.wait(5)
+    finally:
+        watcher.stop()
+    assert events == [[page]]
+
+
+def test_inject_live_reload_script():
+    script = (LIVE_RELOAD_SCRIPT % '"/__livereload"').encode("utf-8")
+    assert inject_live_reload_script(b"<html><BODY>x</BODY></html>") == b"<html><BODY>x" + script + b"</BODY></html>"
+    assert inject_live_reload_script(b"<p>x</p>") == b"<p>x</p>" + script
+    assert b'EventSource("/site/__livereload")' in inject_live_reload_script(b"<p>x</p>", "/site/__livereload")
+
+
+def test_server_streams_reload_events(make_project, write_file):
+    project = make_project("site", FILES)
+    httpd = ProjectHTTPServer(("127.0.0.1", 0), project, live_reload=True)
+    httpd.watcher.interval = 0.05
+    httpd.watcher.debounce = 0.1
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+        connection.request("GET", "/")
+        assert b'EventSource("/__livereload")' in connection.getresponse().read()
+
+        connection.request("GET", "/__livereload")
+        response = connection.getresponse()
+        assert response.getheader("Content-Type") == "text/event-stream"
+        assert response.read1(100) == b"retry: 1000\n\n"
+        time.sleep(0.2)
+        write_file(os.path.join(project, "css", "style.css"), "body{color:red}")
+        event = b""
+        deadline = time.time() + 5
+        while b"\n\n" not in event and time.time() < deadline:
+            event += response.read1(200)
+        assert event.startswith(b"event: reload") and b"style.css" in event
+        connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_live_reload_streams_are_limited(make_project):
+    httpd = ProjectHTTPServer(("127.0.0.1", 0), make_project("site", FILES), live_reload=True)
+    httpd.max_live_reload_streams = 1
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    try:
+        first = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+        first.request("GET", "/__livereload")
+        assert first.getresponse().status == 200
+
+        second = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+        second.request("GET", "/__livereload")
+        assert second.getresponse().status == 503
+        second.close()
+        # Обычные страницы по-прежнему отдаются
+        page = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+        page.request("GET", "/")
+        assert page.getresponse().status == 200
+        page.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    first.close()
+    # Закрытие сервера завершает поток событий и освобождает место
+    deadline = time.time() + 5
+    while httpd.live_reload_streams:
+        assert time.time() < deadline
+        time.sleep(0.01)
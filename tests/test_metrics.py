@@ -0,0 +1,81 @@
+"""Тесты метрик запросов сервера проекта (ServerMetrics)."""
+import http.client
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from website_server import ProjectHTTPServer, ServerMetrics
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "условие не выполнено"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server(make_project):
+    project = make_project("site", {"index.html": "<html></html>", "big.txt": "x" * 5000})
+    httpd = ProjectHTTPServer(("127.0.0.1", 0), project)
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_snapshot_counts_percentiles_and_histogram():
+    metrics = ServerMetrics()
+    for ms in range(1, 101):
+        metrics.record("/a", 200, 10, ms / 1000)
+    metrics.record("/b", 404, 0, 0.5)
+    snapshot = metrics.snapshot()
+    assert snapshot["requests"] == 101 and snapshot["bytes_sent"] == 1000
+    assert snapshot["status_codes"] == {"200": 100, "404": 1}
+    assert snapshot["latency_ms"]["p50"] == 51 and snapshot["latency_ms"]["max"] == 500
+    assert sum(bucket["count"] for bucket in snapshot["histogram_ms"]) == 101
+    assert snapshot["slowest_paths"][0]["path"] == "/b"
+    assert snapshot["largest_paths"][0] == {"path": "/a", "count": 100, "avg_ms": 50.5, "max_ms": 100,
+                                            "bytes": 1000}
+
+
+def test_path_table_is_bounded():
+    metrics = ServerMetrics(max_paths=2)
+    for path in ("/a", "/b", "/c", "/a"):
+        metrics.record(path, 200, 1, 0.001)
+    snapshot = metrics.snapshot()
+    assert snapshot["requests"] == 4
+    assert sorted(item["path"] for item in snapshot["largest_paths"]) == ["/a", "/b"]
+
+
+def test_server_records_requests_and_connections(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    for path in ("/index.html?v=1", "/big.txt"):
+        connection.request("GET", path)
+        connection.getresponse().read()
+    assert server.metrics.snapshot()["in_flight"] == 1
+    # Ответ с ошибкой закрывает keep-alive соединение
+    connection.request("GET", "/missing")
+    connection.getresponse().read()
+    connection.close()
+    wait_for(lambda: server.metrics.snapshot()["in_flight"] == 0)
+
+    snapshot = server.metrics.snapshot()
+    assert snapshot["requests"] == 3
+    assert snapshot["status_codes"] == {"200": 2, "404": 1}
+    assert {item["path"] for item in snapshot["largest_paths"]} == {"/index.html", "/big.txt", "/missing"}
+    assert snapshot["largest_paths"][0]["path"] == "/big.txt" and snapshot["bytes_sent"] >= 5000
+
+
+def test_bad_request_line_is_not_recorded(server, monkeypatch):
+    errors = []
+    monkeypatch.setattr(server, "handle_error", lambda request, address: errors.append(sys.exc_info()[1]))
+    with socket.create_connection(("127.0.0.1", server.server_address[1]), timeout=10) as sock:
+        sock.sendall(b"GET / HTTP/abc\r\n\r\n")
+        # Версия протокола не разобрана, поэтому ответ приходит без строки статуса
+        assert b"Error code: 400" in sock.makefile("rb").read()
+    wait_for(lambda: server.metrics.snapshot()["in_flight"] == 0)
+    assert errors == [] and server.metrics.snapshot()["requests"] == 0
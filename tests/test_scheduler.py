@@ -0,0 +1,156 @@
+"""Тесты планировщика фоновых задач (TaskScheduler)."""
+import threading
+import time
+
+import pytest
+
+from website_core import PRIORITY_HIGH, PRIORITY_LOW, TaskCancelled, TaskScheduler
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "условие не выполнено"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = TaskScheduler(max_workers=4)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_result_and_error_are_delivered(scheduler):
+    results = []
+    errors = []
+    scheduler.submit("ok", lambda task, a, b: a + b, 2, 3, on_done=results.append)
+    scheduler.submit("fail", lambda task: 1 / 0, on_error=errors.append)
+    wait_for(lambda: results and errors)
+    assert results == [5]
+    assert isinstance(errors[0], ZeroDivisionError)
+
+
+def test_lane_runs_tasks_one_at_a_time_in_order(scheduler):
+    order = []
+    running = []
+    overlaps = []
+
+    def work(task, index):
+        running.append(index)
+        if len(running) > 1:
+            overlaps.append(index)
+        time.sleep(0.01)
+        order.append(index)
+        running.remove(index)
+
+    tasks = [scheduler.submit(f"write {i}", work, i, lane="storage",
+                              priority=PRIORITY_LOW if i % 2 else PRIORITY_HIGH) for i in range(6)]
+    wait_for(lambda: not any(task.pending for task in tasks))
+    assert order == list(range(6))
+    assert overlaps == []
+
+
+def test_priority_orders_queued_tasks():
+    scheduler = TaskScheduler(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def blocker(task):
+        started.set()
+        release.wait(5)
+
+    scheduler.submit("blocker", blocker)
+    started.wait(5)
+    low = scheduler.submit("low", lambda task: order.append("low"), priority=PRIORITY_LOW)
+    high = scheduler.submit("high", lambda task: order.append("high"), priority=PRIORITY_HIGH)
+    release.set()
+    wait_for(lambda: not low.pending and not high.pending)
+    scheduler.shutdown()
+    assert order == ["high", "low"]
+
+
+def test_cancel_queued_and_running_tasks(scheduler):
+    started = threading.Event()
+    done = []
+
+    def long_task(task):
+        started.set()
+        while True:
+            task.check_cancelled()
+            time.sleep(0.01)
+
+    running = scheduler.submit("long", long_task, lane="x", on_done=done.append)
+    queued = scheduler.submit("queued", lambda task: done.append("ran"), lane="x", on_done=done.append)
+    started.wait(5)
+    assert scheduler.cancel(queued) is True
+    assert queued.state == "cancelled"
+    scheduler.cancel(running)
+    wait_for(lambda: not running.pending)
+    assert running.state == "cancelled"
+    # Очередь lane освобождена: следующая задача выполняется
+    after = scheduler.submit("after", lambda task: "ok", lane="x")
+    wait_for(lambda: not after.pending)
+    assert after.state == "done"
+    assert done == []
+
+
+def test_result_of_task_cancelled_after_finishing_work_is_dropped():
+    delivered = []
+    pending_callbacks = []
+    scheduler = TaskScheduler(max_workers=1, deliver=lambda callback, *args: pending_callbacks.append((callback, args)))
+    task = scheduler.submit("work", lambda task: "result", on_done=delivered.append)
+    wait_for(lambda: not task.pending)
+    task.cancel_event.set()
+    for callback, args in pending_callbacks:
+        callback(*args)
+    scheduler.shutdown()
+    assert delivered == []
+
+
+def test_non_cancellable_task_and_group_cancel(scheduler):
+    release = threading.Event()
+
+    def search(task):
+        release.wait(5)
+        task.check_cancelled()
+
+    keep = scheduler.submit("save", lambda task: release.wait(5), cancellable=False, group="g")
+    drop = scheduler.submit("search", search, group="g")
+    scheduler.cancel_group("g")
+    release.set()
+    wait_for(lambda: not keep.pending and not drop.pending)
+    assert keep.state == "done"
+    assert drop.state == "cancelled"
+
+
+def test_untracked_tasks_are_hidden_and_changes_notified():
+    changes = []
+    scheduler = TaskScheduler(max_workers=2, on_change=lambda: changes.append(1))
+    visible = scheduler.submit("visible", lambda task: task.set_progress(1, 2, "половина"))
+    hidden = scheduler.submit("hidden", lambda task: None, track=False)
+    wait_for(lambda: not visible.pending and not hidden.pending)
+    scheduler.shutdown()
+    assert [task.title for task in scheduler.list()] == ["visible"]
+    assert visible.describe_progress() == "1/2 (50%) половина"
+    assert changes
+
+
+def test_shutdown_waits_for_non_cancellable_tasks_and_rejects_new_ones():
+    scheduler = TaskScheduler(max_workers=2)
+    finished = []
+    scheduler.submit("write", lambda task: time.sleep(0.2) or finished.append(True), cancellable=False)
+    scheduler.shutdown()
+    assert finished == [True]
+    with pytest.raises(RuntimeError):
+        scheduler.submit("late", lambda task: None)
+
+
+def test_check_cancelled_raises():
+    scheduler = TaskScheduler(max_workers=1)
+    task = scheduler.submit("t", lambda task: None)
+    task.cancel_event.set()
+    with pytest.raises(TaskCancelled):
+        task.check_cancelled()
+    scheduler.shutdown()
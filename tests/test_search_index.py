@@ -0,0 +1,82 @@
+"""Тесты индекса поиска сайтов (SearchIndex)."""
+from website_core import SearchIndex
+
+
+def site(description="", tags=(), path="", added_date=""):
+    return {"description": description, "tags": list(tags), "path": path, "added_date": added_date}
+
+
+def make_index():
+    index = SearchIndex()
+    index.rebuild({
+        "Landing": site("Промо-страница", ["html", "css"], "/work/landing"),
+        "Shop": site("Интернет-магазин", ["react"], "/work/shop"),
+        "Blog": site("Личный блог", ["html"], "/home/blog"),
+    })
+    return index
+
+
+def test_empty_query_returns_all_in_order():
+    assert make_index().search("") == ["Landing", "Shop", "Blog"]
+
+
+def test_substring_matches_every_field():
+    index = make_index()
+    assert index.search("магазин") == ["Shop"]
+    assert index.search("react") == ["Shop"]
+    assert index.search("/work/") == ["Landing", "Shop"]
+    assert index.search("blog") == ["Blog"]
+
+
+def test_search_is_case_insensitive():
+    index = make_index()
+    assert index.search("LANDING") == ["Landing"]
+    assert index.search("ПРОМО") == ["Landing"]
+
+
+def test_short_query_uses_linear_scan():
+    index = make_index()
+    assert index.search("sh") == ["Shop"]
+    assert index.search("zz") == []
+
+
+def test_missing_ngram_returns_nothing():
+    assert make_index().search("nothing like this") == []
+
+
+def test_candidates_are_checked_for_the_whole_substring():
+    index = SearchIndex()
+    index.rebuild({"a": site("abc bcd"), "b": site("abcd")})
+    # Обе записи содержат n-граммы "abc" и "bcd", но подстроку - только вторая
+    assert index.search("abcd") == ["b"]
+
+
+def test_update_replaces_old_text_and_keeps_position():
+    index = make_index()
+    index.add("Landing", site("Новое описание"))
+    assert index.search("промо") == []
+    assert index.search("новое") == ["Landing"]
+    assert index.search("") == ["Landing", "Shop", "Blog"]
+
+
+def test_remove_drops_site_and_its_ngrams():
+    index = make_index()
+    index.remove("Shop")
+    index.remove("missing")
+    assert index.search("") == ["Landing", "Blog"]
+    assert index.search("магазин") == []
+    assert all("Shop" not in names for names in index.ngrams.values())
+    assert "Shop" not in index.name_keys and "Shop" not in index.date_keys
+
+
+def test_frequent_ngram_keeps_order():
+    index = SearchIndex()
+    index.rebuild({f"site{i}": site("common text") for i in range(10)})
+    assert index.search("common") == [f"site{i}" for i in range(10)]
+
+
+def test_sort_keys_are_precomputed():
+    index = SearchIndex()
+    index.add("Beta", site(added_date="2024-01-02"))
+    assert index.name_keys["Beta"] == "beta"
+    assert index.date_keys["Beta"] == "2024-01-02"
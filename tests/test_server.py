@@ -0,0 +1,248 @@
+"""Тесты сервера проекта: пул потоков, условные запросы, сжатие, кэш файлов и диапазоны."""
+import gzip
+import http.client
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from website_server import ProjectHTTPServer, ServerManager, parse_byte_ranges
+
+PAGE = "<html><body>" + "Привет, мир! " * 100 + "</body></html>"
+DATA = bytes(range(256)) * 16
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "site"
+    root.mkdir()
+    (root / "index.html").write_text(PAGE, encoding="utf-8")
+    (root / "small.txt").write_text("tiny", encoding="utf-8")
+    (root / "data.bin").write_bytes(DATA)
+    return root
+
+
+@pytest.fixture
+def server(site):
+    httpd = ProjectHTTPServer(("127.0.0.1", 0), str(site))
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(server, path, headers=None, connection=None):
+    connection = connection or http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    return response, response.read()
+
+
+def test_serves_files_from_directory(server):
+    response, body = request(server, "/")
+    assert response.status == 200
+    assert body.decode("utf-8") == PAGE
+    assert request(server, "/data.bin")[1] == DATA
+
+
+def test_serves_index_without_compression_by_default(server):
+    response, body = request(server, "/")
+    assert response.status == 200
+    assert body.decode("utf-8") == PAGE
+    assert response.getheader("Content-Encoding") is None
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert response.getheader("ETag")
+
+
+def test_if_none_match_returns_304(server):
+    response, _ = request(server, "/index.html")
+    etag = response.getheader("ETag")
+    response, body = request(server, "/index.html", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+    # Сжатый вариант того же файла тоже считается совпадением
+    gzip_etag = etag[:-1] + '-gzip"'
+    assert request(server, "/index.html", {"If-None-Match": "W/" + gzip_etag})[0].status == 304
+    assert request(server, "/index.html", {"If-None-Match": '"other"'})[0].status == 200
+
+
+def test_if_modified_since(server):
+    response, _ = request(server, "/data.bin")
+    last_modified = response.getheader("Last-Modified")
+    assert request(server, "/data.bin", {"If-Modified-Since": last_modified})[0].status == 304
+    assert request(server, "/data.bin", {"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"})[0].status == 200
+
+
+def test_gzip_response(server):
+    response, body = request(server, "/index.html", {"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("ETag").endswith('-gzip"')
+    assert gzip.decompress(body).decode("utf-8") == PAGE
+
+
+def test_small_and_binary_files_are_not_compressed(server):
+    assert request(server, "/small.txt", {"Accept-Encoding": "gzip"})[0].getheader("Content-Encoding") is None
+    response, body = request(server, "/data.bin", {"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") is None
+    assert body == DATA
+
+
+def test_precompressed_file_is_preferred(server, site):
+    marker = gzip.compress(b"precompressed", mtime=0)
+    (site / "index.html.gz").write_bytes(marker)
+    response, body = request(server, "/index.html", {"Accept-Encoding": "gzip"})
+    assert body == marker
+
+    # Исходник новее сжатой копии: она устарела и не используется
+    os.utime(site / "index.html.gz", ns=(0, 0))
+    server.file_cache.entries.clear()
+    response, body = request(server, "/index.html", {"Accept-Encoding": "gzip"})
+    assert gzip.decompress(body).decode("utf-8") == PAGE
+
+
+def test_changed_file_is_not_served_from_cache(server, site):
+    request(server, "/small.txt")
+    (site / "small.txt").write_text("changed content", encoding="utf-8")
+    os.utime(site / "small.txt", ns=(1, 10 ** 18))
+    assert request(server, "/small.txt")[1] == b"changed content"
+
+
+def test_keep_alive_and_missing_files(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    for _ in range(3):
+        response, _ = request(server, "/small.txt", connection=connection)
+        assert response.status == 200 and not response.will_close
+    assert request(server, "/missing.html", connection=connection)[0].status == 404
+    connection.close()
+
+
+def test_parallel_connections_share_the_pool(site):
+    httpd = ProjectHTTPServer(("127.0.0.1", 0), str(site), max_workers=2)
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    try:
+        connections = [http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+                       for _ in range(2)]
+        for connection in connections:
+            assert request(httpd, "/small.txt", connection=connection)[1] == b"tiny"
+        assert len(httpd.active_connections) == 2
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    # server_close обрывает простаивающие keep-alive соединения и освобождает пул
+    for connection in connections:
+        with pytest.raises((http.client.HTTPException, OSError)):
+            request(httpd, "/small.txt", connection=connection)
+
+
+def test_server_close_closes_queued_connections(site):
+    httpd = ProjectHTTPServer(("127.0.0.1", 0), str(site), max_workers=1)
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    # Единственный поток пула занят, поэтому соединение ждет в очереди
+    release = threading.Event()
+    httpd.executor.submit(release.wait, 10)
+    try:
+        queued = socket.create_connection(httpd.server_address, timeout=10)
+        deadline = time.time() + 5
+        while not httpd.active_connections:
+            assert time.time() < deadline
+            time.sleep(0.01)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        release.set()
+    with queued:
+        assert queued.recv(100) == b""
+    assert not httpd.active_connections and httpd.metrics.snapshot()["in_flight"] == 0
+
+
+
+def test_server_manager_runs_sites_side_by_side(site, tmp_path):
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "small.txt").write_text("other", encoding="utf-8")
+    cwd = os.getcwd()
+    manager = ServerManager(host="127.0.0.1", first_port=18600)
+    try:
+        first = manager.start("first", str(site))
+        second = manager.start("second", str(other))
+        assert manager.start("first", str(other)) is first
+        assert first["port"] != second["port"]
+        assert request(first["server"], "/small.txt")[1] == b"tiny"
+        assert request(second["server"], "/small.txt")[1] == b"other"
+        # Рабочая папка процесса не меняется
+        assert os.getcwd() == cwd
+        assert manager.stop("first") is True and manager.stop("first") is False
+        assert [info["name"] for info in manager.list()] == ["second"]
+    finally:
+        manager.stop_all()
+    assert manager.list() == []
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", [(0, 9)]),
+    ("bytes=500-", [(500, 4095)]),
+    ("bytes=-100", [(3996, 4095)]),
+    ("bytes=0-10,5-20,22-30", [(0, 20), (22, 30)]),
+    ("bytes=4000-9999", [(4000, 4095)]),
+    ("bytes=5000-6000", []),
+    ("bytes=-0", []),
+    ("bytes=10-5", None),
+    ("bytes=abc", None),
+    ("items=0-5", None),
+    ("bytes=" + ",".join(f"{i}-{i}" for i in range(0, 40, 2)), None),
+])
+def test_parse_byte_ranges(header, expected):
+    assert parse_byte_ranges(header, len(DATA)) == expected
+
+
+def test_single_range(server):
+    response, body = request(server, "/data.bin", {"Range": "bytes=100-199"})
+    assert response.status == 206
+    assert response.getheader("Content-Range") == f"bytes 100-199/{len(DATA)}"
+    assert response.getheader("Accept-Ranges") == "bytes"
+    assert body == DATA[100:200]
+
+
+def test_multipart_ranges(server):
+    response, body = request(server, "/data.bin", {"Range": "bytes=0-3,-4"})
+    assert response.status == 206
+    content_type = response.getheader("Content-Type")
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("=", 1)[1].encode()
+    assert body.endswith(b"--" + boundary + b"--\r\n")
+    assert b"Content-Range: bytes 0-3/4096\r\n\r\n" + DATA[:4] in body
+    assert b"Content-Range: bytes 4092-4095/4096\r\n\r\n" + DATA[-4:] in body
+    assert int(response.getheader("Content-Length")) == len(body)
+
+
+def test_unsatisfiable_range(server):
+    response, body = request(server, "/data.bin", {"Range": "bytes=9000-"})
+    assert response.status == 416
+    assert response.getheader("Content-Range") == f"bytes */{len(DATA)}"
+    assert body == b""
+
+
+def test_invalid_range_returns_whole_file(server):
+    response, body = request(server, "/data.bin", {"Range": "bytes=20-10"})
+    assert response.status == 200
+    assert body == DATA
+
+
+def test_if_range(server):
+    etag = request(server, "/data.bin")[0].getheader("ETag")
+    response, body = request(server, "/data.bin", {"Range": "bytes=0-0", "If-Range": etag})
+    assert response.status == 206 and body == DATA[:1]
+    # Файл изменился (другой ETag): клиент получает его целиком
+    response, body = request(server, "/data.bin", {"Range": "bytes=0-0", "If-Range": '"stale"'})
+    assert response.status == 200 and body == DATA
+
+
+def test_keep_alive_after_range(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    for start in (0, 1000, 4000):
+        response, body = request(server, "/data.bin", {"Range": f"bytes={start}-{start + 15}"}, connection)
+        assert body == DATA[start:start + 16]
+    connection.close()
@@ -0,0 +1,67 @@
+"""Тесты дискового кэша структуры проектов (DirectorySnapshotCache)."""
+import os
+
+from website_core import DirectorySnapshotCache, scan_directory_level
+
+IGNORE = ["node_modules"]
+FILES = {
+    "index.html": "<html></html>",
+    "css/style.css": "body{}",
+    "node_modules/lib.js": "",
+}
+
+
+def remember_level(cache, project, path):
+    dirs, files = scan_directory_level(path, IGNORE)
+    cache.set_level(project, path, os.stat(path).st_mtime, dirs, files, IGNORE)
+
+
+def test_level_is_reused_after_reload(tmp_path, make_project):
+    project = make_project("site", FILES)
+    cache_file = str(tmp_path / "tree_cache.json")
+    cache = DirectorySnapshotCache(cache_file)
+    remember_level(cache, project, project)
+    cache.save()
+
+    reloaded = DirectorySnapshotCache(cache_file)
+    reloaded.load()
+    cached = reloaded.get_level(project, project, IGNORE)
+    assert cached["dirs"] == ["css"] and cached["files"] == ["index.html"]
+    # mtime каталога не изменился: уровень берется из кэша без повторного чтения
+    assert cached["mtime"] == os.stat(project).st_mtime
+    assert reloaded.get_level(project, os.path.join(project, "css"), IGNORE) is None
+
+
+def test_changed_directory_is_rescanned(make_project, write_file, tmp_path):
+    project = make_project("site", FILES)
+    cache = DirectorySnapshotCache(str(tmp_path / "tree_cache.json"))
+    remember_level(cache, project, project)
+    write_file(os.path.join(project, "about.html"), "")
+    os.utime(project, ns=(0, 0))
+    assert cache.get_level(project, project, IGNORE)["mtime"] != os.stat(project).st_mtime
+
+    remember_level(cache, project, project)
+    assert cache.get_level(project, project, IGNORE)["files"] == ["about.html", "index.html"]
+
+
+def test_other_ignore_patterns_invalidate_project(make_project, tmp_path):
+    project = make_project("site", FILES)
+    cache = DirectorySnapshotCache(str(tmp_path / "tree_cache.json"))
+    remember_level(cache, project, project)
+    assert cache.get_level(project, project, []) is None
+
+
+def test_remove_project_and_broken_file(make_project, tmp_path):
+    project = make_project("site", FILES)
+    cache_file = tmp_path / "tree_cache.json"
+    cache = DirectorySnapshotCache(str(cache_file))
+    remember_level(cache, project, project)
+    cache.dirty = False
+    cache.remove_project(project)
+    cache.remove_project(project)
+    assert cache.dirty and cache.get_level(project, project, IGNORE) is None
+
+    cache_file.write_text("{broken", encoding="utf-8")
+    broken = DirectorySnapshotCache(str(cache_file))
+    broken.load()
+    assert broken.get_level(project, project, IGNORE) is None
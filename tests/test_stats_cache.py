@@ -0,0 +1,97 @@
+"""Тесты статистики занимаемого места по проектам (ProjectStatsCache)."""
+import os
+
+from website_core import ProjectStatsCache
+
+FILES = {
+    "index.html": "x" * 100,
+    "about.html": "x" * 50,
+    "css/site.css": "x" * 300,
+    "img/logo.png": b"x" * 1000,
+    "README": "x",
+    "node_modules/lib.js": "x" * 5000,
+}
+IGNORE = ["node_modules"]
+
+
+def count_reads(cache, monkeypatch):
+    """Подменяет read_dir и возвращает список прочитанных каталогов."""
+    reads = []
+    read_dir = cache.read_dir
+
+    def counting_read_dir(dir_path, mtime, ignore_patterns):
+        reads.append(dir_path)
+        return read_dir(dir_path, mtime, ignore_patterns)
+
+    monkeypatch.setattr(cache, "read_dir", counting_read_dir)
+    return reads
+
+
+def test_refresh_summarizes_project(tmp_path, make_project):
+    project = make_project("site", FILES)
+    stats = ProjectStatsCache(str(tmp_path / "stats.json")).refresh(project, IGNORE)
+    assert stats["total_size"] == 1451 and stats["file_count"] == 5 and stats["dir_count"] == 2
+    assert stats["extensions"][0] == {"ext": ".png", "count": 1, "size": 1000}
+    assert {"ext": ".html", "count": 2, "size": 150} in stats["extensions"]
+    assert {"ext": "(без расширения)", "count": 1, "size": 1} in stats["extensions"]
+    assert stats["largest_files"][:2] == [{"path": os.path.join("img", "logo.png"), "size": 1000},
+                                          {"path": os.path.join("css", "site.css"), "size": 300}]
+
+
+def test_only_changed_directories_are_reread(tmp_path, make_project, write_file, monkeypatch):
+    project = make_project("site", FILES)
+    cache = ProjectStatsCache(str(tmp_path / "stats.json"))
+    first = cache.refresh(project, IGNORE)
+    reads = count_reads(cache, monkeypatch)
+    assert cache.refresh(project, IGNORE) == first
+    assert reads == []
+
+    css_dir = os.path.join(project, "css")
+    write_file(os.path.join(css_dir, "print.css"), "x" * 20)
+    os.utime(css_dir, ns=(0, 0))
+    assert cache.refresh(project, IGNORE)["total_size"] == 1471
+    assert reads == [css_dir]
+
+    # Размер файла изменился, а mtime каталога нет: это видно только при force
+    img_dir = os.path.join(project, "img")
+    st = os.stat(img_dir)
+    write_file(os.path.join(img_dir, "logo.png"), b"x" * 10)
+    os.utime(img_dir, ns=(st.st_atime_ns, st.st_mtime_ns))
+    reads.clear()
+    cache.refresh(project, IGNORE)
+    assert reads == []
+    assert cache.refresh(project, IGNORE, force=True)["total_size"] == 481
+
+
+def test_other_ignore_patterns_rescan_everything(tmp_path, make_project, monkeypatch):
+    project = make_project("site", FILES)
+    cache = ProjectStatsCache(str(tmp_path / "stats.json"))
+    cache.refresh(project, IGNORE)
+    reads = count_reads(cache, monkeypatch)
+    assert cache.refresh(project, [])["file_count"] == 6
+    assert len(reads) == 4
+
+
+def test_saved_stats_are_available_without_disk_access(tmp_path, make_project):
+    project = make_project("site", FILES)
+    cache_file = str(tmp_path / "stats.json")
+    cache = ProjectStatsCache(cache_file)
+    stats = cache.refresh(project, IGNORE)
+    cache.save()
+
+    reloaded = ProjectStatsCache(cache_file)
+    reloaded.load()
+    assert reloaded.get(project) == stats
+    reloaded.remove_project(project)
+    assert reloaded.get(project) is None and reloaded.dirty
+
+
+def test_refresh_many_reports_missing_folders(tmp_path, make_project):
+    projects = {"a": make_project("a", FILES), "b": make_project("b", {"index.html": "x"}),
+                "missing": str(tmp_path / "none")}
+    seen = []
+    results = ProjectStatsCache(str(tmp_path / "stats.json")).refresh_many(
+        projects, IGNORE, callback=lambda name, stats: seen.append(name))
+    assert results["missing"] is None
+    assert results["b"]["total_size"] == 1
+    assert sorted(seen) == ["a", "b", "missing"]
@@ -0,0 +1,81 @@
+"""Тесты хранилища реестра (WebsiteStore) и импорта старого websites.json."""
+import json
+
+from website_core import WebsiteRegistry, WebsiteStore
+
+
+def test_put_update_delete_keep_order(tmp_path):
+    store = WebsiteStore(str(tmp_path / "websites.db"))
+    store.put_many([("b", {"path": "/b"}), ("a", {"path": "/a"})])
+    store.put("c", {"path": "/c"})
+    store.put("b", {"path": "/b2"})
+    store.delete("a")
+    assert store.load_all() == {"b": {"path": "/b2"}, "c": {"path": "/c"}}
+    assert list(store.load_all()) == ["b", "c"]
+
+
+def test_json_is_imported_once_and_left_unchanged(tmp_path):
+    json_file = tmp_path / "websites.json"
+    legacy = {"Сайт": {"path": "/site", "tags": ["html"]}, "Другой": {"path": "/other", "tags": []}}
+    json_file.write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+    original = json_file.read_bytes()
+
+    store = WebsiteStore(str(tmp_path / "websites.db"))
+    assert store.import_json(str(json_file)) is True
+    assert store.load_all() == legacy
+    assert json_file.read_bytes() == original
+
+    # Повторный импорт не возвращает удаленные записи
+    store.delete("Другой")
+    assert store.import_json(str(json_file)) is False
+    assert list(store.load_all()) == ["Сайт"]
+
+
+def test_import_does_not_overwrite_existing_records(tmp_path):
+    json_file = tmp_path / "websites.json"
+    json_file.write_text(json.dumps({"a": {"path": "/old"}}), encoding="utf-8")
+    store = WebsiteStore(str(tmp_path / "websites.db"))
+    store.put("a", {"path": "/new"})
+    store.import_json(str(json_file))
+    assert store.load_all() == {"a": {"path": "/new"}}
+
+
+
+def test_registry_reports_broken_json_and_keeps_loading(tmp_path):
+    (tmp_path / "websites.json").write_text("{broken", encoding="utf-8")
+    registry = WebsiteRegistry(str(tmp_path))
+    registry.store.put("a", {"path": "/a", "tags": ["css"]})
+    assert registry.load() == {"a": {"path": "/a", "tags": ["css"]}}
+    assert registry.import_error is not None
+    assert (tmp_path / "websites.json").read_text(encoding="utf-8") == "{broken"
+
+
+def test_registry_changes_are_persisted(tmp_path):
+    registry = WebsiteRegistry(str(tmp_path))
+    registry.load()
+    names = registry.add_many([{"name": "site", "path": str(tmp_path / "one")},
+                               {"name": "site", "path": str(tmp_path / "two")},
+                               {"name": "dup", "path": str(tmp_path / "one")}])
+    assert names == ["site", "site (2)"]
+    registry.websites["site"]["description"] = "описание"
+    registry.update("site")
+    registry.delete("site (2)")
+
+    reloaded = WebsiteRegistry(str(tmp_path))
+    reloaded.load()
+    assert list(reloaded.websites) == ["site"]
+    assert reloaded.websites["site"]["description"] == "описание"
+    assert reloaded.search("описание") == ["site"]
+
+
+def test_registry_read_does_not_touch_current_state(tmp_path):
+    WebsiteStore(str(tmp_path / "websites.db")).put("a", {"path": "/a", "tags": ["css"]})
+    registry = WebsiteRegistry(str(tmp_path))
+    websites = registry.websites
+    loaded = registry.read()
+    assert registry.websites == {} and registry.search("") == []
+
+    registry.apply_loaded(loaded)
+    assert registry.websites is websites
+    assert websites == {"a": {"path": "/a", "tags": ["css"]}}
+    assert registry.search("css") == ["a"] and registry.get_all_tags() == ["css"]
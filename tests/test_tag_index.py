@@ -0,0 +1,70 @@
+"""Тесты индекса тегов (TagIndex) и фильтра по тегам в WebsiteRegistry.search."""
+from website_core import TagIndex, WebsiteRegistry
+
+WEBSITES = {
+    "landing": {"tags": ["html", "css"], "description": "промо"},
+    "shop": {"tags": ["react", "css"], "description": "магазин"},
+    "blog": {"tags": ["html"], "description": "блог"},
+    "old": {"tags": ["html", "old"], "description": "архив"},
+    "empty": {"tags": [], "description": ""},
+}
+
+
+def make_index():
+    index = TagIndex()
+    index.rebuild(WEBSITES)
+    return index
+
+
+def test_all_tags_and_counts():
+    index = make_index()
+    assert index.all_tags() == ["css", "html", "old", "react"]
+    assert index.counts() == {"html": 3, "css": 2, "react": 1, "old": 1}
+    assert index.counts(["landing", "shop", "missing"]) == {"html": 1, "css": 2, "react": 1, "old": 0}
+
+
+def test_select_combines_all_any_and_exclude():
+    index = make_index()
+    assert index.select() == set(WEBSITES)
+    assert index.select(all_tags=["html", "css"]) == {"landing"}
+    assert index.select(any_tags=["react", "old"]) == {"shop", "old"}
+    assert index.select(all_tags=["html"], exclude_tags=["old"]) == {"landing", "blog"}
+    assert index.select(all_tags=["html"], any_tags=["css", "old"], exclude_tags=["old"]) == {"landing"}
+    assert index.select(all_tags=["unknown"]) == set()
+    assert index.select(exclude_tags=["unknown"]) == set(WEBSITES)
+
+
+def test_update_changes_only_differing_tags_and_drops_empty_tags():
+    index = make_index()
+    index.add("shop", {"tags": ["vue", "css"]})
+    assert "react" not in index.tags
+    assert index.tags["vue"] == {"shop"}
+    assert index.tags["css"] == {"landing", "shop"}
+    index.remove("old")
+    index.remove("missing")
+    assert "old" not in index.tags
+    assert index.tags["html"] == {"landing", "blog"}
+
+
+def test_select_result_does_not_alias_index_sets():
+    index = make_index()
+    selected = index.select(all_tags=["css"])
+    selected.clear()
+    assert index.tags["css"] == {"landing", "shop"}
+
+
+def test_registry_search_with_tag_filter(tmp_path):
+    registry = WebsiteRegistry(str(tmp_path))
+    registry.load()
+    for name, site_data in WEBSITES.items():
+        registry.websites[name] = dict(site_data, path=str(tmp_path / name))
+    registry.update_many(list(WEBSITES))
+    assert registry.search("", all_tags=["html"], exclude_tags=["old"]) == ["landing", "blog"]
+    assert registry.search("магазин", any_tags=["react"]) == ["shop"]
+    assert registry.search("промо", any_tags=["react"]) == []
+    registry.websites["blog"]["tags"] = ["css"]
+    registry.update("blog")
+    assert registry.search("", all_tags=["css"]) == ["landing", "shop", "blog"]
+    registry.delete("landing")
+    assert registry.get_all_tags() == ["css", "html", "old", "react"]
+    assert registry.search("", all_tags=["css"]) == ["shop", "blog"]
@@ -0,0 +1,527 @@
+"""Сборка проектов: минификация HTML/CSS/JS, хэши в именах ресурсов и инкрементальный манифест.
+
+Модуль импортируется только при сборке. Файлы обрабатываются пулом
+процессов; в манифесте сборки хранятся хэши исходников и имена результатов,
+поэтому повторная сборка обрабатывает только изменившиеся файлы и файлы,
+ссылающиеся на ресурсы с новыми именами.
+"""
+import os
+import re
+import json
+import gzip
+import time
+import hashlib
+import posixpath
+import urllib.parse
+
+from website_core import DEFAULT_IGNORE_PATTERNS, iter_project_files
+
+MANIFEST_NAME = "build-manifest.json"
+MANIFEST_VERSION = 1
+
+HTML_EXTENSIONS = (".html", ".htm")
+CSS_EXTENSIONS = (".css",)
+JS_EXTENSIONS = (".js", ".mjs")
+TEXT_BUILD_EXTENSIONS = HTML_EXTENSIONS + CSS_EXTENSIONS + JS_EXTENSIONS
+
+# Ресурсы, к имени которых добавляется хэш содержимого. HTML-страницы и
+# favicon.ico сохраняют имена: на них ссылаются извне.
+FINGERPRINT_EXTENSIONS = {".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+                          ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp4", ".webm", ".mp3"}
+PRECOMPRESS_EXTENSIONS = {".html", ".htm", ".css", ".js", ".mjs", ".svg", ".json", ".xml", ".txt"}
+MIN_PRECOMPRESS_SIZE = 256
+
+# Пул процессов не запускается ради нескольких файлов
+MIN_POOL_JOBS = 16
+
+# Ссылки на ресурсы; группа ref - сам адрес
+HTML_ATTR_RE = re.compile(r"""\s(?:src|href|poster)\s*=\s*(["'])(?P<ref>[^"']*)\1""", re.I)
+CSS_URL_RE = re.compile(r"""url\(\s*(["']?)(?P<ref>[^"')\s]+)\1\s*\)""", re.I)
+CSS_IMPORT_RE = re.compile(r"""@import\s+(["'])(?P<ref>[^"']+)\1""", re.I)
+JS_IMPORT_RE = re.compile(r"""(?:\bfrom|\bimport)\s*\(?\s*(["'])(?P<ref>\.{1,2}/[^"'\n]+)\1""")
+REFERENCE_PATTERNS = {".html": (HTML_ATTR_RE, CSS_URL_RE), ".htm": (HTML_ATTR_RE, CSS_URL_RE),
+                      ".css": (CSS_URL_RE, CSS_IMPORT_RE), ".js": (JS_IMPORT_RE,), ".mjs": (JS_IMPORT_RE,)}
+
+CSS_TOKEN_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*(!?).*?\*/""", re.S)
+HTML_RAW_BLOCK_RE = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)", re.S | re.I)
+HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+SCRIPT_TYPE_RE = re.compile(r"""\stype\s*=\s*["']?([^"'\s>]+)""", re.I)
+
+# Символ, которым при минификации временно заменяются строки и регулярные выражения
+PLACEHOLDER = "\x00"
+
+JS_SPECIAL_RE = re.compile(r"['\"`/]")
+# Слова, после которых / начинает регулярное выражение, а не деление
+JS_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "delete", "throw",
+                     "instanceof", "new", "yield", "await"}
+
+
+def restore_literals(code, literals):
+    """Возвращает на место строки, замененные в сжатом коде символом PLACEHOLDER."""
+    pieces = code.split(PLACEHOLDER)
+    result = [pieces[0]]
+    for literal, piece in zip(literals, pieces[1:]):
+        result.append(literal)
+        result.append(piece)
+    return "".join(result)
+
+
+def squeeze_css(code):
+    """Сжимает пробелы в CSS без строк и комментариев."""
+    code = re.sub(r"\s+", " ", code)
+    code = re.sub(r" ?([{};,>]) ?", r"\1", code)
+    return code.replace(": ", ":").replace(";}", "}")
+
+
+def minify_css(text):
+    """Удаляет из CSS комментарии (кроме /*! ... */) и лишние пробелы, не трогая строки."""
+    if PLACEHOLDER in text:
+        return text
+    code = []
+    literals = []
+    position = 0
+    for match in CSS_TOKEN_RE.finditer(text):
+        code.append(text[position:match.start()])
+        position = match.end()
+        if match.group(1) is not None or match.group(2):
+            code.append(PLACEHOLDER)
+            literals.append(match.group(0))
+        else:
+            code.append(" ")
+    code.append(text[position:])
+    return restore_literals(squeeze_css("".join(code)), literals).strip()
+
+
+def skip_js_string(text, start):
+    """Возвращает позицию сразу после строки или шаблона, начинающегося в start."""
+    quote = text[start]
+    position = start + 1
+    length = len(text)
+    while position < length:
+        char = text[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == quote:
+            return position + 1
+        if quote == "`" and char == "$" and text.startswith("{", position + 1):
+            depth = 1
+            position += 2
+            while position < length and depth:
+                char = text[position]
+                if char in "'\"`":
+                    position = skip_js_string(text, position)
+                    continue
+                if char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth -= 1
+                position += 1
+            continue
+        if char == "\n" and quote != "`":
+            return position
+        position += 1
+    return length
+
+
+def skip_js_regex(text, start):
+    """Возвращает позицию после литерала регулярного выражения или None, если это не он."""
+    position = start + 1
+    in_class = False
+    length = len(text)
+    while position < length:
+        char = text[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == "\n":
+            return None
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            position += 1
+            while position < length and (text[position].isalnum() or text[position] == "_"):
+                position += 1
+            return position
+        position += 1
+    return None
+
+
+def squeeze_js(code):
+    """Сжимает пробелы в коде без строк и комментариев, сохраняя переводы строк."""
+    code = re.sub(r"[ \t\f\v]+", " ", code)
+    code = re.sub(r" ?\n\s*", "\n", code)
+    code = re.sub(r" ?([{}()\[\];,=:]) ?", r"\1", code)
+    return re.sub(r"\n{2,}", "\n", code)
+
+
+def minify_js(text):
+    """Консервативно минифицирует JavaScript.
+
+    Удаляются комментарии и лишние пробелы; строки, шаблоны и регулярные
+    выражения не меняются, переводы строк сохраняются, поэтому автоматическая
+    расстановка точек с запятой работает как в исходнике.
+    """
+    if PLACEHOLDER in text:
+        return text
+    code = []
+    literals = []
+    code_start = 0
+    position = 0
+    length = len(text)
+
+    def is_division():
+        """Определяет по предыдущему значимому токену, что / в position - деление."""
+        end = position
+        while end > code_start and text[end - 1].isspace():
+            end -= 1
+        if end > code_start:
+            previous = text[code_start:end]
+        else:
+            previous = next((chunk.rstrip() for chunk in reversed(code) if chunk.strip()), "")
+        if not previous:
+            return False
+        if previous.endswith(PLACEHOLDER):
+            # После строки или регулярного выражения / может быть только делением
+            return True
+        if not (previous[-1].isalnum() or previous[-1] in "_$)]"):
+            return False
+        word = re.search(r"[A-Za-z_$][\w$]*$", previous[-64:])
+        return not (word and word.group(0) in JS_REGEX_KEYWORDS)
+
+    while position < length:
+        # Обычный код пропускается до ближайшей кавычки или косой черты
+        special = JS_SPECIAL_RE.search(text, position)
+        if special is None:
+            break
+        position = special.start()
+        char = text[position]
+        if char in "'\"`":
+            end = skip_js_string(text, position)
+        elif text.startswith("/", position + 1):
+            code.append(text[code_start:position])
+            end = text.find("\n", position)
+            position = code_start = length if end < 0 else end
+            continue
+        elif text.startswith("*", position + 1):
+            code.append(text[code_start:position])
+            end = text.find("*/", position + 2)
+            end = length if end < 0 else end + 2
+            code.append("\n" if "\n" in text[position:end] else " ")
+            position = code_start = end
+            continue
+        else:
+            end = None if is_division() else skip_js_regex(text, position)
+            if end is None:
+                position += 1
+                continue
+        code.append(text[code_start:position])
+        code.append(PLACEHOLDER)
+        literals.append(text[position:end])
+        position = code_start = end
+    code.append(text[code_start:])
+    return restore_literals(squeeze_js("".join(code)), literals).strip()
+
+
+def minify_html(text):
+    """Удаляет комментарии и сжимает пробелы в HTML; встроенные стили и скрипты минифицируются."""
+    parts = []
+
+    def squeeze(chunk):
+        return re.sub(r"\s+", " ", HTML_COMMENT_RE.sub("", chunk))
+
+    position = 0
+    for match in HTML_RAW_BLOCK_RE.finditer(text):
+        parts.append(squeeze(text[position:match.start()]))
+        position = match.end()
+        open_tag, tag, body, close_tag = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        if tag == "style":
+            body = minify_css(body)
+        elif tag == "script":
+            script_type = SCRIPT_TYPE_RE.search(open_tag)
+            if script_type is None or script_type.group(1).lower() in ("module", "text/javascript",
+                                                                        "application/javascript"):
+                body = minify_js(body)
+        parts.append(squeeze(open_tag) + body + close_tag)
+    parts.append(squeeze(text[position:]))
+    return "".join(parts).strip()
+
+
+MINIFIERS = {".html": minify_html, ".htm": minify_html, ".css": minify_css, ".js": minify_js, ".mjs": minify_js}
+
+
+def resolve_reference(ref, file_rel):
+    """Переводит адрес из файла file_rel в путь от корня проекта или None для внешних адресов."""
+    if (not ref or ref.startswith(("#", "//")) or ":" in ref.split("/", 1)[0] or "{" in ref
+            or "$" in ref):
+        return None
+    path = re.match(r"[^?#]*", ref).group(0)
+    if not path or path.endswith("/"):
+        return None
+    base = "" if path.startswith("/") else posixpath.dirname(file_rel)
+    target = posixpath.normpath(posixpath.join(base, urllib.parse.unquote(path).lstrip("/")))
+    if target.startswith("../") or target == "..":
+        return None
+    return target
+
+
+def find_references(text, file_rel):
+    """Возвращает пути файлов проекта, на которые ссылается текстовый файл."""
+    targets = set()
+    for pattern in REFERENCE_PATTERNS.get(posixpath.splitext(file_rel)[1].lower(), ()):
+        for match in pattern.finditer(text):
+            target = resolve_reference(match.group("ref"), file_rel)
+            if target is not None:
+                targets.add(target)
+    return targets
+
+
+def rewrite_references(text, file_rel, outputs):
+    """Заменяет в ссылках имена файлов на собранные имена из outputs {исходный путь: новый путь}."""
+    def replace(match):
+        ref = match.group("ref")
+        target = resolve_reference(ref, file_rel)
+        if target not in outputs or outputs[target] == target:
+            return match.group(0)
+        path = re.match(r"[^?#]*", ref).group(0)
+        new_name = urllib.parse.quote(posixpath.basename(outputs[target]))
+        new_ref = path[:len(path) - len(posixpath.basename(path))] + new_name + ref[len(path):]
+        offset = match.start("ref") - match.start()
+        whole = match.group(0)
+        return whole[:offset] + new_ref + whole[offset + len(ref):]
+
+    for pattern in REFERENCE_PATTERNS.get(posixpath.splitext(file_rel)[1].lower(), ()):
+        text = pattern.sub(replace, text)
+    return text
+
+
+def fingerprint_name(rel, digest):
+    """Добавляет хэш содержимого к имени файла: css/site.css -> css/site.1a2b3c4d.css."""
+    stem, ext = posixpath.splitext(rel)
+    return f"{stem}.{digest[:8]}{ext}"
+
+
+def content_hash(data):
+    """Хэш содержимого файла для манифеста и имен ресурсов."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def build_file(source_path, rel, out_dir, outputs, minify, fingerprint, precompress):
+    """Собирает один файл (выполняется в процессе пула).
+
+    Текстовые файлы получают новые имена ресурсов и минифицируются, остальные
+    копируются как есть. Возвращает (путь результата, размер результата).
+    """
+    ext = posixpath.splitext(rel)[1].lower()
+    with open(source_path, "rb") as f:
+        data = f.read()
+    if ext in TEXT_BUILD_EXTENSIONS:
+        # surrogateescape сохраняет байты файлов не в UTF-8 без изменений
+        text = data.decode("utf-8", "surrogateescape")
+        if outputs:
+            text = rewrite_references(text, rel, outputs)
+        if minify:
+            text = MINIFIERS[ext](text)
+        data = text.encode("utf-8", "surrogateescape")
+
+    out_rel = fingerprint_name(rel, content_hash(data)) if fingerprint else rel
+    out_path = os.path.join(out_dir, *out_rel.split("/"))
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, out_path)
+
+    gz_path = out_path + ".gz"
+    if precompress and ext in PRECOMPRESS_EXTENSIONS and len(data) >= MIN_PRECOMPRESS_SIZE:
+        with open(gz_path + ".tmp", "wb") as f:
+            f.write(gzip.compress(data, 9, mtime=0))
+        os.replace(gz_path + ".tmp", gz_path)
+    elif os.path.exists(gz_path):
+        os.remove(gz_path)
+    return out_rel, len(data)
+
+
+def default_output_dir(data_dir, name):
+    """Папка сборки сайта по умолчанию: builds/<название> в папке данных."""
+    return os.path.join(data_dir, "builds", re.sub(r'[<>:"/\\|?*]', "_", name).strip() or "site")
+
+
+def load_manifest(out_dir):
+    """Читает манифест прошлой сборки и возвращает (настройки, файлы); при другой версии - (None, {})."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None, {}
+    return manifest.get("options"), manifest.get("files", {})
+
+
+def save_manifest(out_dir, options, files):
+    """Атомарно записывает манифест сборки."""
+    manifest_file = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_file + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "options": options, "files": files}, f, separators=(",", ":"))
+    os.replace(manifest_file + ".tmp", manifest_file)
+
+
+def order_by_dependencies(sources, dependencies):
+    """Разбивает файлы на уровни: файл собирается после всех ресурсов, на которые ссылается.
+
+    Файлы, входящие в циклы ссылок, возвращаются отдельным множеством - им
+    хэш в имя не добавляется.
+    """
+    remaining = {rel: set(dependencies.get(rel, ())) for rel in sources}
+    levels = []
+    while remaining:
+        level = [rel for rel, deps in remaining.items() if not deps]
+        if not level:
+            break
+        levels.append(level)
+        for rel in level:
+            del remaining[rel]
+        done = set(level)
+        for deps in remaining.values():
+            deps -= done
+    cyclic = set(remaining)
+    if cyclic:
+        levels.append(sorted(cyclic))
+    return levels, cyclic
+
+
+def build_project(project_path, out_dir, ignore_patterns=None, minify=True, fingerprint=True, precompress=True,
+                  max_workers=None, progress=None):
+    """Собирает проект в out_dir, обрабатывая только изменившиеся файлы.
+
+    Без ignore_patterns пропускаются DEFAULT_IGNORE_PATTERNS (.git,
+    node_modules и т.п.), как в интерфейсе и командной строке.
+    progress(готово, всего) вызывается по мере сборки. Возвращает сводку:
+    число файлов, пересобранных, удаленных устаревших результатов, размеры
+    исходников и результата и время сборки.
+    """
+    started = time.perf_counter()
+    if ignore_patterns is None:
+        ignore_patterns = DEFAULT_IGNORE_PATTERNS
+    options = {"minify": minify, "fingerprint": fingerprint, "precompress": precompress}
+    project_path = os.path.abspath(project_path)
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    old_options, previous_files = load_manifest(out_dir)
+    # При других настройках прошлые результаты не переиспользуются, но удаляются как устаревшие
+    old_files = previous_files if old_options == options else {}
+
+    # Папка сборки внутри проекта не должна попадать в исходники
+    try:
+        out_prefix = os.path.relpath(out_dir, project_path) + os.sep
+        skip_out_dir = not out_prefix.startswith(os.pardir)
+    except ValueError:
+        out_prefix, skip_out_dir = "", False
+
+    # Исходники: хэш и ссылки берутся из манифеста, если размер и mtime не изменились
+    sources = {}
+    for full_path, rel_path, stat in iter_project_files(project_path, ignore_patterns):
+        if skip_out_dir and rel_path.startswith(out_prefix):
+            continue
+        rel = rel_path.replace(os.sep, "/")
+        old = old_files.get(rel)
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime_ns:
+            digest, refs = old["hash"], old["refs"]
+        else:
+            try:
+                with open(full_path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            digest = content_hash(data)
+            if old and old["hash"] == digest:
+                refs = old["refs"]
+            elif rel.lower().endswith(TEXT_BUILD_EXTENSIONS):
+                refs = sorted(find_references(data.decode("utf-8", "surrogateescape"), rel))
+            else:
+                refs = []
+        sources[rel] = {"path": full_path, "size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": digest,
+                        "refs": refs}
+
+    def fingerprinted(rel):
+        return fingerprint and posixpath.splitext(rel)[1].lower() in FINGERPRINT_EXTENSIONS
+
+    # Зависимости нужны только на ресурсы, имена которых меняются при сборке
+    dependencies = {rel: {target for target in info["refs"] if target in sources and target != rel
+                          and fingerprinted(target)} for rel, info in sources.items()}
+    levels, cyclic = order_by_dependencies(sources, dependencies)
+
+    outputs = {rel: rel for rel in cyclic}
+    files = {}
+    built = 0
+    done = 0
+    pool = None
+    try:
+        for level in levels:
+            jobs = []
+            for rel in level:
+                info = sources[rel]
+                ref_outputs = {target: outputs[target] for target in dependencies[rel]}
+                old = old_files.get(rel)
+                entry = {"size": info["size"], "mtime": info["mtime"], "hash": info["hash"], "refs": info["refs"],
+                         "ref_outputs": ref_outputs}
+                if (old and old["hash"] == info["hash"] and old["ref_outputs"] == ref_outputs
+                        and os.path.exists(os.path.join(out_dir, *old["output"].split("/")))):
+                    entry["output"], entry["output_size"] = old["output"], old["output_size"]
+                    outputs[rel] = old["output"]
+                    files[rel] = entry
+                    done += 1
+                    continue
+                files[rel] = entry
+                jobs.append((rel, (info["path"], rel, out_dir, ref_outputs, minify,
+                                   fingerprinted(rel) and rel not in cyclic, precompress)))
+
+            if pool is None and len(jobs) >= MIN_POOL_JOBS:
+                from concurrent.futures import ProcessPoolExecutor
+
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+            if pool is not None:
+                results = pool.map(build_file, *zip(*(args for _, args in jobs)), chunksize=8) if jobs else []
+            else:
+                results = (build_file(*args) for _, args in jobs)
+            for (rel, _), (out_rel, out_size) in zip(jobs, results):
+                outputs[rel] = out_rel
+                files[rel]["output"], files[rel]["output_size"] = out_rel, out_size
+                built += 1
+                done += 1
+                if progress is not None:
+                    progress(done, len(sources))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Удаляем результаты, которые больше не соответствуют ни одному исходнику;
+    # сжатая копия удаляется вместе с результатом и отдельно не считается
+    current_outputs = {entry["output"] for entry in files.values()}
+    removed = 0
+    for old in previous_files.values():
+        if old.get("output") and old["output"] not in current_outputs:
+            old_path = os.path.join(out_dir, *old["output"].split("/"))
+            try:
+                os.remove(old_path)
+                removed += 1
+            except OSError:
+                pass
+            try:
+                os.remove(old_path + ".gz")
+            except OSError:
+                pass
+    save_manifest(out_dir, options, files)
+
+    return {
+        "output_dir": out_dir,
+        "files": len(files),
+        "built": built,
+        "removed": removed,
+        "source_size": sum(info["size"] for info in sources.values()),
+        "output_size": sum(entry["output_size"] for entry in files.values()),
+        "seconds": time.perf_counter() - started
+    }
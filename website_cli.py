@@ -0,0 +1,422 @@
+"""Командная строка менеджера веб-проектов.
+
+Работает с тем же реестром, что и графический интерфейс, но не импортирует
+tkinter; ядро и сервер загружаются только той командой, которой они нужны.
+
+Примеры:
+    python website_cli.py list
+    python website_cli.py list --tag html --tag css --exclude-tag old
+    python website_cli.py add ./my-site --tags html,css --description "Лендинг"
+    python website_cli.py import ~/projects --dry-run
+    python website_cli.py search landing --any-tag react --any-tag vue
+    python website_cli.py search --content "btn-primary"
+    python website_cli.py scan my-site --depth 2
+    python website_cli.py duplicates --min-size 1024
+    python website_cli.py health --problems
+    python website_cli.py build my-site
+    python website_cli.py check my-site --max-size 500000
+    python website_cli.py serve my-site --live-reload --open
+    python website_cli.py serve my-site --build
+    python website_cli.py gateway --live-reload --open
+"""
+import argparse
+import os
+import sys
+
+
+def open_registry(args):
+    """Загружает реестр сайтов из папки данных."""
+    from website_core import WebsiteRegistry
+
+    registry = WebsiteRegistry(args.data_dir)
+    registry.load()
+    if registry.import_error is not None:
+        print(f"Предупреждение: не удалось импортировать {registry.json_file}: {registry.import_error}", file=sys.stderr)
+    return registry
+
+
+def get_site(registry, name):
+    """Возвращает запись о сайте или завершает работу с ошибкой."""
+    site_data = registry.websites.get(name)
+    if site_data is None:
+        sys.exit(f"Сайт '{name}' не найден.")
+    return site_data
+
+
+def ignore_patterns(registry):
+    """Возвращает шаблоны игнорирования из config.json."""
+    from website_core import read_config
+
+    return read_config(registry.config_file)["ignore_patterns"]
+
+
+def print_sites(registry, names, as_json=False):
+    """Печатает список сайтов."""
+    if as_json:
+        import json
+
+        print(json.dumps({name: registry.websites[name] for name in names}, indent=4, ensure_ascii=False))
+        return
+    for name in names:
+        site_data = registry.websites[name]
+        tags = ", ".join(site_data.get("tags", []))
+        print(f"{name}\t{site_data.get('path', '')}\t{tags}")
+
+
+def tag_filter(args):
+    """Возвращает параметры фильтра по тегам для WebsiteRegistry.search."""
+    return {"all_tags": args.tag or (), "any_tags": args.any_tag or (), "exclude_tags": args.exclude_tag or ()}
+
+
+def command_list(args):
+    """Выводит зарегистрированные сайты."""
+    registry = open_registry(args)
+    print_sites(registry, registry.search("", **tag_filter(args)), args.json)
+
+
+def command_add(args):
+    """Регистрирует папку проекта; существующий сайт с тем же названием заменяется только с --force."""
+    from website_core import make_site_data, parse_tags
+
+    folder_path = os.path.abspath(args.path)
+    if not os.path.isdir(folder_path):
+        sys.exit(f"Папка '{folder_path}' не найдена.")
+    main_file = args.main_file
+    if main_file is None:
+        html_files = sorted(name for name in os.listdir(folder_path) if name.lower().endswith((".html", ".htm")))
+        if "index.html" in html_files:
+            main_file = "index.html"
+        elif html_files:
+            main_file = html_files[0]
+        else:
+            sys.exit("В папке нет HTML-файлов; укажите основной файл через --main-file.")
+
+    registry = open_registry(args)
+    site_data = make_site_data(folder_path, main_file, args.description, parse_tags(args.tags), name=args.name)
+    if site_data["name"] in registry.websites and not args.force:
+        sys.exit(f"Сайт '{site_data['name']}' уже существует; чтобы заменить его, укажите --force.")
+    registry.add(site_data["name"], site_data)
+    print(f"Сайт '{site_data['name']}' успешно добавлен.")
+
+
+def command_import(args):
+    """Находит веб-проекты в папке и регистрирует их одной транзакцией."""
+    from website_core import discover_projects
+
+    root = os.path.abspath(args.root)
+    if not os.path.isdir(root):
+        sys.exit(f"Папка '{root}' не найдена.")
+    registry = open_registry(args)
+    sites = discover_projects(root, ignore_patterns(registry), max_depth=args.depth)
+    if args.dry_run:
+        for site_data in sites:
+            print(f"{site_data['name']}\t{site_data['path']}\t{site_data['main_file']}\t{', '.join(site_data['tags'])}")
+        print(f"\nНайдено проектов: {len(sites)}")
+        return
+    added = registry.add_many(sites)
+    print(f"Найдено проектов: {len(sites)}, добавлено: {len(added)}")
+
+
+def command_search(args):
+    """Ищет сайты по названию, описанию, тегам и пути или строку в файлах проектов."""
+    registry = open_registry(args)
+    if not args.content:
+        print_sites(registry, registry.search(args.query, **tag_filter(args)), args.json)
+        return
+
+    from website_core import ContentIndexer
+
+    indexer = ContentIndexer(registry.data_path("content_index.db"))
+    if args.reindex:
+        patterns = ignore_patterns(registry)
+        for name, site_data in registry.websites.items():
+            if os.path.isdir(site_data.get("path", "")):
+                indexer.index_site(name, site_data["path"], patterns)
+    results = indexer.search(args.query, limit=args.limit)
+    if args.json:
+        import json
+
+        print(json.dumps(results, indent=4, ensure_ascii=False))
+        return
+    for result in results:
+        print(f"{result['site']}: {result['path']}")
+        for line_no, line in result["lines"]:
+            print(f"    {line_no}: {line}")
+
+
+def command_scan(args):
+    """Печатает структуру папок проекта."""
+    from website_core import walk_tree
+
+    registry = open_registry(args)
+    path = get_site(registry, args.name)["path"]
+    if not os.path.isdir(path):
+        sys.exit(f"Папка '{path}' не найдена.")
+    dir_count = file_count = 0
+    print(f"[{os.path.basename(os.path.normpath(path))}/]")
+    for depth, name, is_dir in walk_tree(path, ignore_patterns(registry), args.depth):
+        indent = " " * 4 * (depth + 1)
+        if is_dir:
+            dir_count += 1
+            print(f"{indent}[{name}/]")
+        else:
+            file_count += 1
+            print(f"{indent}{name}")
+    print(f"\nПапок: {dir_count}, файлов: {file_count}")
+
+
+def command_duplicates(args):
+    """Ищет одинаковые файлы во всех проектах и печатает потерянное место."""
+    from website_core import FileHashCache, find_duplicates, format_size
+
+    registry = open_registry(args)
+    hash_cache = FileHashCache(registry.data_path("hash_cache.json"))
+    hash_cache.load()
+    projects = {name: site_data.get("path", "") for name, site_data in registry.websites.items()}
+    groups = find_duplicates(projects, hash_cache, ignore_patterns(registry), min_size=args.min_size)
+    hash_cache.save()
+    if args.json:
+        import json
+
+        print(json.dumps(groups[:args.limit], indent=4, ensure_ascii=False))
+        return
+    for group in groups[:args.limit]:
+        print(f"{format_size(group['wasted'])} лишних ({len(group['files'])} x {format_size(group['size'])}):")
+        for item in group["files"]:
+            print(f"    {item['site']}: {item['path']}")
+    wasted = sum(group["wasted"] for group in groups)
+    print(f"\nГрупп одинаковых файлов: {len(groups)}, лишнее место: {format_size(wasted)}")
+
+
+def command_health(args):
+    """Проверяет все сайты: папка, основной файл, время изменения и состояние git."""
+    from website_core import ProjectHealthCache, HEALTH_MAX_AGE
+
+    registry = open_registry(args)
+    health_cache = ProjectHealthCache(registry.data_path("health_cache.json"))
+    health_cache.load()
+    health_cache.check_many(registry.websites, 0 if args.force else HEALTH_MAX_AGE, max_workers=args.workers)
+    health_cache.save()
+    report = {name: health_cache.get(name) for name in registry.websites}
+    if args.problems:
+        report = {name: health for name, health in report.items() if health["status"] != "ok"}
+    if args.json:
+        import json
+
+        print(json.dumps(report, indent=4, ensure_ascii=False))
+    else:
+        for name, health in report.items():
+            print(f"{name}\t{health['status']}\t{health['git'] or '-'}\t{health['path']}")
+    if any(health["status"] in ("missing", "no_main_file") for health in report.values()):
+        sys.exit(1)
+
+
+def command_build(args):
+    """Собирает сайт: минификация HTML/CSS/JS и хэши в именах ресурсов."""
+    from website_build import build_project, default_output_dir
+    from website_core import format_size
+
+    registry = open_registry(args)
+    path = get_site(registry, args.name)["path"]
+    if not os.path.isdir(path):
+        sys.exit(f"Папка '{path}' не найдена.")
+    out_dir = args.out or default_output_dir(registry.data_dir, args.name)
+    summary = build_project(path, out_dir, ignore_patterns(registry), minify=not args.no_minify,
+                            fingerprint=not args.no_fingerprint, precompress=not args.no_precompress,
+                            max_workers=args.workers)
+    print(f"Сборка: {summary['output_dir']}")
+    print(f"Файлов: {summary['files']}, пересобрано: {summary['built']}, удалено устаревших: {summary['removed']}")
+    print(f"Размер: {format_size(summary['source_size'])} -> {format_size(summary['output_size'])}, "
+          f"время: {summary['seconds']:.2f} с")
+
+
+def command_check(args):
+    """Проверяет ссылки сайта; код возврата 1, если найдены битые ссылки."""
+    from website_core import format_size
+    from website_links import check_project
+
+    registry = open_registry(args)
+    path = get_site(registry, args.name)["path"]
+    if not os.path.isdir(path):
+        sys.exit(f"Папка '{path}' не найдена.")
+    report = check_project(path, ignore_patterns(registry), port=args.port, concurrency=args.concurrency,
+                           max_asset_size=args.max_size, slow_seconds=args.slow_ms / 1000)
+    if args.json:
+        import json
+
+        print(json.dumps(report, indent=4, ensure_ascii=False))
+    else:
+        for item in report["broken"]:
+            print(f"Битая ссылка: {item['source']}: {item['ref']} - {item['reason']}")
+        for item in report["oversized"]:
+            print(f"Большой файл: {item['path']} ({format_size(item['size'])})")
+        for item in report["slow"]:
+            print(f"Медленно: {item['path']} ({item['seconds'] * 1000:.0f} мс)")
+        print(f"\nФайлов HTML/CSS: {report['files']}, ссылок: {report['references']}, "
+              f"битых: {len(report['broken'])}")
+    if report["broken"]:
+        sys.exit(1)
+
+
+def command_serve(args):
+    """Запускает сервер проекта и ждет Ctrl+C."""
+    import time
+    import webbrowser
+    from website_server import ServerManager
+
+    registry = open_registry(args)
+    path = get_site(registry, args.name)["path"]
+    if args.build:
+        from website_build import default_output_dir
+
+        path = default_output_dir(registry.data_dir, args.name)
+    if not os.path.isdir(path):
+        sys.exit(f"Папка '{path}' не найдена." + (" Сначала выполните команду build." if args.build else ""))
+
+    manager = ServerManager(host=args.host)
+    info = manager.start(args.name, path, port=args.port, live_reload=args.live_reload,
+                         ignore_patterns=ignore_patterns(registry))
+    url = f"http://localhost:{info['port']}"
+    print(f"Сервер '{args.name}' запущен на {url} (Ctrl+C для остановки)")
+    if args.open:
+        webbrowser.open(url)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.stop_all()
+        print("Сервер остановлен")
+
+
+def command_gateway(args):
+    """Запускает шлюз для всех сайтов реестра и ждет Ctrl+C."""
+    import time
+    import webbrowser
+    from website_server import ServerManager
+
+    registry = open_registry(args)
+    manager = ServerManager(host=args.host)
+    info = manager.start_gateway(registry.websites, port=args.port, live_reload=args.live_reload,
+                                 ignore_patterns=ignore_patterns(registry))
+    url = f"http://localhost:{info['port']}"
+    print(f"Шлюз для {len(info['server'].routes[0])} сайтов запущен на {url} (Ctrl+C для остановки)")
+    print(f"Адреса сайтов: {url}/<название>/ или http://<название>.localhost:{info['port']}/")
+    if args.open:
+        webbrowser.open(url)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.stop_all()
+        print("Шлюз остановлен")
+
+
+def build_parser():
+    """Создает разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description="Менеджер веб-проектов: командная строка.")
+    parser.add_argument("--data-dir", default=None,
+                        help="папка с websites.db и config.json (по умолчанию - текущая)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_tag_arguments(command_parser):
+        command_parser.add_argument("--tag", action="append", help="только сайты с этим тегом (можно несколько: И)")
+        command_parser.add_argument("--any-tag", action="append",
+                                    help="сайты хотя бы с одним из этих тегов (можно несколько: ИЛИ)")
+        command_parser.add_argument("--exclude-tag", action="append", help="без сайтов с этим тегом")
+
+    list_parser = commands.add_parser("list", help="список сайтов")
+    add_tag_arguments(list_parser)
+    list_parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    list_parser.set_defaults(func=command_list)
+
+    add_parser = commands.add_parser("add", help="добавить сайт")
+    add_parser.add_argument("path", help="папка проекта")
+    add_parser.add_argument("--name", help="название (по умолчанию - имя папки)")
+    add_parser.add_argument("--main-file", help="основной файл (по умолчанию - index.html или первый HTML)")
+    add_parser.add_argument("--description", default="", help="описание")
+    add_parser.add_argument("--tags", default="", help="теги через запятую")
+    add_parser.add_argument("--force", action="store_true", help="заменить сайт с тем же названием")
+    add_parser.set_defaults(func=command_add)
+
+    import_parser = commands.add_parser("import", help="найти и добавить все проекты в папке")
+    import_parser.add_argument("root", help="корневая папка")
+    import_parser.add_argument("--depth", type=int, default=6, help="максимальная глубина поиска")
+    import_parser.add_argument("--dry-run", action="store_true", help="только показать найденные проекты")
+    import_parser.set_defaults(func=command_import)
+
+    search_parser = commands.add_parser("search", help="поиск сайтов или строки в файлах")
+    search_parser.add_argument("query", help="строка поиска")
+    search_parser.add_argument("--content", action="store_true", help="искать в содержимом файлов")
+    search_parser.add_argument("--reindex", action="store_true",
+                               help="перед поиском обновить индекс содержимого (только изменившиеся файлы)")
+    add_tag_arguments(search_parser)
+    search_parser.add_argument("--limit", type=int, default=50, help="максимум файлов в результате")
+    search_parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    search_parser.set_defaults(func=command_search)
+
+    scan_parser = commands.add_parser("scan", help="структура папок сайта")
+    scan_parser.add_argument("name", help="название сайта")
+    scan_parser.add_argument("--depth", type=int, default=None, help="максимальная глубина")
+    scan_parser.set_defaults(func=command_scan)
+
+    duplicates_parser = commands.add_parser("duplicates", help="одинаковые файлы во всех проектах")
+    duplicates_parser.add_argument("--min-size", type=int, default=1, help="минимальный размер файла в байтах")
+    duplicates_parser.add_argument("--limit", type=int, default=50, help="максимум групп в выводе")
+    duplicates_parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    duplicates_parser.set_defaults(func=command_duplicates)
+
+    health_parser = commands.add_parser("health", help="проверка папок, основных файлов и git всех сайтов")
+    health_parser.add_argument("--force", action="store_true", help="перепроверить даже недавно проверенные")
+    health_parser.add_argument("--problems", action="store_true", help="показывать только сайты с проблемами")
+    health_parser.add_argument("--workers", type=int, default=8, help="число параллельных проверок")
+    health_parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    health_parser.set_defaults(func=command_health)
+
+    build_command_parser = commands.add_parser("build", help="собрать сайт (минификация и хэши в именах ресурсов)")
+    build_command_parser.add_argument("name", help="название сайта")
+    build_command_parser.add_argument("--out", default=None, help="папка результата (по умолчанию - builds/<название>)")
+    build_command_parser.add_argument("--no-minify", action="store_true", help="не минифицировать HTML/CSS/JS")
+    build_command_parser.add_argument("--no-fingerprint", action="store_true", help="не добавлять хэш к именам ресурсов")
+    build_command_parser.add_argument("--no-precompress", action="store_true", help="не создавать файлы .gz")
+    build_command_parser.add_argument("--workers", type=int, default=None, help="число процессов сборки")
+    build_command_parser.set_defaults(func=command_build)
+
+    check_parser = commands.add_parser("check", help="проверить ссылки и ресурсы сайта")
+    check_parser.add_argument("name", help="название сайта")
+    check_parser.add_argument("--port", type=int, default=None,
+                              help="порт запущенного сервера сайта (по умолчанию - временный сервер)")
+    check_parser.add_argument("--concurrency", type=int, default=16, help="число одновременных запросов")
+    check_parser.add_argument("--max-size", type=int, default=1024 * 1024, help="порог размера файла в байтах")
+    check_parser.add_argument("--slow-ms", type=float, default=200, help="порог времени ответа в мс")
+    check_parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    check_parser.set_defaults(func=command_check)
+
+    serve_parser = commands.add_parser("serve", help="запустить сервер сайта")
+    serve_parser.add_argument("name", help="название сайта")
+    serve_parser.add_argument("--port", type=int, default=None, help="порт (по умолчанию - первый свободный от 8000)")
+    serve_parser.add_argument("--host", default="", help="адрес для прослушивания")
+    serve_parser.add_argument("--live-reload", action="store_true", help="автообновление страниц")
+    serve_parser.add_argument("--open", action="store_true", help="открыть в браузере")
+    serve_parser.add_argument("--build", action="store_true", help="раздавать результат команды build")
+    serve_parser.set_defaults(func=command_serve)
+
+    gateway_parser = commands.add_parser("gateway", help="все сайты на одном порту")
+    gateway_parser.add_argument("--port", type=int, default=None, help="порт (по умолчанию - первый свободный от 8000)")
+    gateway_parser.add_argument("--host", default="", help="адрес для прослушивания")
+    gateway_parser.add_argument("--live-reload", action="store_true", help="автообновление страниц")
+    gateway_parser.add_argument("--open", action="store_true", help="открыть список сайтов в браузере")
+    gateway_parser.set_defaults(func=command_gateway)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1456 @@
+"""Ядро менеджера веб-проектов без графического интерфейса.
+
+Реестр сайтов, сканирование структуры проектов, поиск и полнотекстовый
+индекс. Модуль не импортирует tkinter и серверные модули, поэтому его можно
+использовать из командной строки и скриптов; сервер проектов находится в
+website_server и подключается только при необходимости.
+"""
+import os
+import json
+import time
+import queue
+import fnmatch
+import threading
+import itertools
+import sqlite3
+import heapq
+import hashlib
+from collections import deque
+from contextlib import closing
+from datetime import datetime
+
+# Папки и файлы, которые не показываются в структуре проекта
+DEFAULT_IGNORE_PATTERNS = ["node_modules", ".git", ".svn", ".hg", "__pycache__", ".venv", "venv", ".idea", ".DS_Store"]
+
+# Текстовые файлы, содержимое которых индексируется для поиска
+TEXT_EXTENSIONS = {".html", ".htm", ".css", ".scss", ".js", ".mjs", ".ts", ".json", ".md", ".txt", ".xml", ".svg"}
+MAX_INDEXED_FILE_SIZE = 2 * 1024 * 1024
+
+# Признаки веб-проекта при массовом импорте и кандидаты на роль основного файла
+PROJECT_MARKERS = ("index.html", "index.htm", "package.json")
+MAIN_FILE_CANDIDATES = ("index.html", "index.htm", "public/index.html", "src/index.html", "dist/index.html")
+
+# Теги, определяемые по расширениям файлов и зависимостям package.json
+EXTENSION_TAGS = {".html": "html", ".htm": "html", ".css": "css", ".scss": "sass", ".sass": "sass",
+                  ".less": "less", ".js": "js", ".mjs": "js", ".ts": "ts", ".jsx": "react", ".tsx": "react",
+                  ".vue": "vue", ".svelte": "svelte", ".php": "php"}
+PACKAGE_TAGS = {"react": "react", "vue": "vue", "svelte": "svelte", "@angular/core": "angular", "next": "next",
+                "nuxt": "nuxt", "jquery": "jquery", "bootstrap": "bootstrap", "tailwindcss": "tailwind",
+                "vite": "vite", "webpack": "webpack"}
+
+
+def is_ignored(name, ignore_patterns):
+    """Проверяет, подпадает ли имя файла или папки под один из шаблонов игнорирования."""
+    return any(fnmatch.fnmatch(name, pattern) for pattern in ignore_patterns)
+
+
+def scan_directory_level(path, ignore_patterns=(), cancel_event=None):
+    """Читает один уровень каталога через os.scandir и возвращает отсортированные списки папок и файлов.
+
+    Возвращает None, если сканирование было отменено через cancel_event.
+    """
+    dirs, files = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if is_ignored(entry.name, ignore_patterns):
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    dirs.sort(key=str.lower)
+    files.sort(key=str.lower)
+    return dirs, files
+
+
+def iter_project_files(path, ignore_patterns=(), cancel_event=None):
+    """Обходит проект через os.scandir и выдает (полный путь, относительный путь, stat) для каждого файла."""
+    # Относительный путь получается срезом: os.path.relpath на каждый файл слишком дорог
+    prefix_length = len(os.path.join(path, ""))
+    stack = [path]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if is_ignored(entry.name, ignore_patterns):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.path[prefix_length:], entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+class JsonFileCache:
+    """Общая основа дисковых кэшей в JSON-файле.
+
+    Записи хранятся в словаре entries; изменения отмечаются флагом dirty под
+    lock, а save записывает файл, только если что-то изменилось. Сохранение
+    может выполняться в фоновой задаче параллельно с изменениями. Кэши данных
+    по папкам проектов используют ключи project_key.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Загружает кэш с диска; поврежденный кэш просто игнорируется."""
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                self.entries = {}
+
+    @staticmethod
+    def project_key(project_path):
+        """Возвращает нормализованный ключ проекта."""
+        return os.path.normcase(os.path.abspath(project_path))
+
+    def remove_project(self, project_path):
+        """Удаляет из кэша все данные проекта."""
+        with self.lock:
+            if self.entries.pop(self.project_key(project_path), None) is not None:
+                self.dirty = True
+
+    def save(self):
+        """Атомарно сохраняет кэш на диск, если он изменился."""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.entries, separators=(",", ":"))
+            self.dirty = False
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
+
+
+class DirectorySnapshotCache(JsonFileCache):
+    """Дисковый кэш содержимого папок проектов, проверяемый по mtime каталогов.
+
+    Для каждого проекта хранится список папок и файлов каждого прочитанного
+    каталога вместе с его mtime. Каталог нужно перечитывать только если его
+    mtime изменился (файлы добавлены, удалены или переименованы).
+    """
+
+    def get_level(self, project_path, dir_path, ignore_patterns):
+        """Возвращает сохраненный уровень каталога или None."""
+        project = self.entries.get(self.project_key(project_path))
+        if not project or project.get("ignore_patterns") != list(ignore_patterns):
+            return None
+        return project["dirs"].get(os.path.relpath(dir_path, project_path))
+
+    def set_level(self, project_path, dir_path, mtime, dirs, files, ignore_patterns):
+        """Сохраняет прочитанный уровень каталога вместе с его mtime."""
+        key = self.project_key(project_path)
+        with self.lock:
+            project = self.entries.get(key)
+            if not project or project.get("ignore_patterns") != list(ignore_patterns):
+                project = {"ignore_patterns": list(ignore_patterns), "dirs": {}}
+                self.entries[key] = project
+            project["dirs"][os.path.relpath(dir_path, project_path)] = {
+                "mtime": mtime,
+                "dirs": dirs,
+                "files": files
+            }
+            self.dirty = True
+
+
+class SearchIndex:
+    """Индекс для быстрого поиска сайтов по названию, описанию, тегам и пути.
+
+    Поля каждого сайта заранее приводятся к нижнему регистру, а их триграммы
+    хранятся в обратном индексе, поэтому подстрока проверяется только у
+    сайтов-кандидатов, а не у всего списка. Ключи сортировки по имени и
+    дате добавления тоже вычисляются один раз при добавлении сайта.
+    """
+
+    NGRAM_SIZE = 3
+
+    def __init__(self):
+        self.texts = {}
+        self.order = {}
+        self.ngrams = {}
+        self.name_keys = {}
+        self.date_keys = {}
+        self.next_order = 0
+
+    @staticmethod
+    def site_text(name, site_data):
+        """Собирает текст сайта для поиска в нижнем регистре."""
+        parts = [
+            name,
+            site_data.get("description", ""),
+            " ".join(site_data.get("tags", [])),
+            site_data.get("path", "")
+        ]
+        return "\n".join(parts).lower()
+
+    def text_ngrams(self, text):
+        """Возвращает множество n-грамм строки."""
+        size = self.NGRAM_SIZE
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def rebuild(self, websites):
+        """Полностью перестраивает индекс по словарю сайтов."""
+        self.texts = {}
+        self.order = {}
+        self.ngrams = {}
+        self.name_keys = {}
+        self.date_keys = {}
+        self.next_order = 0
+        for name, site_data in websites.items():
+            self.add(name, site_data)
+
+    def add(self, name, site_data):
+        """Добавляет сайт в индекс или обновляет его, сохраняя позицию в списке."""
+        self.name_keys[name] = name.casefold()
+        self.date_keys[name] = site_data.get("added_date", "")
+        if name in self.texts:
+            self.unindex_text(name)
+        else:
+            self.order[name] = self.next_order
+            self.next_order += 1
+        text = self.site_text(name, site_data)
+        self.texts[name] = text
+        for gram in self.text_ngrams(text):
+            self.ngrams.setdefault(gram, set()).add(name)
+
+    def remove(self, name):
+        """Удаляет сайт из индекса."""
+        if name in self.texts:
+            self.unindex_text(name)
+            del self.texts[name]
+            del self.order[name]
+            del self.name_keys[name]
+            del self.date_keys[name]
+
+    def unindex_text(self, name):
+        """Убирает n-граммы сайта из обратного индекса."""
+        for gram in self.text_ngrams(self.texts[name]):
+            names = self.ngrams.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.ngrams[gram]
+
+    def search(self, query):
+        """Возвращает названия подходящих сайтов в порядке их добавления."""
+        query = query.lower()
+        if not query:
+            return list(self.texts)
+        if len(query) < self.NGRAM_SIZE:
+            return [name for name, text in self.texts.items() if query in text]
+
+        candidate_sets = sorted((self.ngrams.get(gram, set()) for gram in self.text_ngrams(query)), key=len)
+        if not candidate_sets[0]:
+            return []
+        if len(candidate_sets[0]) * 4 > len(self.texts):
+            # Частая n-грамма: пересечение и сортировка дороже линейного прохода
+            return [name for name, text in self.texts.items() if query in text]
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+        names = [name for name in candidates if query in self.texts[name]]
+        names.sort(key=self.order.__getitem__)
+        return names
+
+
+class TagIndex:
+    """Индекс тегов: для каждого тега множество сайтов, для каждого сайта его теги.
+
+    Обновляется по одному сайту, поэтому список тегов и выборки по ним не
+    пересчитываются обходом всех сайтов после каждой правки.
+    """
+
+    def __init__(self):
+        self.sites = {}
+        self.tags = {}
+
+    def rebuild(self, websites):
+        """Полностью перестраивает индекс по словарю сайтов."""
+        self.sites = {}
+        self.tags = {}
+        for name, site_data in websites.items():
+            self.add(name, site_data)
+
+    def add(self, name, site_data):
+        """Добавляет сайт или обновляет его теги (меняются только отличающиеся)."""
+        new_tags = set(site_data.get("tags", []))
+        old_tags = self.sites.get(name, set())
+        for tag in old_tags - new_tags:
+            self.discard(tag, name)
+        for tag in new_tags - old_tags:
+            self.tags.setdefault(tag, set()).add(name)
+        self.sites[name] = new_tags
+
+    def remove(self, name):
+        """Удаляет сайт из индекса."""
+        for tag in self.sites.pop(name, ()):
+            self.discard(tag, name)
+
+    def discard(self, tag, name):
+        """Убирает сайт из множества тега; опустевший тег удаляется из индекса."""
+        names = self.tags.get(tag)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self.tags[tag]
+
+    def all_tags(self):
+        """Возвращает отсортированный список всех тегов."""
+        return sorted(self.tags)
+
+    def select(self, all_tags=(), any_tags=(), exclude_tags=()):
+        """Возвращает множество сайтов со всеми all_tags, хотя бы одним из any_tags и без exclude_tags."""
+        empty = set()
+        if all_tags:
+            sets = sorted((self.tags.get(tag, empty) for tag in all_tags), key=len)
+            names = sets[0].intersection(*sets[1:])
+        else:
+            names = set(self.sites)
+        if any_tags:
+            names &= set().union(*(self.tags.get(tag, empty) for tag in any_tags))
+        if exclude_tags:
+            names -= set().union(*(self.tags.get(tag, empty) for tag in exclude_tags))
+        return names
+
+    def counts(self, names=None):
+        """Возвращает {тег: число сайтов} среди names (по умолчанию - среди всех сайтов)."""
+        if names is None:
+            return {tag: len(sites) for tag, sites in self.tags.items()}
+        counts = dict.fromkeys(self.tags, 0)
+        for name in names:
+            for tag in self.sites.get(name, ()):
+                counts[tag] += 1
+        return counts
+
+
+class WebsiteStore:
+    """Хранилище реестра сайтов в SQLite.
+
+    Каждая правка записывает только измененную запись в отдельной транзакции,
+    поэтому сбой посреди сохранения не портит остальные данные.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        with closing(self.connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS websites (
+                                name TEXT PRIMARY KEY,
+                                position INTEGER NOT NULL,
+                                data TEXT NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS websites_position ON websites (position)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.commit()
+
+    def connect(self):
+        """Открывает новое соединение с базой."""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load_all(self):
+        """Возвращает словарь всех сайтов в порядке добавления."""
+        with closing(self.connect()) as conn:
+            rows = conn.execute("SELECT name, data FROM websites ORDER BY position").fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def put_many(self, items):
+        """Добавляет или обновляет несколько записей (name, data) одной транзакцией."""
+        with closing(self.connect()) as conn, conn:
+            for name, site_data in items:
+                conn.execute("""INSERT INTO websites (name, position, data)
+                                VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM websites), ?)
+                                ON CONFLICT(name) DO UPDATE SET data = excluded.data""",
+                             (name, json.dumps(site_data, ensure_ascii=False)))
+
+    def put(self, name, site_data):
+        """Добавляет или обновляет одну запись."""
+        self.put_many([(name, site_data)])
+
+    def delete(self, name):
+        """Удаляет запись о сайте."""
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM websites WHERE name = ?", (name,))
+
+    def import_json(self, json_file):
+        """Однократно импортирует реестр из старого websites.json.
+
+        Возвращает True, если импорт был выполнен. Сам JSON-файл не изменяется.
+        """
+        with closing(self.connect()) as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return False
+        with open(json_file, "r", encoding="utf-8") as f:
+            websites = json.load(f)
+        with closing(self.connect()) as conn, conn:
+            for name, site_data in websites.items():
+                conn.execute("""INSERT INTO websites (name, position, data)
+                                VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM websites), ?)
+                                ON CONFLICT(name) DO NOTHING""",
+                             (name, json.dumps(site_data, ensure_ascii=False)))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)", (json_file,))
+        return True
+
+
+class ContentIndexer:
+    """Полнотекстовый индекс содержимого файлов проектов в SQLite FTS5.
+
+    Файлы переиндексируются только если изменились их mtime или размер.
+    Запись в базу выполняет один поток, чтение файлов - пул потоков.
+    """
+
+    def __init__(self, db_file, max_workers=4):
+        self.db_file = db_file
+        self.max_workers = max_workers
+        self.write_lock = threading.Lock()
+        with closing(self.connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS files (
+                                id INTEGER PRIMARY KEY,
+                                site TEXT NOT NULL,
+                                path TEXT NOT NULL,
+                                mtime REAL NOT NULL,
+                                size INTEGER NOT NULL,
+                                UNIQUE(site, path))""")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS file_content USING fts5(body, tokenize='unicode61')")
+            conn.commit()
+
+    def connect(self):
+        """Открывает новое соединение (у каждого потока должно быть свое)."""
+        return sqlite3.connect(self.db_file, timeout=30)
+
+    @staticmethod
+    def read_text(full_path):
+        """Читает текстовый файл; при ошибке возвращает None."""
+        try:
+            with open(full_path, "rb") as f:
+                return f.read().decode("utf-8", errors="replace")
+        except OSError:
+            return None
+
+    def index_site(self, site_name, project_path, ignore_patterns=(), cancel_event=None):
+        """Инкрементально индексирует текстовые файлы проекта.
+
+        Возвращает кортеж (число переиндексированных файлов, число удаленных из индекса).
+        """
+        current = {}
+        for full_path, rel_path, st in iter_project_files(project_path, ignore_patterns, cancel_event):
+            if os.path.splitext(rel_path)[1].lower() in TEXT_EXTENSIONS and st.st_size <= MAX_INDEXED_FILE_SIZE:
+                current[rel_path] = (full_path, st.st_mtime, st.st_size)
+
+        with self.write_lock, closing(self.connect()) as conn:
+            existing = {path: (file_id, mtime, size) for file_id, path, mtime, size in
+                        conn.execute("SELECT id, path, mtime, size FROM files WHERE site = ?", (site_name,))}
+            removed = [existing[path][0] for path in existing.keys() - current.keys()]
+            changed = [path for path, (full_path, mtime, size) in current.items()
+                       if path not in existing or existing[path][1:] != (mtime, size)]
+
+            for file_id in removed:
+                conn.execute("DELETE FROM file_content WHERE rowid = ?", (file_id,))
+                conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            conn.commit()
+
+            from concurrent.futures import ThreadPoolExecutor
+
+            batch_size = 200
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for start in range(0, len(changed), batch_size):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    batch = changed[start:start + batch_size]
+                    bodies = pool.map(self.read_text, [current[path][0] for path in batch])
+                    for path, body in zip(batch, bodies):
+                        if body is None:
+                            continue
+                        _, mtime, size = current[path]
+                        if path in existing:
+                            file_id = existing[path][0]
+                            conn.execute("UPDATE files SET mtime = ?, size = ? WHERE id = ?", (mtime, size, file_id))
+                            conn.execute("DELETE FROM file_content WHERE rowid = ?", (file_id,))
+                        else:
+                            cursor = conn.execute("INSERT INTO files (site, path, mtime, size) VALUES (?, ?, ?, ?)",
+                                                  (site_name, path, mtime, size))
+                            file_id = cursor.lastrowid
+                        conn.execute("INSERT INTO file_content (rowid, body) VALUES (?, ?)", (file_id, body))
+                    conn.commit()
+        return len(changed), len(removed)
+
+    def remove_site(self, site_name):
+        """Удаляет из индекса все файлы сайта."""
+        with self.write_lock, closing(self.connect()) as conn:
+            conn.execute("DELETE FROM file_content WHERE rowid IN (SELECT id FROM files WHERE site = ?)", (site_name,))
+            conn.execute("DELETE FROM files WHERE site = ?", (site_name,))
+            conn.commit()
+
+    def search(self, query, limit=50, max_lines=5):
+        """Ищет строку в содержимом файлов.
+
+        Возвращает список словарей с ключами site, path и lines - списком пар
+        (номер строки, текст строки) с найденной подстрокой.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        # Запрос передается как фраза, чтобы спецсимволы FTS5 (-, :, *) не ломали синтаксис
+        fts_query = '"' + query.replace('"', '""') + '"'
+        needle = query.lower()
+        results = []
+        with closing(self.connect()) as conn:
+            try:
+                rows = conn.execute("""SELECT f.site, f.path, c.body FROM file_content c
+                                       JOIN files f ON f.id = c.rowid
+                                       WHERE file_content MATCH ? ORDER BY rank LIMIT ?""",
+                                    (fts_query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                return []
+        for site, path, body in rows:
+            lines = []
+            for line_no, line in enumerate(body.splitlines(), 1):
+                if needle in line.lower():
+                    lines.append((line_no, line.strip()[:200]))
+                    if len(lines) >= max_lines:
+                        break
+            results.append({"site": site, "path": path, "lines": lines})
+        return results
+
+
+def format_size(size):
+    """Возвращает размер в байтах в удобных единицах."""
+    if size < 1024:
+        return f"{size} Б"
+    for unit in ("КБ", "МБ", "ГБ"):
+        size /= 1024
+        if size < 1024 or unit == "ГБ":
+            return f"{size:.1f} {unit}"
+
+
+class ProjectStatsCache(JsonFileCache):
+    """Статистика занимаемого места по проектам с кэшем по mtime каталогов.
+
+    Для каждого каталога хранятся агрегаты только его собственных файлов:
+    число, размер, разбивка по расширениям и крупнейшие файлы. Если mtime
+    каталога не изменился, агрегаты берутся из кэша без чтения каталога,
+    поэтому повторный анализ стоит одного stat на каталог. Изменение размера
+    уже существующего файла (без изменения каталога) учитывается при force=True.
+    """
+
+    TOP_FILES = 10
+
+    def read_dir(self, dir_path, mtime, ignore_patterns):
+        """Читает каталог и считает агрегаты его файлов."""
+        count = total = 0
+        extensions = {}
+        largest = []
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if is_ignored(entry.name, ignore_patterns):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        size = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+                    count += 1
+                    total += size
+                    ext = os.path.splitext(entry.name)[1].lower() or "(без расширения)"
+                    ext_stats = extensions.setdefault(ext, [0, 0])
+                    ext_stats[0] += 1
+                    ext_stats[1] += size
+                    if len(largest) < self.TOP_FILES:
+                        heapq.heappush(largest, (size, entry.name))
+                    elif size > largest[0][0]:
+                        heapq.heapreplace(largest, (size, entry.name))
+        except OSError:
+            return None
+        return {
+            "mtime": mtime,
+            "subdirs": subdirs,
+            "count": count,
+            "size": total,
+            "ext": extensions,
+            "largest": [[name, size] for size, name in largest]
+        }
+
+    def refresh(self, project_path, ignore_patterns=(), force=False):
+        """Пересчитывает статистику проекта, перечитывая только изменившиеся каталоги."""
+        key = self.project_key(project_path)
+        ignore_patterns = list(ignore_patterns)
+        with self.lock:
+            cached = self.entries.get(key)
+        old_dirs = cached["dirs"] if cached and cached.get("ignore_patterns") == ignore_patterns else {}
+
+        dirs = {}
+        stack = [(project_path, "")]
+        while stack:
+            dir_path, rel_dir = stack.pop()
+            try:
+                mtime = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+            entry = old_dirs.get(rel_dir)
+            if force or entry is None or entry["mtime"] != mtime:
+                entry = self.read_dir(dir_path, mtime, ignore_patterns)
+                if entry is None:
+                    continue
+            dirs[rel_dir] = entry
+            for subdir in entry["subdirs"]:
+                stack.append((os.path.join(dir_path, subdir), os.path.join(rel_dir, subdir) if rel_dir else subdir))
+
+        with self.lock:
+            self.entries[key] = {"ignore_patterns": ignore_patterns, "dirs": dirs}
+            self.dirty = True
+        return self.summarize(dirs)
+
+    def get(self, project_path):
+        """Возвращает статистику проекта из кэша без обращения к диску или None."""
+        with self.lock:
+            cached = self.entries.get(self.project_key(project_path))
+        return self.summarize(cached["dirs"]) if cached else None
+
+    def summarize(self, dirs):
+        """Сводит агрегаты каталогов в статистику проекта."""
+        total = count = 0
+        extensions = {}
+        for entry in dirs.values():
+            total += entry["size"]
+            count += entry["count"]
+            for ext, (ext_count, ext_size) in entry["ext"].items():
+                ext_stats = extensions.setdefault(ext, [0, 0])
+                ext_stats[0] += ext_count
+                ext_stats[1] += ext_size
+        largest = heapq.nlargest(self.TOP_FILES, ((size, os.path.join(rel_dir, name) if rel_dir else name)
+                                                  for rel_dir, entry in dirs.items()
+                                                  for name, size in entry["largest"]))
+        return {
+            "total_size": total,
+            "file_count": count,
+            "dir_count": max(len(dirs) - 1, 0),
+            "extensions": [{"ext": ext, "count": ext_count, "size": ext_size} for ext, (ext_count, ext_size)
+                           in sorted(extensions.items(), key=lambda item: item[1][1], reverse=True)],
+            "largest_files": [{"path": path, "size": size} for size, path in largest]
+        }
+
+    def refresh_many(self, projects, ignore_patterns=(), force=False, max_workers=8, callback=None,
+                     cancel_event=None):
+        """Параллельно пересчитывает статистику нескольких проектов.
+
+        projects - словарь {название: путь}. callback(название, статистика)
+        вызывается из рабочих потоков по мере готовности (для недоступных
+        папок статистика равна None). После cancel_event еще не начатые
+        проекты пропускаются. Возвращает словарь результатов.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self.refresh, path, ignore_patterns, force): name
+                       for name, path in projects.items() if os.path.isdir(path)}
+            for name in projects.keys() - set(futures.values()):
+                results[name] = None
+                if callback is not None:
+                    callback(name, None)
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                name = futures[future]
+                results[name] = future.result()
+                if callback is not None:
+                    callback(name, results[name])
+        return results
+
+
+# Проверка состояния проектов: как часто перепроверять и сколько ждать git
+HEALTH_MAX_AGE = 300
+GIT_STATUS_TIMEOUT = 10
+
+
+def git_status(project_path, timeout=GIT_STATUS_TIMEOUT):
+    """Возвращает "clean" или "dirty" для git-репозитория, None - если проверить не удалось."""
+    import subprocess
+
+    try:
+        result = subprocess.run(["git", "status", "--porcelain", "--untracked-files=normal"], cwd=project_path,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return "dirty" if result.stdout.strip() else "clean"
+
+
+def check_project_health(site_data):
+    """Проверяет запись сайта: папка, основной файл, время изменения и состояние git.
+
+    status - "ok", "dirty" (есть незакоммиченные изменения), "no_main_file"
+    или "missing" (папки нет). mtime - последнее изменение папки или
+    основного файла.
+    """
+    path = site_data.get("path", "")
+    main_file = site_data.get("main_file", "")
+    health = {"path": path, "main_file": main_file, "checked": time.time(), "path_exists": False,
+              "main_file_exists": False, "mtime": None, "git": None, "status": "missing"}
+    try:
+        health["mtime"] = os.stat(path).st_mtime
+    except OSError:
+        return health
+    if not os.path.isdir(path):
+        return health
+    health["path_exists"] = True
+    main_path = os.path.join(path, main_file) if main_file else ""
+    try:
+        health["mtime"] = max(health["mtime"], os.stat(main_path).st_mtime)
+        health["main_file_exists"] = os.path.isfile(main_path)
+    except OSError:
+        pass
+    if os.path.exists(os.path.join(path, ".git")):
+        health["git"] = git_status(path)
+    if not health["main_file_exists"]:
+        health["status"] = "no_main_file"
+    elif health["git"] == "dirty":
+        health["status"] = "dirty"
+    else:
+        health["status"] = "ok"
+    return health
+
+
+class ProjectHealthCache(JsonFileCache):
+    """Результаты проверки состояния проектов с отметкой времени проверки.
+
+    Записи хранятся по названию сайта вместе с проверенными путем и
+    основным файлом; запись считается устаревшей, если они изменились или
+    проверка была давнее max_age секунд.
+    """
+
+    def get(self, name):
+        """Возвращает последний результат проверки сайта или None."""
+        with self.lock:
+            return self.entries.get(name)
+
+    def remove(self, name):
+        """Удаляет результат проверки сайта."""
+        with self.lock:
+            if self.entries.pop(name, None) is not None:
+                self.dirty = True
+
+    def is_fresh(self, name, site_data, max_age):
+        """Проверяет, что результат сайта есть, относится к его текущим пути и основному файлу и моложе max_age."""
+        with self.lock:
+            entry = self.entries.get(name)
+        return (entry is not None and entry["path"] == site_data.get("path", "")
+                and entry["main_file"] == site_data.get("main_file", "")
+                and time.time() - entry["checked"] < max_age)
+
+    def check_many(self, websites, max_age=HEALTH_MAX_AGE, max_workers=8, cancel_event=None, progress=None,
+                   prune=True):
+        """Параллельно проверяет сайты, чьи результаты устарели, и возвращает {название: результат}.
+
+        websites - словарь {название: запись сайта}; при max_age=0 проверяются
+        все сайты. progress(готово, всего) вызывается из рабочего потока.
+        При prune записи сайтов, которых нет в websites, убираются из кэша;
+        для проверки отдельных сайтов prune=False.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        if prune:
+            with self.lock:
+                for name in self.entries.keys() - websites.keys():
+                    del self.entries[name]
+                    self.dirty = True
+        stale = {name: site_data for name, site_data in websites.items()
+                 if not self.is_fresh(name, site_data, max_age)}
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(check_project_health, site_data): name for name, site_data in stale.items()}
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                name = futures[future]
+                results[name] = future.result()
+                with self.lock:
+                    self.entries[name] = results[name]
+                    self.dirty = True
+                if progress is not None:
+                    progress(len(results), len(stale))
+        return results
+
+
+class FileHashCache(JsonFileCache):
+    """Кэш хэшей файлов с ключом (путь, размер, mtime).
+
+    Для каждого файла хранятся частичный хэш (первые PARTIAL_SIZE байт) и,
+    если он понадобился, полный хэш. Запись считается верной, пока размер и
+    mtime файла не изменились, поэтому повторный поиск дубликатов читает с
+    диска только новые и измененные файлы.
+    """
+
+    PARTIAL_SIZE = 64 * 1024
+    CHUNK_SIZE = 1024 * 1024
+
+    def retain(self, paths):
+        """Удаляет из кэша файлы, которых нет среди paths."""
+        with self.lock:
+            stale = self.entries.keys() - set(paths)
+            for path in stale:
+                del self.entries[path]
+            if stale:
+                self.dirty = True
+
+    def cached_hash(self, path, size, mtime, full):
+        """Возвращает хэш из кэша без чтения файла или None."""
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is None or entry[0] != size or entry[1] != mtime:
+            return None
+        return entry[3 if full else 2]
+
+    def get_hash(self, path, size, mtime, full):
+        """Возвращает частичный (full=False) или полный хэш файла, читая файл только при промахе кэша."""
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is None or entry[0] != size or entry[1] != mtime:
+            entry = [size, mtime, None, None]
+        index = 3 if full else 2
+        if entry[index] is None:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(path, "rb") as f:
+                if full:
+                    for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                else:
+                    digest.update(f.read(self.PARTIAL_SIZE))
+            entry = list(entry)
+            entry[index] = digest.hexdigest()
+            # Файл не длиннее PARTIAL_SIZE целиком покрыт частичным хэшем
+            if size <= self.PARTIAL_SIZE:
+                entry[2] = entry[3] = entry[index]
+            with self.lock:
+                self.entries[path] = entry
+                self.dirty = True
+        return entry[index]
+
+
+def find_duplicates(projects, hash_cache, ignore_patterns=(), min_size=1, max_workers=8, progress=None,
+                    cancel_event=None):
+    """Ищет одинаковые файлы во всех проектах.
+
+    projects - словарь {название: путь}. Файлы сначала группируются по
+    размеру, в группах из нескольких файлов сравнивается частичный хэш, и
+    только оставшиеся кандидаты хэшируются целиком; хэши считаются пулом
+    потоков и берутся из hash_cache. progress(этап) вызывается из рабочего
+    потока перед каждым этапом; после cancel_event возвращается пустой
+    список. Возвращает группы, отсортированные по потерянному месту:
+    {"size", "hash", "wasted", "files": [{"site", "path"}]}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def report(stage):
+        if progress is not None:
+            progress(stage)
+        return cancel_event is None or not cancel_event.is_set()
+
+    # Этап 1: обход проектов и группировка по размеру
+    if not report("scan"):
+        return []
+    by_size = {}
+    seen = {}
+    for name, project_path in projects.items():
+        if not os.path.isdir(project_path):
+            continue
+        for full_path, rel_path, stat in iter_project_files(project_path, ignore_patterns, cancel_event):
+            key = os.path.normcase(os.path.abspath(full_path))
+            if stat.st_size < min_size or key in seen:
+                continue
+            seen[key] = (name, rel_path, stat.st_size, stat.st_mtime_ns)
+            by_size.setdefault(stat.st_size, []).append(key)
+    if not report("partial"):
+        return []
+    hash_cache.retain(seen)
+
+    def hash_groups(groups, full):
+        """Разбивает группы кандидатов по хэшу, оставляя только совпадения."""
+        def job(path):
+            _, _, size, mtime = seen[path]
+            try:
+                return path, hash_cache.get_hash(path, size, mtime, full)
+            except OSError:
+                return path, None
+
+        # Попадания в кэш разбираются сразу, в пул уходят только файлы, которые нужно читать
+        hashes = {}
+        misses = []
+        for group in groups:
+            for path in group:
+                _, _, size, mtime = seen[path]
+                hashes[path] = hash_cache.cached_hash(path, size, mtime, full)
+                if hashes[path] is None:
+                    misses.append(path)
+        hashes.update(pool.map(job, misses))
+        result = []
+        for group in groups:
+            by_hash = {}
+            for path in group:
+                if hashes[path] is not None:
+                    by_hash.setdefault(hashes[path], []).append(path)
+            result.extend(same for same in by_hash.values() if len(same) > 1)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Этап 2: частичный хэш для файлов одинакового размера
+        candidates = hash_groups([group for group in by_size.values() if len(group) > 1], full=False)
+        # Этап 3: полный хэш только для файлов длиннее частичного блока
+        if not report("full"):
+            return []
+        small = [group for group in candidates if seen[group[0]][2] <= FileHashCache.PARTIAL_SIZE]
+        large = [group for group in candidates if seen[group[0]][2] > FileHashCache.PARTIAL_SIZE]
+        duplicates = small + hash_groups(large, full=True)
+
+    groups = []
+    for group in duplicates:
+        _, _, size, mtime = seen[group[0]]
+        groups.append({
+            "size": size,
+            "hash": hash_cache.cached_hash(group[0], size, mtime, full=True) or "",
+            "wasted": size * (len(group) - 1),
+            "files": [{"site": site, "path": rel_path} for site, rel_path in sorted(seen[path][:2] for path in group)]
+        })
+    groups.sort(key=lambda group: group["wasted"], reverse=True)
+    return groups
+
+
+def infer_project(path, ignore_patterns=(), max_files=2000):
+    """Определяет основной файл и теги проекта по его файлам.
+
+    Просматривается не больше max_files файлов, чтобы крупные проекты не
+    замедляли импорт.
+    """
+    main_file = next((candidate for candidate in MAIN_FILE_CANDIDATES
+                      if os.path.isfile(os.path.join(path, candidate))), None)
+    tags = set()
+    first_html = None
+    for index, (_, rel_path, _) in enumerate(iter_project_files(path, ignore_patterns)):
+        if index >= max_files:
+            break
+        ext = os.path.splitext(rel_path)[1].lower()
+        if ext in EXTENSION_TAGS:
+            tags.add(EXTENSION_TAGS[ext])
+        if ext in (".html", ".htm") and (first_html is None or rel_path.count(os.sep) < first_html.count(os.sep)):
+            first_html = rel_path
+
+    try:
+        with open(os.path.join(path, "package.json"), "r", encoding="utf-8") as f:
+            package = json.load(f)
+        dependencies = {**package.get("dependencies", {}), **package.get("devDependencies", {})}
+        tags.update(tag for package_name, tag in PACKAGE_TAGS.items() if package_name in dependencies)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if main_file is None:
+        main_file = first_html or "package.json"
+    return main_file.replace("/", os.sep), sorted(tags)
+
+
+def discover_projects(root, ignore_patterns=(), max_depth=6, max_workers=8, cancel_event=None):
+    """Параллельно ищет веб-проекты в папке root.
+
+    Проектом считается папка с index.html/index.htm или package.json; внутрь
+    найденного проекта поиск не спускается. Каталоги каждого уровня читаются
+    пулом потоков. Возвращает список записей о сайтах (make_site_data).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def read_level(dir_path):
+        try:
+            dirs, files = scan_directory_level(dir_path, ignore_patterns)
+        except OSError:
+            return dir_path, [], False
+        return dir_path, dirs, any(marker in files for marker in PROJECT_MARKERS)
+
+    def describe(project_path):
+        main_file, tags = infer_project(project_path, ignore_patterns)
+        return make_site_data(project_path, main_file, "", tags)
+
+    projects = []
+    level = [os.path.abspath(root)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for depth in range(max_depth + 1):
+            next_level = []
+            for dir_path, dirs, is_project in pool.map(read_level, level):
+                if is_project:
+                    projects.append(dir_path)
+                elif depth < max_depth:
+                    next_level.extend(os.path.join(dir_path, dir_name) for dir_name in dirs)
+            if not next_level or (cancel_event is not None and cancel_event.is_set()):
+                break
+            level = next_level
+        return list(pool.map(describe, sorted(projects)))
+
+
+def walk_tree(path, ignore_patterns=(), max_depth=None):
+    """Обходит дерево проекта по уровням и выдает (глубина, имя, это_папка) в порядке отображения."""
+    def walk(current, depth):
+        try:
+            dirs, files = scan_directory_level(current, ignore_patterns)
+        except OSError:
+            return
+        for dir_name in dirs:
+            yield depth, dir_name, True
+            if max_depth is None or depth + 1 < max_depth:
+                yield from walk(os.path.join(current, dir_name), depth + 1)
+        for file_name in files:
+            yield depth, file_name, False
+
+    yield from walk(path, 0)
+
+
+def make_site_data(folder_path, main_file, description="", tags=(), name=None):
+    """Формирует запись о сайте; main_file может быть абсолютным или относительным путем."""
+    if os.path.isabs(main_file):
+        main_file = os.path.relpath(main_file, folder_path)
+    return {
+        "name": name or os.path.basename(os.path.normpath(folder_path)),
+        "path": folder_path,
+        "main_file": main_file,
+        "description": description,
+        "tags": [tag for tag in tags if tag],
+        "added_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def parse_tags(tags_str):
+    """Разбирает строку тегов, перечисленных через запятую."""
+    return [tag.strip() for tag in tags_str.split(',') if tag.strip()] if tags_str else []
+
+
+DEFAULT_CONFIG = {
+    "custom_editor_path": None,
+    "ignore_patterns": DEFAULT_IGNORE_PATTERNS,
+    "live_reload": False
+}
+
+
+def read_config(config_file):
+    """Загружает конфигурацию, дополняя ее значениями по умолчанию.
+
+    Поврежденный файл вызывает json.JSONDecodeError.
+    """
+    config = {key: (list(value) if isinstance(value, list) else value) for key, value in DEFAULT_CONFIG.items()}
+    if os.path.exists(config_file):
+        with open(config_file, "r") as f:
+            config.update(json.load(f))
+    return config
+
+
+def write_config(config_file, config):
+    """Атомарно сохраняет конфигурацию."""
+    tmp_file = config_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(config, f, indent=4)
+    os.replace(tmp_file, config_file)
+
+
+class WebsiteRegistry:
+    """Реестр сайтов: записи в SQLite, поисковый индекс и индекс тегов в памяти.
+
+    Все файлы данных (websites.db, старый websites.json, кэши) хранятся в
+    data_dir - по умолчанию это текущая папка, как и раньше.
+    """
+
+    def __init__(self, data_dir=None):
+        self.data_dir = os.path.abspath(data_dir or os.getcwd())
+        self.json_file = os.path.join(self.data_dir, "websites.json")
+        self.config_file = os.path.join(self.data_dir, "config.json")
+        self.store = WebsiteStore(os.path.join(self.data_dir, "websites.db"))
+        self.websites = {}
+        self.search_index = SearchIndex()
+        self.tag_index = TagIndex()
+        self.import_error = None
+
+    def data_path(self, file_name):
+        """Возвращает путь к служебному файлу в папке данных."""
+        return os.path.join(self.data_dir, file_name)
+
+    def load(self):
+        """Загружает реестр (при первом запуске импортирует websites.json).
+
+        Ошибка импорта JSON не прерывает загрузку, а сохраняется в import_error.
+        Ошибки базы передаются вызывающему коду.
+        """
+        self.apply_loaded(self.read())
+        return self.websites
+
+    def read(self):
+        """Читает записи и строит индексы, не меняя текущее состояние реестра.
+
+        Метод можно вызывать из фонового потока; результат применяется
+        в потоке интерфейса через apply_loaded.
+        """
+        import_error = None
+        if os.path.exists(self.json_file):
+            try:
+                self.store.import_json(self.json_file)
+            except (json.JSONDecodeError, OSError, AttributeError) as e:
+                import_error = e
+        websites = self.store.load_all()
+        search_index = SearchIndex()
+        search_index.rebuild(websites)
+        tag_index = TagIndex()
+        tag_index.rebuild(websites)
+        return websites, search_index, tag_index, import_error
+
+    def apply_loaded(self, loaded):
+        """Подставляет прочитанные методом read записи и индексы."""
+        websites, self.search_index, self.tag_index, self.import_error = loaded
+        # Словарь не пересоздается: на него могут ссылаться другие объекты
+        self.websites.clear()
+        self.websites.update(websites)
+
+    def add(self, name, site_data):
+        """Добавляет или заменяет сайт."""
+        self.websites[name] = site_data
+        self.update_many([name])
+
+    def update(self, name):
+        """Сохраняет изменения записи, отредактированной на месте."""
+        self.update_many([name])
+
+    def update_many(self, names, persist=True):
+        """Сохраняет несколько записей одной транзакцией и обновляет индексы.
+
+        При persist=False обновляются только индексы, а запись в базу
+        выполняет вызывающий (например, фоновой задачей через store.put_many).
+        """
+        for name in names:
+            self.search_index.add(name, self.websites[name])
+            self.tag_index.add(name, self.websites[name])
+        if persist:
+            self.store.put_many([(name, self.websites[name]) for name in names])
+
+    def delete(self, name, persist=True):
+        """Удаляет сайт и возвращает его запись (при persist=False - только из памяти)."""
+        site_data = self.websites.pop(name)
+        self.search_index.remove(name)
+        self.tag_index.remove(name)
+        if persist:
+            self.store.delete(name)
+        return site_data
+
+    def add_many(self, sites, persist=True):
+        """Добавляет несколько сайтов одной транзакцией и возвращает их имена.
+
+        Уже зарегистрированные папки пропускаются, при совпадении названий
+        к новому добавляется номер.
+        """
+        registered_paths = {os.path.normcase(os.path.abspath(site_data.get("path", "")))
+                            for site_data in self.websites.values()}
+        added = []
+        for site_data in sites:
+            path_key = os.path.normcase(os.path.abspath(site_data["path"]))
+            if path_key in registered_paths:
+                continue
+            registered_paths.add(path_key)
+            name = base_name = site_data["name"]
+            number = 2
+            while name in self.websites:
+                name = f"{base_name} ({number})"
+                number += 1
+            site_data["name"] = name
+            self.websites[name] = site_data
+            added.append(name)
+        if added:
+            self.update_many(added, persist)
+        return added
+
+    def search(self, query, all_tags=(), any_tags=(), exclude_tags=()):
+        """Ищет сайты по названию, описанию, тегам и пути с учетом фильтра по тегам.
+
+        Сайт должен иметь все all_tags, хотя бы один из any_tags и ни
+        одного из exclude_tags. Порядок - порядок добавления.
+        """
+        names = self.search_index.search(query)
+        if all_tags or any_tags or exclude_tags:
+            selected = self.tag_index.select(all_tags, any_tags, exclude_tags)
+            names = [name for name in names if name in selected]
+        return names
+
+    def get_all_tags(self):
+        """Возвращает отсортированный список всех тегов."""
+        return self.tag_index.all_tags()
+
+
+# Приоритеты фоновых задач: меньшее значение выполняется раньше
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class TaskCancelled(Exception):
+    """Задача отменена."""
+
+
+class Task:
+    """Фоновая задача планировщика: состояние, прогресс и флаг отмены.
+
+    Функция задачи вызывается как func(task, *args) и может сообщать
+    прогресс через set_progress и проверять отмену через check_cancelled.
+    """
+
+    def __init__(self, scheduler, task_id, title, func, args, priority, group, lane, cancellable,
+                 on_done, on_error, track=True):
+        self.scheduler = scheduler
+        self.id = task_id
+        self.title = title
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.group = group
+        self.lane = lane
+        self.cancellable = cancellable
+        self.on_done = on_done
+        self.on_error = on_error
+        self.track = track
+        self.cancel_event = threading.Event()
+        self.state = "queued"
+        self.done = None
+        self.total = None
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def cancelled(self):
+        """Запрошена отмена задачи."""
+        return self.cancel_event.is_set()
+
+    @property
+    def pending(self):
+        """Задача еще в очереди или выполняется."""
+        return self.state in ("queued", "running")
+
+    def check_cancelled(self):
+        """Прерывает задачу исключением TaskCancelled, если ее отменили."""
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+
+    def set_progress(self, done=None, total=None, message=None):
+        """Обновляет прогресс задачи (вызывается из рабочего потока)."""
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+        self.scheduler.notify()
+
+    def describe_progress(self):
+        """Текст прогресса для списка задач."""
+        parts = []
+        if self.done is not None and self.total:
+            parts.append(f"{self.done}/{self.total} ({self.done * 100 // self.total}%)")
+        elif self.done is not None:
+            parts.append(str(self.done))
+        if self.message:
+            parts.append(self.message)
+        return " ".join(parts)
+
+
+class TaskScheduler:
+    """Планировщик фоновых задач с ограниченным пулом потоков.
+
+    Задачи выбираются по приоритету, затем по порядку постановки. Задачи с
+    одинаковым lane выполняются строго по одной в порядке постановки
+    (например, запись в базу). Результаты, ошибки и уведомления об
+    изменении списка задач передаются через deliver(callback, *args) - в
+    интерфейсе это передача в главный поток Tk; on_done не вызывается для
+    задач, отмененных до доставки результата.
+    """
+
+    HISTORY = 20
+
+    def __init__(self, max_workers=4, deliver=None, on_change=None):
+        self.max_workers = max_workers
+        self.deliver = deliver or (lambda callback, *args: callback(*args))
+        self.on_change = on_change
+        self.queue = queue.PriorityQueue()
+        self.lock = threading.Lock()
+        self.active = {}
+        self.history = deque(maxlen=self.HISTORY)
+        self.lane_holders = {}
+        self.lane_waiting = {}
+        self.workers = []
+        self.counter = itertools.count(1)
+        self.notify_pending = False
+        self.closed = False
+
+    def submit(self, title, func, *args, priority=PRIORITY_NORMAL, group=None, lane=None, cancellable=True,
+               on_done=None, on_error=None, track=True):
+        """Ставит задачу в очередь и возвращает ее.
+
+        Задачи с track=False (мелкие и частые, например загрузка уровня
+        дерева) не показываются в списке задач.
+        """
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Планировщик остановлен")
+            task = Task(self, next(self.counter), title, func, args, priority, group, lane, cancellable,
+                        on_done, on_error, track)
+            self.active[task.id] = task
+            if lane is not None and lane in self.lane_holders:
+                self.lane_waiting.setdefault(lane, deque()).append(task)
+            else:
+                if lane is not None:
+                    self.lane_holders[lane] = task
+                self.queue.put((priority, task.id, task))
+            while len(self.workers) < self.max_workers:
+                worker = threading.Thread(target=self.worker, name=f"task-worker-{len(self.workers) + 1}", daemon=True)
+                self.workers.append(worker)
+                worker.start()
+        self.notify()
+        return task
+
+    def worker(self):
+        """Рабочий поток: выполняет задачи, пока не получит сигнал остановки."""
+        while True:
+            _, _, task = self.queue.get()
+            if task is None:
+                return
+            with self.lock:
+                if task.state != "queued":
+                    continue # Отменена, пока ждала в очереди
+                task.state = "running"
+                task.started = time.time()
+            self.notify()
+            result = error = None
+            try:
+                task.check_cancelled()
+                result = task.func(task, *task.args)
+                state = "cancelled" if task.cancelled else "done"
+            except TaskCancelled:
+                state = "cancelled"
+            except Exception as e:
+                state, error = "failed", e
+            self.finish(task, state, result, error)
+
+    def finish(self, task, state, result=None, error=None):
+        """Завершает задачу, освобождает ее очередь lane и доставляет результат."""
+        with self.lock:
+            task.state = state
+            task.result = result
+            task.error = error
+            task.finished = time.time()
+            self.active.pop(task.id, None)
+            if task.track:
+                self.history.append(task)
+            if task.lane is not None:
+                if self.lane_holders.get(task.lane) is task:
+                    waiting = self.lane_waiting.get(task.lane)
+                    if waiting:
+                        successor = waiting.popleft()
+                        self.lane_holders[task.lane] = successor
+                        self.queue.put((successor.priority, successor.id, successor))
+                    else:
+                        del self.lane_holders[task.lane]
+                        self.lane_waiting.pop(task.lane, None)
+                elif task in self.lane_waiting.get(task.lane, ()):
+                    self.lane_waiting[task.lane].remove(task)
+        if (state == "done" and task.on_done is not None) or (state == "failed" and task.on_error is not None):
+            self.deliver(self.deliver_result, task)
+        self.notify()
+
+    def deliver_result(self, task):
+        """Вызывает обработчик результата в потоке получателя (для интерфейса - в потоке Tk)."""
+        if task.state == "failed":
+            task.on_error(task.error)
+        elif not task.cancelled:
+            task.on_done(task.result)
+
+    def cancel(self, task):
+        """Отменяет задачу: ожидающая снимается сразу, выполняющаяся получает флаг отмены."""
+        if not task.cancellable:
+            return False
+        task.cancel_event.set()
+        with self.lock:
+            queued = task.state == "queued"
+            if queued:
+                # Рабочий поток пропустит задачу, увидев, что она уже не в очереди
+                task.state = "cancelled"
+        if queued:
+            self.finish(task, "cancelled")
+        else:
+            self.notify()
+        return True
+
+    def cancel_group(self, group):
+        """Отменяет все активные задачи группы."""
+        with self.lock:
+            tasks = [task for task in self.active.values() if task.group == group]
+        for task in tasks:
+            self.cancel(task)
+
+    def list(self):
+        """Возвращает активные задачи и недавно завершенные (новые в конце)."""
+        with self.lock:
+            return list(self.history) + sorted((task for task in self.active.values() if task.track),
+                                               key=lambda task: task.id)
+
+    def notify(self):
+        """Сообщает получателю об изменении списка задач; частые изменения объединяются."""
+        if self.on_change is None:
+            return
+        with self.lock:
+            if self.notify_pending:
+                return
+            self.notify_pending = True
+        self.deliver(self.deliver_change)
+
+    def deliver_change(self):
+        """Вызывает on_change в потоке получателя и разрешает следующее уведомление."""
+        with self.lock:
+            self.notify_pending = False
+        self.on_change()
+
+    def shutdown(self, timeout=5):
+        """Отменяет отменяемые задачи, дожидается остальных (например, записи в базу) и останавливает потоки."""
+        with self.lock:
+            self.closed = True
+            tasks = list(self.active.values())
+        for task in tasks:
+            self.cancel(task)
+        for _ in self.workers:
+            self.queue.put((PRIORITY_LOW + 1, next(self.counter), None))
+        deadline = time.time() + timeout
+        for worker in self.workers:
+            worker.join(max(0, deadline - time.time()))
@@ -0,0 +1,197 @@
+"""Проверка ссылок проекта: битые href/src, отсутствующие ресурсы, тяжелые и медленные файлы.
+
+Ссылки из HTML и CSS сначала проверяются по файловой системе, затем
+найденные файлы запрашиваются через локальный сервер проекта асинхронными
+клиентами с ограниченным числом одновременных соединений. Модуль
+импортируется только при проверке.
+"""
+import os
+import time
+import asyncio
+import posixpath
+import threading
+import urllib.parse
+
+from website_core import iter_project_files
+from website_build import REFERENCE_PATTERNS, resolve_reference
+
+CHECKED_EXTENSIONS = (".html", ".htm", ".css")
+
+# Пороги отчета по умолчанию
+MAX_ASSET_SIZE = 1024 * 1024
+SLOW_ASSET_SECONDS = 0.2
+DEFAULT_CONCURRENCY = 16
+REQUEST_TIMEOUT = 10
+
+
+def resolve_link(ref, file_rel):
+    """Переводит ссылку в путь от корня проекта; ссылка на папку ведет к ее index.html."""
+    path = ref.split("#", 1)[0].split("?", 1)[0]
+    if path.endswith("/"):
+        ref = path + "index.html"
+    return resolve_reference(ref, file_rel)
+
+
+def collect_references(project_path, ignore_patterns=()):
+    """Собирает локальные ссылки из HTML и CSS файлов проекта.
+
+    Возвращает (число просмотренных файлов, {путь цели: [(файл, ссылка), ...]}).
+    """
+    references = {}
+    scanned = 0
+    for full_path, rel_path, _ in iter_project_files(project_path, ignore_patterns):
+        if not rel_path.lower().endswith(CHECKED_EXTENSIONS):
+            continue
+        rel = rel_path.replace(os.sep, "/")
+        try:
+            with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            continue
+        scanned += 1
+        for pattern in REFERENCE_PATTERNS[posixpath.splitext(rel)[1].lower()]:
+            for match in pattern.finditer(text):
+                ref = match.group("ref")
+                target = resolve_link(ref, rel)
+                if target is not None and target != ".":
+                    references.setdefault(target, []).append((rel, ref))
+    return scanned, references
+
+
+def resolve_on_disk(project_path, target):
+    """Возвращает путь к файлу цели на диске (для папки - ее index.html) или None."""
+    full_path = os.path.join(project_path, *target.split("/"))
+    if os.path.isdir(full_path):
+        full_path = os.path.join(full_path, "index.html")
+    return full_path if os.path.isfile(full_path) else None
+
+
+async def fetch_paths(host, port, paths, concurrency=DEFAULT_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+    """Запрашивает файлы по HTTP/1.1 и возвращает {путь: (статус, байт, секунд)}.
+
+    concurrency клиентов разбирают общую очередь, каждый держит одно
+    keep-alive соединение; статус 0 означает ошибку соединения или таймаут.
+    """
+    queue = asyncio.Queue()
+    for rel_path in paths:
+        queue.put_nowait(rel_path)
+    results = {}
+
+    async def request(reader, writer, rel_path):
+        path = "/" + urllib.parse.quote(rel_path)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept-Encoding: identity\r\n\r\n"
+                     .encode("ascii"))
+        await writer.drain()
+        status_line = await reader.readline()
+        status = int(status_line.split()[1])
+        length = None
+        keep_alive = True
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value.strip())
+            elif name == "connection" and value.strip().lower() == "close":
+                keep_alive = False
+        if length is None:
+            body = await reader.read()
+            keep_alive = False
+        else:
+            body = await reader.readexactly(length)
+        return status, len(body), keep_alive
+
+    async def client():
+        connection = None
+        while True:
+            try:
+                rel_path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            # Соединение могло быть закрыто сервером по таймауту: повторяем один раз на новом
+            for _ in range(2 if connection is not None else 1):
+                started = time.perf_counter()
+                try:
+                    if connection is None:
+                        connection = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                    status, size, keep_alive = await asyncio.wait_for(request(*connection, rel_path), timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    status, size, keep_alive = 0, 0, False
+                if not keep_alive and connection is not None:
+                    connection[1].close()
+                    connection = None
+                if status:
+                    break
+            results[rel_path] = (status, size, time.perf_counter() - started)
+        if connection is not None:
+            connection[1].close()
+
+    await asyncio.gather(*(client() for _ in range(max(1, min(concurrency, len(paths))))))
+    return results
+
+
+def check_project(project_path, ignore_patterns=(), port=None, concurrency=DEFAULT_CONCURRENCY,
+                  max_asset_size=MAX_ASSET_SIZE, slow_seconds=SLOW_ASSET_SECONDS):
+    """Проверяет ссылки проекта и возвращает отчет.
+
+    Если port не указан (сервер проекта не запущен), на время проверки
+    поднимается временный сервер на свободном порту. В отчете: число
+    файлов и ссылок, битые ссылки (нет файла или ошибка HTTP), слишком
+    большие и медленно отдаваемые файлы.
+    """
+    started = time.perf_counter()
+    scanned, references = collect_references(project_path, ignore_patterns)
+
+    broken = []
+    found = {}
+    for target, sources in sorted(references.items()):
+        full_path = resolve_on_disk(project_path, target)
+        if full_path is None:
+            broken.extend({"source": source, "ref": ref, "target": target, "reason": "файл не найден"}
+                          for source, ref in sources)
+        else:
+            found[target] = full_path
+
+    request_paths = {target: os.path.relpath(full_path, project_path).replace(os.sep, "/")
+                     for target, full_path in found.items()}
+    server = None
+    if port is None and found:
+        from website_server import ProjectHTTPServer
+
+        server = ProjectHTTPServer(("127.0.0.1", 0), project_path, max_workers=concurrency)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        port = server.server_address[1]
+    try:
+        responses = {}
+        if found:
+            responses = asyncio.run(fetch_paths("127.0.0.1", port, set(request_paths.values()), concurrency))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    oversized = []
+    slow = []
+    for target in sorted(found):
+        status, size, seconds = responses[request_paths[target]]
+        if status != 200:
+            reason = f"HTTP {status}" if status else "нет ответа сервера"
+            broken.extend({"source": source, "ref": ref, "target": target, "reason": reason}
+                          for source, ref in references[target])
+            continue
+        if size > max_asset_size:
+            oversized.append({"path": target, "size": size})
+        if seconds > slow_seconds:
+            slow.append({"path": target, "seconds": seconds})
+
+    return {
+        "files": scanned,
+        "references": sum(len(sources) for sources in references.values()),
+        "targets": len(references),
+        "broken": broken,
+        "oversized": sorted(oversized, key=lambda item: item["size"], reverse=True),
+        "slow": sorted(slow, key=lambda item: item["seconds"], reverse=True),
+        "seconds": time.perf_counter() - started
+    }
@@ -1,15 +1,20 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog, scrolledtext, ttk
+from tkinter import filedialog, messagebox, simpledialog, scrolledtext, ttk, font
 import os
+import time
 import webbrowser
 import json
 import subprocess
 import platform
 import shutil
-from datetime import datetime
-import threading
-import http.server
-import socketserver
+import queue
+import copy
+import sqlite3
+
+from website_core import (DEFAULT_IGNORE_PATTERNS, scan_directory_level, DirectorySnapshotCache,
+                          ContentIndexer, ProjectStatsCache, WebsiteRegistry, make_site_data, parse_tags,
+                          format_size, read_config, write_config, discover_projects, FileHashCache, find_duplicates,
+                          TaskScheduler, PRIORITY_HIGH, PRIORITY_LOW, ProjectHealthCache, HEALTH_MAX_AGE)
 
 # Конфигурация цветов для черной темы
 BG_COLOR = "#1E1E1E"
@@ -22,27 +27,257 @@ ENTRY_BG = "#3C3C3C"
 ENTRY_FG = "#D4D4D4"
 ACCENT_COLOR = "#569CD6"
 
+# Названия состояний фоновых задач в списке задач
+TASK_STATE_NAMES = {"queued": "в очереди", "running": "выполняется", "done": "готово",
+                    "failed": "ошибка", "cancelled": "отменена"}
+
+# Значки состояния проектов в списке: (префикс, цвет строки)
+HEALTH_BADGES = {"missing": ("✖ ", "#F44747"), "no_main_file": ("! ", "#CCA700"), "dirty": ("● ", "#D7BA7D")}
+
+
+class VirtualListbox:
+    """Список строк, в tk.Listbox которого находятся только видимые строки.
+
+    Полный список хранится в items, а прокрутка меняет смещение первой
+    видимой строки и перерисовывает несколько десятков строк, поэтому
+    обновление списка не зависит от числа сайтов. Методы curselection,
+    get, selection_set, nearest работают с индексами полного списка, как у
+    обычного tk.Listbox. decorate(строка) может вернуть (текст, цвет) для
+    отображения строки, например со значком состояния.
+    """
+
+    def __init__(self, parent, decorate=None, **options):
+        self.frame = ttk.Frame(parent)
+        self.listbox = tk.Listbox(self.frame, exportselection=False, **options)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        self.items = []
+        self.offset = 0
+        self.selected = None
+        self.rows = int(options.get("height", 20))
+        self.line_height = font.Font(font=options.get("font")).metrics("linespace") + 1
+        self.on_select = None
+        self.decorate = decorate
+        self.listbox.bind("<Configure>", self.on_configure)
+        self.listbox.bind("<<ListboxSelect>>", self.on_listbox_select)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.listbox.bind(sequence, self.on_mousewheel)
+        for sequence, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "page-up"), ("<Next>", "page-down"),
+                               ("<Home>", "home"), ("<End>", "end")):
+            self.listbox.bind(sequence, lambda event, step=step: self.move_selection(step))
+
+    def pack(self, **options):
+        """Размещает список вместе с полосой прокрутки."""
+        self.frame.pack(**options)
+
+    def bind(self, sequence, callback):
+        """Привязывает обработчик; <<ListboxSelect>> вызывается после пересчета индекса выбранной строки."""
+        if sequence == "<<ListboxSelect>>":
+            self.on_select = callback
+        else:
+            self.listbox.bind(sequence, callback)
+
+    def set_items(self, items):
+        """Заменяет содержимое списка, сохраняя выбранную строку, если она осталась в списке."""
+        selected_item = self.items[self.selected] if self.selected is not None else None
+        self.items = list(items)
+        self.selected = None
+        if selected_item is not None:
+            try:
+                self.selected = self.items.index(selected_item)
+            except ValueError:
+                pass
+        self.render()
+
+    def size(self):
+        """Возвращает число строк в полном списке."""
+        return len(self.items)
+
+    def get(self, index):
+        """Возвращает строку полного списка по индексу."""
+        return self.items[index]
+
+    def curselection(self):
+        """Возвращает кортеж с индексом выбранной строки, как tk.Listbox (пустой, если ничего не выбрано)."""
+        return (self.selected,) if self.selected is not None else ()
+
+    def selection_clear(self, first=0, last=None):
+        """Снимает выбор; аргументы принимаются для совместимости с tk.Listbox."""
+        self.selected = None
+        self.listbox.selection_clear(0, tk.END)
+
+    def selection_set(self, index):
+        """Выбирает строку полного списка и прокручивает к ней."""
+        if 0 <= index < len(self.items):
+            self.selected = index
+            self.see(index)
+
+    def nearest(self, y):
+        """Возвращает индекс строки полного списка, ближайшей к координате y."""
+        return min(self.offset + self.listbox.nearest(y), len(self.items) - 1)
+
+    def see(self, index):
+        """Прокручивает список так, чтобы строка index была видна."""
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.rows:
+            self.offset = index - self.rows + 1
+        self.render()
+
+    def yview(self, *args):
+        """Обработчик полосы прокрутки (moveto / scroll units / scroll pages)."""
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            self.offset += count * (self.rows if args[2] == "pages" else 1)
+        self.render()
+
+    def on_configure(self, event):
+        """Пересчитывает число видимых строк при изменении размера списка."""
+        rows = max(1, event.height // self.line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def on_mousewheel(self, event):
+        """Прокручивает список колесом мыши на три строки."""
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.offset -= 3
+        else:
+            self.offset += 3
+        self.render()
+        return "break"
+
+    def move_selection(self, step):
+        """Перемещает выбор клавишами, прокручивая полный список, а не только видимые строки."""
+        if not self.items:
+            return "break"
+        current = self.selected if self.selected is not None else self.offset - 1
+        if step == "home":
+            index = 0
+        elif step == "end":
+            index = len(self.items) - 1
+        elif step in ("page-up", "page-down"):
+            index = current + (self.rows if step == "page-down" else -self.rows)
+        else:
+            index = current + step
+        self.selection_set(max(0, min(index, len(self.items) - 1)))
+        if self.on_select is not None:
+            self.on_select(None)
+        return "break"
+
+    def on_listbox_select(self, event):
+        """Переводит выбор видимой строки tk.Listbox в индекс полного списка."""
+        selection = self.listbox.curselection()
+        if not selection:
+            return # Выбор пропал при перерисовке строк, а не по действию пользователя
+        index = self.offset + selection[0]
+        if index == self.selected or index >= len(self.items):
+            return
+        self.selected = index
+        if self.on_select is not None:
+            self.on_select(event)
+
+    def render(self):
+        """Перерисовывает видимые строки и полосу прокрутки."""
+        self.offset = max(0, min(self.offset, len(self.items) - self.rows))
+        # Одна лишняя строка заполняет частично видимый низ списка
+        visible = self.items[self.offset:self.offset + self.rows + 1]
+        self.listbox.delete(0, tk.END)
+        if visible and self.decorate is not None:
+            decorated = [self.decorate(item) for item in visible]
+            self.listbox.insert(tk.END, *(text for text, _ in decorated))
+            for row, (_, color) in enumerate(decorated):
+                if color:
+                    self.listbox.itemconfig(row, fg=color)
+        elif visible:
+            self.listbox.insert(tk.END, *visible)
+        if self.selected is not None and self.offset <= self.selected < self.offset + len(visible):
+            self.listbox.selection_set(self.selected - self.offset)
+        if self.items:
+            self.scrollbar.set(self.offset / len(self.items), min(1.0, (self.offset + self.rows) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+
 class WebsiteManagerApp:
     def __init__(self, root):
+        # Время запуска показывается в строке состояния после загрузки списка сайтов
+        self.startup_started = time.perf_counter()
+        self.window_ready_seconds = None
         self.root = root
         self.root.title("Менеджер веб-проектов")
         self.root.geometry("1000x750")
         self.root.configure(bg=BG_COLOR)
         self.root.minsize(800, 600)
         
-        self.websites = {}
-        self.data_file = "websites.json"
-        self.config_file = "config.json"
+        # Данные и логика находятся в ядре, окно только отображает их
+        self.registry = WebsiteRegistry()
+        self.websites = self.registry.websites
+        self.config_file = self.registry.config_file
         self.custom_editor_path = None
-        self.server_process = None
-        self.current_server = None
+        self._server_manager = None
+        self.ignore_patterns = list(DEFAULT_IGNORE_PATTERNS)
+        self.live_reload = False
+
+        # Все долгие операции выполняются фоновыми задачами, результаты приходят в поток Tk
+        self.ui_queue = queue.Queue()
+        self.tasks = TaskScheduler(max_workers=4, deliver=self.call_in_ui, on_change=self.update_tasks_panel)
+
+        # Состояние фонового сканирования структуры папок
+        self.tree_paths = {}
+        self.tree_loading = set()
+        self.tree_project_path = None
+        self.snapshot_save_pending = False
+        self.snapshot_cache = DirectorySnapshotCache(self.registry.data_path("tree_cache.json"))
+
+        # Поиск: отложенный запуск и текущее содержимое listbox
+        self.search_after_id = None
+        self.displayed_names = []
+
+        # Фильтр по тегам: {тег: "include" или "exclude"} и режим для включенных тегов ("all" - И, "any" - ИЛИ)
+        self.tag_filter = {}
+        self.tag_mode = "all"
+
+        # Полнотекстовый индекс содержимого проектов и очередь фоновой индексации
+        self.content_indexer = ContentIndexer(self.registry.data_path("content_index.db"))
+        self.content_index_queue = queue.Queue()
+        self.content_index_task = None
+
+        # Статистика занимаемого места по проектам
+        self.stats_cache = ProjectStatsCache(self.registry.data_path("stats_cache.json"))
+        self.project_stats = {}
+        self.size_keys = {}
+        self.stats_task = None
+        self.stats_refresh_pending = set()
+        self.sort_modes = ["По добавлению", "По имени", "По дате", "По размеру"]
+
+        # Поиск дубликатов: кэш хэшей загружается фоновой задачей при первом поиске
+        self.hash_cache = FileHashCache(self.registry.data_path("hash_cache.json"))
+        self.hash_cache_loaded = False
+        self.duplicates_task = None
+
+        # Задачи сборки по названиям сайтов
+        self.build_tasks = {}
+
+        # Состояние проектов (папка, основной файл, git): кэш с отметками времени и периодическая проверка
+        self.health_cache = ProjectHealthCache(self.registry.data_path("health_cache.json"))
+        self.health_task = None
+        self.health_refresh_pending = set()
+        self.health_after_id = None
         
-        self.load_websites()
+        # Окно показывается сразу, реестр и кэши читаются фоновой задачей
+        self.registry_loaded = False
         self.load_config()
 
         self.create_styles()
         self.create_widgets()
-        self.filter_list_by_search()
+        self.process_ui_queue()
+        self.load_websites()
+        self.root.after_idle(self.on_window_ready)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Создание контекстного меню
         self.context_menu = tk.Menu(self.root, tearoff=0)
@@ -55,6 +290,14 @@ class WebsiteManagerApp:
         
         self.website_listbox.bind("<Button-3>", self.show_context_menu)
         
+    @property
+    def server_manager(self):
+        """Менеджер серверов проектов; модуль сервера импортируется при первом обращении."""
+        if self._server_manager is None:
+            from website_server import ServerManager
+            self._server_manager = ServerManager()
+        return self._server_manager
+
     def create_styles(self):
         """Создает и настраивает стили для ttk виджетов."""
         style = ttk.Style()
@@ -85,6 +328,17 @@ class WebsiteManagerApp:
                         foreground=FG_COLOR,
                         font=("Segoe UI", 10))
 
+        # Стиль для дерева структуры папок
+        style.configure("Treeview",
+                        background=LISTBOX_BG,
+                        fieldbackground=LISTBOX_BG,
+                        foreground=LISTBOX_FG,
+                        font=("Consolas", 10),
+                        borderwidth=0)
+        style.map("Treeview",
+                  background=[('selected', ACCENT_COLOR)],
+                  foreground=[('selected', BUTTON_FG)])
+
     def create_widgets(self):
         """Создает все элементы графического интерфейса."""
         # --- Главный фрейм для разделения на левую и правую части ---
@@ -102,6 +356,9 @@ class WebsiteManagerApp:
         btn_add = ttk.Button(button_frame, text="Добавить сайт", command=self.add_website)
         btn_add.pack(side=tk.LEFT, padx=(0, 5), fill=tk.X, expand=1)
 
+        btn_import = ttk.Button(button_frame, text="Импорт папки", command=self.import_projects)
+        btn_import.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=1)
+
         btn_editor = ttk.Button(button_frame, text="Выбрать редактор", command=self.select_custom_editor)
         btn_editor.pack(side=tk.LEFT, padx=(5, 0), fill=tk.X, expand=1)
 
@@ -114,28 +371,58 @@ class WebsiteManagerApp:
         
         self.search_entry = ttk.Entry(search_frame)
         self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=1)
-        self.search_entry.bind("<KeyRelease>", lambda event: self.filter_list_by_search())
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+
+        # Поиск по содержимому файлов проектов
+        content_search_frame = ttk.Frame(left_panel)
+        content_search_frame.pack(fill=tk.X, pady=(0, 10))
+
+        content_search_label = ttk.Label(content_search_frame, text="В файлах:")
+        content_search_label.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.content_search_entry = ttk.Entry(content_search_frame)
+        self.content_search_entry.pack(side=tk.LEFT, fill=tk.X, expand=1)
+        self.content_search_entry.bind("<Return>", self.search_content)
 
         # Фрейм для меток и поля фильтрации по тегам
         filter_frame = ttk.Frame(left_panel)
         filter_frame.pack(fill=tk.X, pady=(0, 10))
         
-        self.tags = self.get_all_tags()
+        # Пункты меню (теги с числом сайтов) заполняются в filter_menu_update
         self.filter_var = tk.StringVar()
         self.filter_var.set("Все теги")
         
-        self.filter_menu = tk.OptionMenu(filter_frame, self.filter_var, *self.tags, command=self.filter_list_by_tag)
+        self.filter_menu = tk.OptionMenu(filter_frame, self.filter_var, "Все теги")
         self.filter_menu.config(bg=BUTTON_BG, fg=BUTTON_FG, activebackground=ACCENT_COLOR, activeforeground=BUTTON_FG)
         self.filter_menu["menu"].config(bg=BUTTON_BG, fg=BUTTON_FG)
         self.filter_menu.pack(fill=tk.X, expand=1)
 
-        # Список сайтов
-        self.website_listbox = tk.Listbox(left_panel, selectmode=tk.SINGLE,
-                                          bg=LISTBOX_BG, fg=LISTBOX_FG,
-                                          selectbackground=ACCENT_COLOR,
-                                          font=("Segoe UI", 11),
-                                          bd=0, highlightthickness=0,
-                                          height=20)
+        # Сортировка списка и анализ занимаемого места
+        sort_frame = ttk.Frame(left_panel)
+        sort_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.sort_var = tk.StringVar(value=self.sort_modes[0])
+        sort_menu = tk.OptionMenu(sort_frame, self.sort_var, *self.sort_modes, command=lambda mode: self.filter_list_by_search())
+        sort_menu.config(bg=BUTTON_BG, fg=BUTTON_FG, activebackground=ACCENT_COLOR, activeforeground=BUTTON_FG)
+        sort_menu["menu"].config(bg=BUTTON_BG, fg=BUTTON_FG)
+        sort_menu.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=(0, 5))
+
+        btn_stats = ttk.Button(sort_frame, text="Анализ размеров", command=lambda: self.refresh_project_stats(force=True))
+        btn_stats.pack(side=tk.LEFT, padx=5)
+
+        btn_duplicates = ttk.Button(sort_frame, text="Дубликаты", command=self.find_duplicate_files)
+        btn_duplicates.pack(side=tk.LEFT, padx=5)
+
+        btn_health = ttk.Button(sort_frame, text="Проверка", command=lambda: self.refresh_health(force=True))
+        btn_health.pack(side=tk.LEFT, padx=(5, 0))
+
+        # Список сайтов (отрисовываются только видимые строки)
+        self.website_listbox = VirtualListbox(left_panel, decorate=self.decorate_site, selectmode=tk.SINGLE,
+                                              bg=LISTBOX_BG, fg=LISTBOX_FG,
+                                              selectbackground=ACCENT_COLOR,
+                                              font=("Segoe UI", 11),
+                                              bd=0, highlightthickness=0,
+                                              height=20)
         self.website_listbox.pack(fill=tk.BOTH, expand=1)
         self.website_listbox.bind("<<ListboxSelect>>", self.on_listbox_select)
 
@@ -174,13 +461,14 @@ class WebsiteManagerApp:
 
         tree_label = ttk.Label(tree_panel, text="Структура папок:", font=("Segoe UI", 12))
         tree_label.pack(anchor=tk.W, pady=(0, 5))
-        self.tree_text = scrolledtext.ScrolledText(tree_panel, wrap=tk.WORD,
-                                                   bg=LISTBOX_BG, fg=LISTBOX_FG,
-                                                   font=("Consolas", 10),
-                                                   bd=0, relief="flat",
-                                                   insertbackground=ACCENT_COLOR)
-        self.tree_text.pack(fill=tk.BOTH, expand=1)
-        self.tree_text.bind("<KeyPress>", lambda e: "break") # Запрет редактирования
+        tree_container = ttk.Frame(tree_panel)
+        tree_container.pack(fill=tk.BOTH, expand=1)
+        self.directory_tree = ttk.Treeview(tree_container, show="tree", selectmode="browse")
+        tree_scrollbar = ttk.Scrollbar(tree_container, orient=tk.VERTICAL, command=self.directory_tree.yview)
+        self.directory_tree.configure(yscrollcommand=tree_scrollbar.set)
+        tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.directory_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        self.directory_tree.bind("<<TreeviewOpen>>", self.on_tree_open)
 
 
         # Фрейм для кнопок действий
@@ -200,7 +488,75 @@ class WebsiteManagerApp:
         btn_start_server.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=5)
 
         btn_stop_server = ttk.Button(action_button_frame, text="Остановить сервер", command=self.stop_server)
-        btn_stop_server.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=(5, 0))
+        btn_stop_server.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=5)
+
+        btn_build = ttk.Button(action_button_frame, text="Собрать", command=self.build_website)
+        btn_build.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=5)
+
+        btn_check_links = ttk.Button(action_button_frame, text="Проверить ссылки", command=self.check_links)
+        btn_check_links.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=(5, 0))
+
+        self.live_reload_var = tk.BooleanVar(value=self.live_reload)
+        live_reload_check = tk.Checkbutton(right_panel, text="Автообновление страниц при изменении файлов",
+                                           variable=self.live_reload_var, command=self.toggle_live_reload,
+                                           bg=BG_COLOR, fg=FG_COLOR, selectcolor=LISTBOX_BG,
+                                           activebackground=BG_COLOR, activeforeground=FG_COLOR)
+        live_reload_check.pack(anchor=tk.W, pady=(5, 0))
+
+        # Панель запущенных серверов
+        servers_frame = ttk.Frame(right_panel)
+        servers_frame.pack(fill=tk.X, pady=(10, 0))
+
+        servers_label = ttk.Label(servers_frame, text="Запущенные серверы:", font=("Segoe UI", 12))
+        servers_label.pack(anchor=tk.W, pady=(0, 5))
+
+        self.servers_tree = ttk.Treeview(servers_frame, columns=("site", "url", "path", "started"),
+                                         show="headings", height=4, selectmode="browse")
+        self.servers_tree.heading("site", text="Сайт")
+        self.servers_tree.heading("url", text="Адрес")
+        self.servers_tree.heading("path", text="Папка")
+        self.servers_tree.heading("started", text="Запущен")
+        self.servers_tree.column("url", width=180, stretch=False)
+        self.servers_tree.column("started", width=80, stretch=False)
+        self.servers_tree.pack(fill=tk.X)
+        self.servers_tree.bind("<Double-1>", lambda e: self.open_selected_server())
+
+        servers_button_frame = ttk.Frame(servers_frame)
+        servers_button_frame.pack(fill=tk.X, pady=(5, 0))
+
+        btn_gateway = ttk.Button(servers_button_frame, text="Все сайты на одном порту", command=self.start_gateway)
+        btn_gateway.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=(0, 5))
+
+        btn_open_server = ttk.Button(servers_button_frame, text="Открыть", command=self.open_selected_server)
+        btn_open_server.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=5)
+
+        btn_stop_selected_server = ttk.Button(servers_button_frame, text="Остановить выбранный",
+                                              command=self.stop_selected_server)
+        btn_stop_selected_server.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=5)
+
+        btn_server_metrics = ttk.Button(servers_button_frame, text="Статистика", command=self.show_server_metrics)
+        btn_server_metrics.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=5)
+
+        btn_stop_all_servers = ttk.Button(servers_button_frame, text="Остановить все", command=self.stop_all_servers)
+        btn_stop_all_servers.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=(5, 0))
+
+        # Панель фоновых задач
+        tasks_frame = ttk.Frame(right_panel)
+        tasks_frame.pack(fill=tk.X, pady=(10, 0))
+
+        tasks_label = ttk.Label(tasks_frame, text="Фоновые задачи:", font=("Segoe UI", 12))
+        tasks_label.pack(anchor=tk.W, pady=(0, 5))
+
+        self.tasks_tree = ttk.Treeview(tasks_frame, columns=("task", "state", "progress"),
+                                       show="headings", height=4, selectmode="browse")
+        self.tasks_tree.heading("task", text="Задача")
+        self.tasks_tree.heading("state", text="Состояние")
+        self.tasks_tree.heading("progress", text="Прогресс")
+        self.tasks_tree.column("state", width=100, stretch=False)
+        self.tasks_tree.pack(fill=tk.X)
+
+        btn_cancel_task = ttk.Button(tasks_frame, text="Отменить задачу", command=self.cancel_selected_task)
+        btn_cancel_task.pack(fill=tk.X, pady=(5, 0))
 
         # --- Строка состояния ---
         self.status_bar = tk.Label(self.root, text="Готово", bd=1, relief=tk.SUNKEN, anchor=tk.W,
@@ -209,6 +565,8 @@ class WebsiteManagerApp:
 
     def show_context_menu(self, event):
         """Отображает контекстное меню по клику правой кнопкой мыши."""
+        if not self.website_listbox.size():
+            return
         try:
             self.website_listbox.selection_clear(0, tk.END)
             self.website_listbox.selection_set(self.website_listbox.nearest(event.y))
@@ -219,9 +577,14 @@ class WebsiteManagerApp:
 
     def update_listbox(self):
         """Обновляет список сайтов в listbox."""
-        self.website_listbox.delete(0, tk.END)
-        for name in self.websites:
-            self.website_listbox.insert(tk.END, name)
+        self.set_listbox_names(self.sort_names(list(self.websites)))
+
+    def set_listbox_names(self, names):
+        """Показывает в списке names; виртуальный список перерисовывает только видимые строки."""
+        if self.displayed_names == names:
+            return
+        self.displayed_names = list(names)
+        self.website_listbox.set_items(self.displayed_names)
 
     def on_listbox_select(self, event):
         """Обработчик события выбора элемента в listbox."""
@@ -246,38 +609,420 @@ class WebsiteManagerApp:
             info += f"Путь: {site_data.get('path', 'Не указан')}\n"
             info += f"Основной файл: {site_data.get('main_file', 'Не указан')}\n"
             info += f"Дата добавления: {site_data.get('added_date', 'Неизвестно')}\n"
+            health = self.health_cache.get(site_data.get("name"))
+            if health:
+                info += f"Состояние: {self.describe_health(health)}\n"
             info += f"Теги: {', '.join(site_data.get('tags', []))}\n\n"
             info += f"Описание: {site_data.get('description', 'Описание отсутствует.')}"
+            stats = self.project_stats.get(site_data.get("name"))
+            if stats:
+                info += self.format_project_stats(stats)
             self.info_text.insert(tk.END, info)
         else:
             self.info_text.insert(tk.END, "Информация о выбранном сайте появится здесь.")
 
         self.info_text.configure(state=tk.DISABLED)
 
+    def decorate_site(self, name):
+        """Возвращает строку списка со значком состояния проекта и ее цвет."""
+        health = self.health_cache.get(name)
+        badge, color = HEALTH_BADGES.get(health["status"], ("", None)) if health else ("", None)
+        return badge + name, color
+
+    def describe_health(self, health):
+        """Формирует текст о состоянии проекта для панели информации."""
+        if not health["path_exists"]:
+            parts = ["папка не найдена"]
+        elif not health["main_file_exists"]:
+            parts = ["основной файл не найден"]
+        else:
+            parts = ["в порядке"]
+        if health["git"] == "dirty":
+            parts.append("git: есть незакоммиченные изменения")
+        elif health["git"] == "clean":
+            parts.append("git: без изменений")
+        if health["mtime"] is not None:
+            parts.append("изменен " + time.strftime("%Y-%m-%d %H:%M", time.localtime(health["mtime"])))
+        parts.append("проверено " + time.strftime("%H:%M:%S", time.localtime(health["checked"])))
+        return ", ".join(parts)
+
+    def refresh_health(self, names=None, force=False):
+        """Проверяет состояние проектов в фоне (при force - всех, иначе устаревших).
+
+        Без names проверяются все сайты и планируется следующая периодическая
+        проверка. Сайты, запрошенные во время идущей проверки, проверяются
+        сразу после нее.
+        """
+        if names is None:
+            if self.health_after_id is not None:
+                self.root.after_cancel(self.health_after_id)
+            self.health_after_id = self.root.after(HEALTH_MAX_AGE * 1000, self.refresh_health)
+        if self.health_task is not None and self.health_task.pending:
+            if not force:
+                self.health_refresh_pending.update(names or self.websites)
+                return
+            self.tasks.cancel(self.health_task)
+        websites = {name: dict(self.websites[name]) for name in (names or list(self.websites))
+                    if name in self.websites}
+
+        def worker(task):
+            results = self.health_cache.check_many(websites, 0 if force else HEALTH_MAX_AGE,
+                                                   cancel_event=task.cancel_event,
+                                                   progress=lambda done, total: task.set_progress(done, total),
+                                                   prune=names is None)
+            self.health_cache.save()
+            return results
+
+        self.health_task = self.tasks.submit("Проверка состояния проектов", worker, priority=PRIORITY_LOW,
+                                             on_done=self.on_health_checked,
+                                             on_error=lambda error: self.on_health_checked({}))
+
+    def on_health_checked(self, results):
+        """Обновляет значки в списке и информацию о выбранном проекте."""
+        self.website_listbox.render()
+        selected_name = self.get_selected_name()
+        if selected_name in results:
+            self.display_website_info(self.websites.get(selected_name, {}))
+        if results:
+            problems = sum(1 for health in results.values() if health["status"] in ("missing", "no_main_file"))
+            self.status_bar.config(text=f"Проверено проектов: {len(results)}, с ошибками: {problems}")
+        # Сайты, добавленные или измененные во время проверки
+        pending = [name for name in self.health_refresh_pending if name in self.websites]
+        self.health_refresh_pending = set()
+        if pending:
+            self.refresh_health(pending)
+
+    def format_project_stats(self, stats):
+        """Формирует текст со статистикой занимаемого места."""
+        info = f"\n\nРазмер: {format_size(stats['total_size'])}, файлов: {stats['file_count']}, папок: {stats['dir_count']}\n"
+        info += "\nПо типам файлов:\n"
+        for item in stats["extensions"][:10]:
+            info += f"    {item['ext']}: {item['count']} шт., {format_size(item['size'])}\n"
+        info += "\nСамые крупные файлы:\n"
+        for item in stats["largest_files"]:
+            info += f"    {format_size(item['size'])}  {item['path']}\n"
+        return info
+
+    def refresh_project_stats(self, names=None, force=False):
+        """Пересчитывает размеры проектов в фоне (только изменившиеся каталоги, если не force)."""
+        if self.stats_task is not None and self.stats_task.pending:
+            # Повторный запуск после завершения текущего анализа
+            self.stats_refresh_pending.update(names or self.websites)
+            return
+        projects = {name: self.websites[name].get("path", "") for name in (names or list(self.websites))}
+        ignore_patterns = list(self.ignore_patterns)
+        self.status_bar.config(text=f"Анализ размеров: {len(projects)} проектов...")
+
+        def worker(task):
+            finished = []
+
+            def on_stats(name, stats):
+                finished.append(name)
+                task.set_progress(len(finished), len(projects))
+                self.call_in_ui(self.on_project_stats, name, stats)
+
+            self.stats_cache.refresh_many(projects, ignore_patterns, force=force, callback=on_stats,
+                                          cancel_event=task.cancel_event)
+            self.stats_cache.save()
+
+        self.stats_task = self.tasks.submit("Анализ размеров", worker, priority=PRIORITY_LOW,
+                                            on_done=lambda result: self.on_project_stats_finished(),
+                                            on_error=lambda error: self.on_project_stats_finished())
+
+    def on_project_stats(self, name, stats):
+        """Принимает статистику одного проекта (в главном потоке Tk)."""
+        if stats is None:
+            self.project_stats.pop(name, None)
+            self.size_keys.pop(name, None)
+        else:
+            self.project_stats[name] = stats
+            self.size_keys[name] = stats["total_size"]
+        if name == self.get_selected_name():
+            self.display_website_info(self.websites.get(name, {}))
+        if self.sort_var.get() == "По размеру":
+            self.schedule_search()
+
+    def on_project_stats_finished(self):
+        """Завершает фоновый анализ размеров."""
+        total = sum(stats["total_size"] for stats in self.project_stats.values())
+        self.status_bar.config(text=f"Анализ размеров завершен: всего {format_size(total)}")
+        pending = [name for name in self.stats_refresh_pending if name in self.websites]
+        self.stats_refresh_pending = set()
+        if pending:
+            self.refresh_project_stats(pending)
+
+    def find_duplicate_files(self):
+        """Ищет одинаковые файлы во всех проектах фоновой задачей."""
+        if self.duplicates_task is not None and self.duplicates_task.pending:
+            return
+        projects = {name: site_data.get("path", "") for name, site_data in self.websites.items()}
+        ignore_patterns = list(self.ignore_patterns)
+        stage_names = {"scan": "обход файлов", "partial": "сравнение начала файлов", "full": "полное сравнение"}
+
+        def worker(task):
+            def progress(stage):
+                task.set_progress(message=stage_names[stage])
+                self.call_in_ui(self.status_bar.config, {"text": f"Поиск дубликатов: {stage_names[stage]}..."})
+
+            if not self.hash_cache_loaded:
+                self.hash_cache.load()
+                self.hash_cache_loaded = True
+            groups = find_duplicates(projects, self.hash_cache, ignore_patterns, progress=progress,
+                                     cancel_event=task.cancel_event)
+            self.hash_cache.save()
+            return groups
+
+        self.duplicates_task = self.tasks.submit("Поиск дубликатов", worker, on_done=self.display_duplicates,
+                                                 on_error=self.show_task_error)
+
+    def display_duplicates(self, groups, limit=100):
+        """Показывает группы одинаковых файлов и потерянное на них место."""
+        self.title_label.config(text="Дубликаты файлов")
+        self.info_text.configure(state=tk.NORMAL)
+        self.info_text.delete("1.0", tk.END)
+
+        if groups:
+            wasted = sum(group["wasted"] for group in groups)
+            info = f"Групп одинаковых файлов: {len(groups)}, лишнее место: {format_size(wasted)}\n\n"
+            for group in groups[:limit]:
+                info += f"{format_size(group['wasted'])} лишних ({len(group['files'])} x {format_size(group['size'])}):\n"
+                for item in group["files"]:
+                    info += f"    {item['site']}: {item['path']}\n"
+                info += "\n"
+            if len(groups) > limit:
+                info += f"... и еще {len(groups) - limit} групп"
+        else:
+            info = "Одинаковых файлов не найдено."
+        self.info_text.insert(tk.END, info)
+        self.info_text.configure(state=tk.DISABLED)
+        self.status_bar.config(text=f"Поиск дубликатов: найдено групп {len(groups)}")
+
+    def get_selected_name(self):
+        """Возвращает имя выбранного в списке сайта или None."""
+        selection = self.website_listbox.curselection()
+        return self.website_listbox.get(selection[0]) if selection else None
+
+    def sort_names(self, names):
+        """Упорядочивает имена сайтов согласно выбранной сортировке по заранее вычисленным ключам."""
+        mode = self.sort_var.get()
+        search_index = self.registry.search_index
+        if mode == "По имени":
+            return sorted(names, key=search_index.name_keys.__getitem__)
+        if mode == "По дате":
+            return sorted(names, key=search_index.date_keys.__getitem__, reverse=True)
+        if mode == "По размеру":
+            sizes = self.size_keys
+            return sorted(names, key=lambda name: sizes.get(name, -1), reverse=True)
+        return names
+
     def display_directory_tree(self, path):
-        """Отображает структуру папок и файлов проекта."""
-        self.tree_text.configure(state=tk.NORMAL)
-        self.tree_text.delete("1.0", tk.END)
-        
-        if not path or not os.path.exists(path):
-            self.tree_text.insert(tk.END, "Структура не найдена.")
-            self.tree_text.configure(state=tk.DISABLED)
+        """Отображает структуру папок и файлов проекта.
+
+        Содержимое читается по одному уровню в фоновом потоке; вложенные папки
+        сканируются только при их раскрытии. Незавершенное сканирование
+        предыдущего проекта отменяется.
+        """
+        self.tasks.cancel_group("tree")
+        self.tree_paths = {}
+        self.tree_loading = set()
+        self.tree_project_path = path
+        self.directory_tree.delete(*self.directory_tree.get_children())
+
+        if not path or not os.path.isdir(path):
+            self.directory_tree.insert("", tk.END, text="Структура не найдена.")
+            return
+
+        root_name = os.path.basename(os.path.normpath(path)) or path
+        root_node = self.directory_tree.insert("", tk.END, text=f"[{root_name}/]", open=True)
+        self.tree_paths[root_node] = path
+        self.directory_tree.insert(root_node, tk.END, text="Загрузка...", tags=("placeholder",))
+        self.load_tree_level(root_node)
+
+    def load_tree_level(self, node):
+        """Показывает уровень папки для узла дерева.
+
+        Если уровень есть в кэше, он отображается сразу, а в фоне проверяется
+        только mtime каталога; перечитывается лишь изменившийся каталог.
+        """
+        if node in self.tree_loading:
+            return
+        self.tree_loading.add(node)
+
+        path = self.tree_paths[node]
+        project_path = self.tree_project_path
+        ignore_patterns = list(self.ignore_patterns)
+
+        cached = self.snapshot_cache.get_level(project_path, path, ignore_patterns)
+        if cached is not None:
+            self.populate_tree_node(node, cached["dirs"], cached["files"])
+            cached_mtime = cached["mtime"]
+        else:
+            cached_mtime = None
+            for child in self.directory_tree.get_children(node):
+                self.directory_tree.item(child, text="Загрузка...")
+
+        def worker(task):
+            try:
+                mtime = os.stat(path).st_mtime
+                if mtime == cached_mtime:
+                    return None # Каталог не изменился с прошлого просмотра
+                result = scan_directory_level(path, ignore_patterns, task.cancel_event)
+                error = None
+            except OSError as e:
+                mtime, result, error = None, ([], []), e
+            task.check_cancelled()
+            return mtime, result, error
+
+        # Уровни дерева - короткие задачи, которые пользователь ждет, поэтому без места в списке задач
+        self.tasks.submit(f"Чтение папки {path}", worker, priority=PRIORITY_HIGH, group="tree", track=False,
+                          on_done=lambda result: self.on_tree_level(project_path, node, result))
+
+    def on_tree_level(self, project_path, node, result):
+        """Переносит результат фонового сканирования в дерево (в главном потоке Tk)."""
+        if result is None:
+            self.tree_loading.discard(node)
+            return
+        # Результаты сканирования другого проекта отбрасываются
+        if project_path != self.tree_project_path or node not in self.tree_paths:
+            return
+        if not self.directory_tree.exists(node):
+            return
+        mtime, (dirs, files), error = result
+        if error is None:
+            self.snapshot_cache.set_level(project_path, self.tree_paths[node], mtime, dirs, files, self.ignore_patterns)
+            self.schedule_snapshot_save()
+        self.populate_tree_node(node, dirs, files, error)
+
+    def populate_tree_node(self, node, dirs, files, error=None):
+        """Заполняет узел дерева прочитанными папками и файлами."""
+        self.tree_loading.discard(node)
+        self.directory_tree.delete(*self.directory_tree.get_children(node))
+        if error is not None:
+            self.directory_tree.insert(node, tk.END, text=f"Ошибка чтения: {error.strerror or error}")
+            return
+
+        parent_path = self.tree_paths[node]
+        for dir_name in dirs:
+            child = self.directory_tree.insert(node, tk.END, text=f"[{dir_name}/]")
+            self.tree_paths[child] = os.path.join(parent_path, dir_name)
+            # Заглушка, чтобы папку можно было раскрыть до ее сканирования
+            self.directory_tree.insert(child, tk.END, text="...", tags=("placeholder",))
+        for file_name in files:
+            self.directory_tree.insert(node, tk.END, text=file_name)
+
+    def schedule_snapshot_save(self):
+        """Откладывает сохранение кэша структуры, чтобы объединить частые изменения."""
+        if self.snapshot_save_pending:
+            return
+        self.snapshot_save_pending = True
+
+        def save():
+            self.snapshot_save_pending = False
+            self.tasks.submit("Сохранение кэша структуры", lambda task: self.snapshot_cache.save(),
+                              priority=PRIORITY_LOW, lane="snapshot", cancellable=False, track=False)
+
+        self.root.after(2000, save)
+
+    def on_tree_open(self, event):
+        """Сканирует папку при первом раскрытии узла дерева."""
+        node = self.directory_tree.focus()
+        if node not in self.tree_paths:
             return
+        children = self.directory_tree.get_children(node)
+        if len(children) == 1 and "placeholder" in self.directory_tree.item(children[0], "tags"):
+            self.load_tree_level(node)
 
-        tree_str = ""
-        for root_path, dirs, files in os.walk(path):
-            level = root_path.replace(path, '').count(os.sep)
-            indent = ' ' * 4 * level
-            tree_str += f"{indent}[{os.path.basename(root_path)}/]\n"
-            subindent = ' ' * 4 * (level + 1)
-            for f in files:
-                tree_str += f"{subindent}{f}\n"
+    def call_in_ui(self, callback, *args):
+        """Передает вызов из фонового потока в главный поток Tk."""
+        self.ui_queue.put((callback, args))
 
-        self.tree_text.insert(tk.END, tree_str)
-        self.tree_text.configure(state=tk.DISABLED)
+    def process_ui_queue(self):
+        """Выполняет вызовы, переданные фоновыми потоками."""
+        try:
+            while True:
+                callback, args = self.ui_queue.get_nowait()
+                callback(*args)
+        except queue.Empty:
+            pass
+        self.root.after(50, self.process_ui_queue)
+
+    def request_content_indexing(self, names):
+        """Ставит сайты в очередь фоновой индексации содержимого."""
+        for name in names:
+            site_data = self.websites.get(name)
+            if site_data:
+                self.content_index_queue.put(("index", name, site_data.get("path", "")))
+        self.start_content_indexing()
+
+    def start_content_indexing(self):
+        """Запускает задачу индексации, если она еще не разбирает очередь."""
+        if self.content_index_task is not None and self.content_index_task.pending:
+            return
+        self.content_index_task = self.tasks.submit("Индексация содержимого", self.index_content,
+                                                    priority=PRIORITY_LOW, lane="content-index",
+                                                    on_done=self.on_content_indexed)
+
+    def index_content(self, task):
+        """Фоновая задача: по очереди индексирует или удаляет сайты из индекса содержимого."""
+        while not task.cancelled:
+            try:
+                action, name, path = self.content_index_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if action == "remove":
+                    self.content_indexer.remove_site(name)
+                elif os.path.isdir(path):
+                    task.set_progress(message=name)
+                    self.call_in_ui(self.status_bar.config, {"text": f"Индексация содержимого: {name}..."})
+                    self.content_indexer.index_site(name, path, list(self.ignore_patterns), task.cancel_event)
+            except sqlite3.Error:
+                pass
+
+    def on_content_indexed(self, result):
+        """Завершает индексацию; сайты, добавленные в очередь в последний момент, индексируются новой задачей."""
+        if self.content_index_queue.empty():
+            self.status_bar.config(text="Готово")
+        else:
+            self.start_content_indexing()
+
+    def search_content(self, event=None):
+        """Запускает поиск строки в содержимом файлов всех проектов (предыдущий поиск отменяется)."""
+        query = self.content_search_entry.get().strip()
+        if not query:
+            return
+        self.status_bar.config(text=f"Поиск в файлах: {query}...")
+        self.tasks.cancel_group("content-search")
+        self.tasks.submit(f"Поиск в файлах: {query}", lambda task: self.content_indexer.search(query),
+                          priority=PRIORITY_HIGH, group="content-search",
+                          on_done=lambda results: self.display_content_results(query, results),
+                          on_error=self.show_task_error)
+
+    def display_content_results(self, query, results):
+        """Показывает найденные файлы и строки в панели информации."""
+        self.title_label.config(text="Поиск в файлах")
+        self.info_text.configure(state=tk.NORMAL)
+        self.info_text.delete("1.0", tk.END)
+
+        if results:
+            info = f"Запрос: {query}\nНайдено файлов: {len(results)}\n\n"
+            for result in results:
+                info += f"{result['site']}: {result['path']}\n"
+                for line_no, line in result["lines"]:
+                    info += f"    {line_no}: {line}\n"
+                if not result["lines"]:
+                    info += "    (совпадение по словам)\n"
+                info += "\n"
+        else:
+            info = f"По запросу '{query}' ничего не найдено."
+        self.info_text.insert(tk.END, info)
+        self.info_text.configure(state=tk.DISABLED)
+        self.status_bar.config(text=f"Поиск в файлах: найдено {len(results)}")
 
     def add_website(self):
         """Добавляет новый сайт в список."""
+        if not self.require_registry():
+            return
         folder_path = filedialog.askdirectory(title="Выберите папку с проектом")
         if not folder_path:
             return
@@ -303,24 +1048,65 @@ class WebsiteManagerApp:
 
         # Добавление тегов
         tags_str = simpledialog.askstring("Теги", "Введите теги через запятую (например: html, css, js):")
-        tags = [tag.strip() for tag in tags_str.split(',')] if tags_str else []
+        tags = parse_tags(tags_str)
 
         # Создание объекта с данными о сайте
-        website_data = {
-            "name": name,
-            "path": folder_path,
-            "main_file": os.path.relpath(main_file, folder_path),
-            "description": description,
-            "tags": tags,
-            "added_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        website_data = make_site_data(folder_path, main_file, description, tags, name=name)
         
         self.websites[name] = website_data
-        self.save_websites()
-        self.update_listbox()
-        self.filter_menu_update()
+        self.save_websites([name])
+        self.request_content_indexing([name])
+        self.refresh_project_stats([name])
+        self.refresh_health([name])
+        self.filter_list_by_search()
         messagebox.showinfo("Успех", f"Сайт '{name}' успешно добавлен.")
         
+    def import_projects(self):
+        """Ищет веб-проекты в выбранной папке (в фоне) и предлагает их добавить."""
+        if not self.require_registry():
+            return
+        root_path = filedialog.askdirectory(title="Выберите папку с проектами")
+        if not root_path:
+            return
+        ignore_patterns = list(self.ignore_patterns)
+        self.status_bar.config(text=f"Поиск проектов в {root_path}...")
+
+        def worker(task):
+            try:
+                sites = discover_projects(root_path, ignore_patterns, cancel_event=task.cancel_event)
+            except OSError:
+                sites = []
+            task.check_cancelled()
+            return sites
+
+        self.tasks.submit(f"Поиск проектов в {root_path}", worker,
+                          on_done=lambda sites: self.finish_import_projects(root_path, sites),
+                          on_error=self.show_task_error)
+
+    def finish_import_projects(self, root_path, sites):
+        """Добавляет найденные проекты одной транзакцией и один раз обновляет список."""
+        registered = {os.path.normcase(os.path.abspath(site_data.get("path", ""))) for site_data in self.websites.values()}
+        new_sites = [site_data for site_data in sites
+                     if os.path.normcase(os.path.abspath(site_data["path"])) not in registered]
+        self.status_bar.config(text="Готово")
+        if not new_sites:
+            messagebox.showinfo("Импорт", f"В папке '{root_path}' не найдено новых проектов.")
+            return
+        preview = "\n".join(f"{site_data['name']} ({site_data['main_file']})" for site_data in new_sites[:15])
+        if len(new_sites) > 15:
+            preview += f"\n... и еще {len(new_sites) - 15}"
+        if not messagebox.askyesno("Импорт", f"Найдено новых проектов: {len(new_sites)}\n\n{preview}\n\nДобавить их?"):
+            return
+
+        names = self.registry.add_many(new_sites, persist=False)
+        self.store_records(names)
+        self.update_gateway_routes()
+        self.request_content_indexing(names)
+        self.refresh_project_stats(names)
+        self.refresh_health(names)
+        self.filter_list_by_search()
+        self.status_bar.config(text=f"Добавлено проектов: {len(names)}")
+
     def edit_website_info(self):
         """Редактирует информацию о выбранном сайте."""
         try:
@@ -345,11 +1131,11 @@ class WebsiteManagerApp:
                 initialvalue=current_tags_str
             )
             if new_tags_str is not None:
-                current_data['tags'] = [tag.strip() for tag in new_tags_str.split(',')] if new_tags_str else []
+                current_data['tags'] = parse_tags(new_tags_str)
 
-            self.save_websites()
+            self.save_websites([selected_name])
             self.display_website_info(current_data)
-            self.filter_menu_update()
+            self.filter_list_by_search()
 
         except IndexError:
             messagebox.showwarning("Предупреждение", "Выберите сайт из списка для редактирования.")
@@ -360,88 +1146,192 @@ class WebsiteManagerApp:
             selected_index = self.website_listbox.curselection()[0]
             selected_name = self.website_listbox.get(selected_index)
             if messagebox.askyesno("Удалить сайт", f"Вы уверены, что хотите удалить сайт '{selected_name}'?"):
-                del self.websites[selected_name]
-                self.save_websites()
-                self.update_listbox()
+                removed_site = self.delete_website_record(selected_name)
+                self.content_index_queue.put(("remove", selected_name, None))
+                self.start_content_indexing()
+                self.snapshot_cache.remove_project(removed_site.get("path", ""))
+                self.stats_cache.remove_project(removed_site.get("path", ""))
+                self.project_stats.pop(selected_name, None)
+                self.size_keys.pop(selected_name, None)
+                self.health_cache.remove(selected_name)
+                self.schedule_snapshot_save()
                 self.filter_list_by_search()
-                self.filter_menu_update()
                 self.display_website_info({})
                 messagebox.showinfo("Успех", f"Сайт '{selected_name}' успешно удален.")
         except IndexError:
             messagebox.showwarning("Предупреждение", "Выберите сайт из списка.")
 
     def load_websites(self):
-        """Загружает данные о сайтах из файла."""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, "r") as f:
-                    self.websites = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                self.websites = {}
-                messagebox.showerror("Ошибка загрузки", "Не удалось загрузить данные о сайтах. Файл поврежден или не найден.")
-
-    def save_websites(self):
-        """Сохраняет данные о сайтах в файл."""
-        try:
-            with open(self.data_file, "w") as f:
-                json.dump(self.websites, f, indent=4)
-        except IOError:
-            messagebox.showerror("Ошибка сохранения", "Не удалось сохранить данные о сайтах.")
+        """Загружает данные о сайтах из базы фоновой задачей (при первом запуске импортирует websites.json)."""
+        self.status_bar.config(text="Загрузка списка сайтов...")
+
+        def worker(task):
+            loaded = self.registry.read()
+            self.snapshot_cache.load()
+            self.stats_cache.load()
+            self.health_cache.load()
+            return loaded
+
+        self.tasks.submit("Загрузка списка сайтов", worker, priority=PRIORITY_HIGH, cancellable=False,
+                          on_done=self.on_websites_loaded, on_error=self.on_websites_load_failed)
+
+    def on_websites_loaded(self, loaded):
+        """Показывает загруженный реестр и запускает фоновую индексацию и анализ размеров."""
+        self.registry.apply_loaded(loaded)
+        self.registry_loaded = True
+        if self.registry.import_error is not None:
+            messagebox.showerror("Ошибка импорта", f"Не удалось импортировать '{self.registry.json_file}'. Файл поврежден и оставлен без изменений.")
+        self.filter_list_by_search()
+        self.request_content_indexing(self.websites)
+        self.refresh_project_stats()
+        self.refresh_health()
+        self.show_startup_time()
+
+    def on_websites_load_failed(self, error):
+        """Сообщает об ошибке загрузки; окно продолжает работать с пустым списком."""
+        self.registry_loaded = True
+        messagebox.showerror("Ошибка загрузки", "Не удалось загрузить данные о сайтах из базы.")
+        self.show_startup_time()
+
+    def on_window_ready(self):
+        """Запоминает, через сколько после запуска окно было построено и готово к работе."""
+        self.window_ready_seconds = time.perf_counter() - self.startup_started
+
+    def show_startup_time(self):
+        """Показывает в строке состояния время появления окна и загрузки списка сайтов."""
+        total = time.perf_counter() - self.startup_started
+        window = f"окно {self.window_ready_seconds * 1000:.0f} мс, " if self.window_ready_seconds is not None else ""
+        self.status_bar.config(text=f"Запуск: {window}список сайтов ({len(self.websites)}) {total * 1000:.0f} мс")
+
+    def require_registry(self):
+        """Проверяет, что реестр уже загружен, иначе предупреждает пользователя."""
+        if not self.registry_loaded:
+            messagebox.showinfo("Информация", "Список сайтов еще загружается, повторите через несколько секунд.")
+        return self.registry_loaded
+
+    def save_websites(self, names=None):
+        """Сохраняет в базу указанные сайты (по умолчанию - все) и обновляет поисковый индекс."""
+        if names is None:
+            names = list(self.websites)
+        self.registry.update_many(names, persist=False)
+        self.store_records(names)
+        self.update_gateway_routes()
+
+    def store_records(self, names):
+        """Записывает копии записей сайтов в базу фоновой задачей.
+
+        Записи в базу выполняются строго по очереди (lane "storage") и не
+        отменяются, в том числе при закрытии окна.
+        """
+        records = [(name, copy.deepcopy(self.websites[name])) for name in names]
+        self.tasks.submit("Сохранение данных о сайтах", lambda task: self.registry.store.put_many(records),
+                          priority=PRIORITY_HIGH, lane="storage", cancellable=False, track=False,
+                          on_error=lambda error: messagebox.showerror("Ошибка сохранения",
+                                                                      "Не удалось сохранить данные о сайтах."))
+
+    def delete_website_record(self, name):
+        """Удаляет сайт из реестра и возвращает его запись; удаление из базы выполняется в фоне."""
+        site_data = self.registry.delete(name, persist=False)
+        self.update_gateway_routes()
+        self.tasks.submit("Удаление сайта из базы", lambda task: self.registry.store.delete(name),
+                          priority=PRIORITY_HIGH, lane="storage", cancellable=False, track=False,
+                          on_error=lambda error: messagebox.showerror("Ошибка сохранения",
+                                                                      "Не удалось удалить сайт из базы."))
+        return site_data
 
     def load_config(self):
         """Загружает конфигурацию из файла."""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, "r") as f:
-                    config = json.load(f)
-                    self.custom_editor_path = config.get("custom_editor_path")
-            except json.JSONDecodeError:
-                messagebox.showwarning("Предупреждение", "Не удалось загрузить конфигурацию. Будут использованы настройки по умолчанию.")
-
-    def save_config(self):
-        """Сохраняет конфигурацию в файл."""
-        config = {"custom_editor_path": self.custom_editor_path}
         try:
-            with open(self.config_file, "w") as f:
-                json.dump(config, f, indent=4)
-        except IOError:
-            messagebox.showerror("Ошибка сохранения", "Не удалось сохранить конфигурацию.")
+            config = read_config(self.config_file)
+        except (json.JSONDecodeError, OSError):
+            messagebox.showwarning("Предупреждение", "Не удалось загрузить конфигурацию. Будут использованы настройки по умолчанию.")
+            return
+        self.custom_editor_path = config["custom_editor_path"]
+        self.ignore_patterns = config["ignore_patterns"]
+        self.live_reload = config["live_reload"]
 
-    def get_all_tags(self):
-        """Собирает все уникальные теги из всех сайтов."""
-        all_tags = {"Все теги"}
-        for site_data in self.websites.values():
-            for tag in site_data.get("tags", []):
-                all_tags.add(tag)
-        return sorted(list(all_tags))
+    def save_config(self):
+        """Сохраняет конфигурацию в файл фоновой задачей."""
+        config = {
+            "custom_editor_path": self.custom_editor_path,
+            "ignore_patterns": list(self.ignore_patterns),
+            "live_reload": self.live_reload
+        }
+        self.tasks.submit("Сохранение конфигурации", lambda task: write_config(self.config_file, config),
+                          priority=PRIORITY_HIGH, lane="config", cancellable=False, track=False,
+                          on_error=lambda error: messagebox.showerror("Ошибка сохранения",
+                                                                      "Не удалось сохранить конфигурацию."))
 
     def filter_menu_update(self):
-        """Обновляет содержимое выпадающего меню с тегами."""
+        """Перестраивает меню тегов: отметки фильтра и число сайтов с тегом в текущем списке."""
         menu = self.filter_menu["menu"]
         menu.delete(0, "end")
-        all_tags = self.get_all_tags()
-        self.filter_var.set("Все теги")
-        for tag in all_tags:
-            menu.add_command(label=tag, command=tk._setit(self.filter_var, tag, self.filter_list_by_tag))
+        counts = self.registry.tag_index.counts(self.displayed_names)
+        menu.add_command(label="Все теги (сбросить фильтр)", command=lambda: self.filter_list_by_tag("Все теги"))
+        for mode, label in (("all", "Все отмеченные теги (И)"), ("any", "Любой из отмеченных (ИЛИ)")):
+            mark = "(•)" if self.tag_mode == mode else "( )"
+            menu.add_command(label=f"{mark} {label}", command=lambda mode=mode: self.set_tag_mode(mode))
+        menu.add_separator()
+        for tag in self.registry.get_all_tags():
+            mark = {"include": "[+]", "exclude": "[-]"}.get(self.tag_filter.get(tag), "[ ]")
+            menu.add_command(label=f"{mark} {tag} ({counts[tag]})", command=lambda tag=tag: self.filter_list_by_tag(tag))
+        self.filter_var.set(self.describe_tag_filter())
+
+    def describe_tag_filter(self):
+        """Текст кнопки фильтра, например "Теги (И): html, css; без: old"."""
+        included = sorted(tag for tag, state in self.tag_filter.items() if state == "include")
+        excluded = sorted(tag for tag, state in self.tag_filter.items() if state == "exclude")
+        if not included and not excluded:
+            return "Все теги"
+        parts = []
+        if included:
+            parts.append(", ".join(included))
+        if excluded:
+            parts.append("без: " + ", ".join(excluded))
+        return f"Теги ({'И' if self.tag_mode == 'all' else 'ИЛИ'}): " + "; ".join(parts)
+
+    def set_tag_mode(self, mode):
+        """Переключает объединение отмеченных тегов: И или ИЛИ."""
+        self.tag_mode = mode
+        self.filter_list_by_search()
+
+    def schedule_search(self, event=None):
+        """Откладывает поиск до паузы в наборе текста."""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(150, self.filter_list_by_search)
 
     def filter_list_by_search(self, event=None):
-        """Фильтрует список сайтов по поисковому запросу."""
-        query = self.search_entry.get().lower()
-        self.website_listbox.delete(0, tk.END)
-        for name, data in self.websites.items():
-            if query in name.lower() or query in data.get("description", "").lower():
-                self.website_listbox.insert(tk.END, name)
+        """Фильтрует список сайтов по поисковому запросу и тегам, затем обновляет счетчики тегов."""
+        self.search_after_id = None
+        # Теги, которых больше нет ни у одного сайта, выбывают из фильтра
+        for tag in [tag for tag in self.tag_filter if tag not in self.registry.tag_index.tags]:
+            del self.tag_filter[tag]
+        included = [tag for tag, state in self.tag_filter.items() if state == "include"]
+        excluded = [tag for tag, state in self.tag_filter.items() if state == "exclude"]
+        names = self.registry.search(self.search_entry.get(),
+                                     all_tags=included if self.tag_mode == "all" else (),
+                                     any_tags=included if self.tag_mode == "any" else (),
+                                     exclude_tags=excluded)
+        self.set_listbox_names(self.sort_names(names))
+        self.filter_menu_update()
 
     def filter_list_by_tag(self, tag):
-        """Фильтрует список сайтов по тегам."""
-        self.website_listbox.delete(0, tk.END)
+        """Переключает тег в фильтре: не выбран -> включить -> исключить -> не выбран.
+
+        "Все теги" сбрасывает фильтр. Фильтр по тегам сочетается с текстовым поиском.
+        """
         if tag == "Все теги":
-            for name in self.websites:
-                self.website_listbox.insert(tk.END, name)
+            self.tag_filter.clear()
         else:
-            for name, data in self.websites.items():
-                if tag in data.get("tags", []):
-                    self.website_listbox.insert(tk.END, name)
+            state = self.tag_filter.get(tag)
+            if state is None:
+                self.tag_filter[tag] = "include"
+            elif state == "include":
+                self.tag_filter[tag] = "exclude"
+            else:
+                del self.tag_filter[tag]
+        self.filter_list_by_search()
         
     def open_folder(self):
         """Открывает папку выбранного сайта в проводнике/файндерe."""
@@ -454,12 +1344,16 @@ class WebsiteManagerApp:
                 messagebox.showerror("Ошибка", f"Папка '{folder_path}' не найдена.")
                 return
 
-            if platform.system() == "Windows":
-                os.startfile(folder_path)
-            elif platform.system() == "Darwin": # macOS
-                subprocess.run(["open", folder_path])
-            else: # Linux
-                subprocess.run(["xdg-open", folder_path])
+            def worker(task):
+                if platform.system() == "Windows":
+                    os.startfile(folder_path)
+                elif platform.system() == "Darwin": # macOS
+                    self.run_command(["open", folder_path])
+                else: # Linux
+                    self.run_command(["xdg-open", folder_path])
+
+            self.tasks.submit(f"Открытие папки '{selected_name}'", worker, priority=PRIORITY_HIGH, cancellable=False,
+                              on_error=lambda error: messagebox.showerror("Ошибка", f"Не удалось открыть папку: {error}"))
         except IndexError:
             messagebox.showwarning("Предупреждение", "Выберите сайт из списка.")
 
@@ -491,20 +1385,42 @@ class WebsiteManagerApp:
                 messagebox.showerror("Ошибка", f"Папка '{folder_path}' не найдена.")
                 return
 
-            if self.custom_editor_path:
-                try:
-                    subprocess.run([self.custom_editor_path, folder_path], check=True)
-                except FileNotFoundError:
-                    messagebox.showerror("Ошибка", f"Исполняемый файл редактора не найден по пути:\\n{self.custom_editor_path}")
-            else:
-                try:
-                    subprocess.run(["code", folder_path], check=True, shell=True)
-                except FileNotFoundError:
+            editor_path = self.custom_editor_path
+
+            def on_error(error):
+                if editor_path and isinstance(error, FileNotFoundError):
+                    messagebox.showerror("Ошибка", f"Исполняемый файл редактора не найден по пути:\\n{editor_path}")
+                elif not editor_path and isinstance(error, (FileNotFoundError, subprocess.CalledProcessError)):
                     messagebox.showerror("Ошибка", "VS Code не найден. Чтобы использовать другой редактор, нажмите 'Выбрать редактор' и укажите путь к его исполняемому файлу.")
+                else:
+                    messagebox.showerror("Ошибка", f"Не удалось открыть редактор: {error}")
+
+            if editor_path:
+                command, shell = [editor_path, folder_path], False
+            else:
+                command, shell = ["code", folder_path], True
+            self.tasks.submit(f"Открытие '{selected_name}' в редакторе", lambda task: self.run_command(command, shell),
+                              priority=PRIORITY_HIGH, cancellable=False, on_error=on_error)
 
         except IndexError:
             messagebox.showwarning("Предупреждение", "Выберите сайт из списка.")
 
+    @staticmethod
+    def run_command(command, shell=False, timeout=5):
+        """Запускает программу и ждет ее недолго (вызывается из фоновой задачи).
+
+        Редакторы и файловые менеджеры часто продолжают работать после
+        запуска, поэтому ожидание ограничено timeout; ненулевой код выхода
+        за это время считается ошибкой запуска.
+        """
+        process = subprocess.Popen(command, shell=shell)
+        try:
+            code = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return
+        if code:
+            raise subprocess.CalledProcessError(code, command)
+
     def select_custom_editor(self):
         """Позволяет пользователю выбрать исполняемый файл редактора."""
         editor_path = filedialog.askopenfilename(
@@ -517,74 +1433,356 @@ class WebsiteManagerApp:
             messagebox.showinfo("Успех", f"Редактор '{os.path.basename(editor_path)}' успешно установлен.")
 
     def start_server(self):
-        """Запускает простой HTTP-сервер для выбранного сайта."""
+        """Запускает HTTP-сервер для выбранного сайта (параллельно с уже запущенными)."""
         try:
             selected_index = self.website_listbox.curselection()[0]
             selected_name = self.website_listbox.get(selected_index)
             folder_path = self.websites[selected_name]["path"]
 
-            if self.current_server:
-                if self.current_server['path'] == folder_path:
-                    messagebox.showinfo("Информация", "Сервер для этого проекта уже запущен.")
-                    return
-                else:
-                    self.stop_server()
-                    
+            if self.server_manager.get(selected_name):
+                messagebox.showinfo("Информация", "Сервер для этого проекта уже запущен.")
+                return
+
             if not os.path.exists(folder_path):
                 messagebox.showerror("Ошибка", f"Папка '{folder_path}' не найдена.")
                 return
 
-            self.status_bar.config(text=f"Запуск сервера для '{selected_name}'...")
-            
-            os.chdir(folder_path)
-            
-            # Поиск доступного порта
-            port = 8000
-            while True:
-                with socketserver.TCPServer(("localhost", port), http.server.SimpleHTTPRequestHandler) as httpd:
-                    httpd.server_close()
-                break
-                
-            server_thread = threading.Thread(target=self.run_server, args=(port,), daemon=True)
-            server_thread.start()
-            
-            self.current_server = {
-                "name": selected_name,
-                "path": folder_path,
-                "port": port,
-                "thread": server_thread
-            }
-            
-            self.root.after(100, lambda: self.status_bar.config(text=f"Сервер запущен на http://localhost:{port}"))
-            webbrowser.open(f'http://localhost:{port}')
+            self.launch_server(selected_name, folder_path)
 
         except IndexError:
             messagebox.showwarning("Предупреждение", "Выберите сайт из списка.")
+
+    def launch_server(self, name, folder_path):
+        """Запускает сервер для папки под указанным именем и открывает его в браузере."""
+        try:
+            self.status_bar.config(text=f"Запуск сервера для '{name}'...")
+            info = self.server_manager.start(name, folder_path, live_reload=self.live_reload,
+                                             ignore_patterns=self.ignore_patterns)
+            port = info["port"]
+            self.update_servers_panel()
+
+            self.status_bar.config(text=f"Сервер '{name}' запущен на http://localhost:{port}")
+            webbrowser.open(f'http://localhost:{port}')
+
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось запустить сервер: {e}")
 
-    def run_server(self, port):
-        """Внутренняя функция для запуска сервера."""
-        try:
-            Handler = http.server.SimpleHTTPRequestHandler
-            with socketserver.TCPServer(("", port), Handler) as httpd:
-                self.server_process = httpd
-                httpd.serve_forever()
-        except OSError:
-            pass # Сервер уже остановлен
+    def start_gateway(self):
+        """Запускает шлюз, раздающий все сайты реестра на одном порту, и открывает список сайтов."""
+        if not self.require_registry():
+            return
+        from website_server import GATEWAY_NAME
 
-    def stop_server(self):
-        """Останавливает запущенный HTTP-сервер."""
-        if self.server_process:
-            self.server_process.shutdown()
-            self.server_process.server_close()
-            self.server_process = None
-            self.current_server = None
-            self.status_bar.config(text="Сервер остановлен")
-            messagebox.showinfo("Информация", "Сервер успешно остановлен.")
+        info = self.server_manager.get(GATEWAY_NAME)
+        if info is None:
+            try:
+                info = self.server_manager.start_gateway(self.websites, live_reload=self.live_reload,
+                                                         ignore_patterns=self.ignore_patterns)
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось запустить шлюз: {e}")
+                return
+            self.update_servers_panel()
+        self.status_bar.config(text=f"Шлюз для {len(info['server'].routes[0])} сайтов запущен на "
+                                    f"http://localhost:{info['port']}")
+        webbrowser.open(f"http://localhost:{info['port']}")
+
+    def update_gateway_routes(self):
+        """Перестраивает таблицу маршрутов шлюза после изменения списка сайтов (если шлюз запущен)."""
+        if self._server_manager is not None:
+            self._server_manager.update_gateway(self.websites)
+
+    def build_website(self):
+        """Собирает выбранный сайт в фоне: минификация и хэши в именах ресурсов."""
+        name = self.get_selected_name()
+        if name is None:
+            messagebox.showwarning("Предупреждение", "Выберите сайт из списка.")
+            return
+        folder_path = self.websites[name].get("path", "")
+        if not os.path.isdir(folder_path):
+            messagebox.showerror("Ошибка", f"Папка '{folder_path}' не найдена.")
+            return
+        task = self.build_tasks.get(name)
+        if task is not None and task.pending:
+            return
+        ignore_patterns = list(self.ignore_patterns)
+        self.status_bar.config(text=f"Сборка '{name}'...")
+
+        def worker(task):
+            from website_build import build_project, default_output_dir
+
+            # Отмена не прерывает сборку посреди записи манифеста: результат просто не показывается
+            def progress(done, total):
+                if done % 50 == 0 or done == total:
+                    task.set_progress(done, total)
+                    self.call_in_ui(self.status_bar.config, {"text": f"Сборка '{name}': {done} из {total} файлов..."})
+
+            return build_project(folder_path, default_output_dir(self.registry.data_dir, name),
+                                 ignore_patterns, progress=progress)
+
+        self.build_tasks[name] = self.tasks.submit(f"Сборка '{name}'", worker, lane=f"build:{name}",
+                                                   on_done=lambda summary: self.on_build_finished(name, summary, None),
+                                                   on_error=lambda error: self.on_build_finished(name, None, error))
+
+    def check_links(self):
+        """Проверяет ссылки выбранного сайта в фоне через его локальный сервер."""
+        name = self.get_selected_name()
+        if name is None:
+            messagebox.showwarning("Предупреждение", "Выберите сайт из списка.")
+            return
+        folder_path = self.websites[name].get("path", "")
+        if not os.path.isdir(folder_path):
+            messagebox.showerror("Ошибка", f"Папка '{folder_path}' не найдена.")
+            return
+        # Уже запущенный сервер проекта используется как есть, иначе поднимается временный
+        server_info = self._server_manager.get(name) if self._server_manager is not None else None
+        port = server_info["port"] if server_info else None
+        ignore_patterns = list(self.ignore_patterns)
+        self.status_bar.config(text=f"Проверка ссылок '{name}'...")
+
+        def worker(task):
+            from website_links import check_project
+
+            return check_project(folder_path, ignore_patterns, port=port)
+
+        def on_error(error):
+            self.status_bar.config(text="Готово")
+            messagebox.showerror("Ошибка", f"Не удалось проверить ссылки: {error}")
+
+        self.tasks.submit(f"Проверка ссылок '{name}'", worker,
+                          on_done=lambda report: self.display_link_report(name, report), on_error=on_error)
+
+    def display_link_report(self, name, report, limit=200):
+        """Показывает битые ссылки, крупные и медленные файлы в панели информации."""
+        self.title_label.config(text=f"Проверка ссылок: {name}")
+        self.info_text.configure(state=tk.NORMAL)
+        self.info_text.delete("1.0", tk.END)
+
+        info = (f"Файлов HTML/CSS: {report['files']}, ссылок: {report['references']}, "
+                f"разных целей: {report['targets']}, время: {report['seconds']:.2f} с\n\n")
+        if report["broken"]:
+            info += f"Битые ссылки ({len(report['broken'])}):\n"
+            for item in report["broken"][:limit]:
+                info += f"    {item['source']}: {item['ref']} - {item['reason']}\n"
         else:
-            messagebox.showwarning("Предупреждение", "Сервер не запущен.")
+            info += "Битых ссылок не найдено.\n"
+        if report["oversized"]:
+            info += f"\nСлишком большие файлы ({len(report['oversized'])}):\n"
+            for item in report["oversized"][:limit]:
+                info += f"    {format_size(item['size'])}  {item['path']}\n"
+        if report["slow"]:
+            info += f"\nМедленно отдаются ({len(report['slow'])}):\n"
+            for item in report["slow"][:limit]:
+                info += f"    {item['seconds'] * 1000:.0f} мс  {item['path']}\n"
+        self.info_text.insert(tk.END, info)
+        self.info_text.configure(state=tk.DISABLED)
+        self.status_bar.config(text=f"Проверка ссылок '{name}': битых {len(report['broken'])}")
+
+    def on_build_finished(self, name, summary, error):
+        """Сообщает о результате сборки и предлагает запустить для нее сервер."""
+        self.build_tasks.pop(name, None)
+        if error is not None:
+            self.status_bar.config(text=f"Ошибка сборки '{name}'")
+            messagebox.showerror("Ошибка сборки", f"Не удалось собрать '{name}': {error}")
+            return
+        self.status_bar.config(text=f"Сборка '{name}' завершена за {summary['seconds']:.1f} с")
+        build_name = f"{name} [сборка]"
+        report = (f"Файлов: {summary['files']}, пересобрано: {summary['built']}, "
+                  f"удалено устаревших: {summary['removed']}\n"
+                  f"Размер: {format_size(summary['source_size'])} -> {format_size(summary['output_size'])}\n"
+                  f"Папка: {summary['output_dir']}")
+        if self.server_manager.get(build_name):
+            messagebox.showinfo("Сборка завершена", f"{report}\n\nСервер сборки уже запущен - обновите страницу.")
+        elif messagebox.askyesno("Сборка завершена", f"{report}\n\nЗапустить сервер для сборки?"):
+            self.launch_server(build_name, summary["output_dir"])
+
+    def toggle_live_reload(self):
+        """Включает или выключает автообновление для запускаемых серверов."""
+        self.live_reload = self.live_reload_var.get()
+        self.save_config()
+
+    def stop_server(self):
+        """Останавливает HTTP-сервер выбранного сайта."""
+        try:
+            selected_index = self.website_listbox.curselection()[0]
+            selected_name = self.website_listbox.get(selected_index)
+        except IndexError:
+            messagebox.showwarning("Предупреждение", "Выберите сайт из списка.")
+            return
+        self.stop_server_by_name(selected_name)
+
+    def stop_server_by_name(self, name):
+        """Останавливает сервер сайта по имени в фоне (остановка ждет завершения цикла сервера)."""
+        if not self.server_manager.get(name):
+            messagebox.showwarning("Предупреждение", f"Сервер для '{name}' не запущен.")
             self.status_bar.config(text="Готово")
+            return
+        self.status_bar.config(text=f"Остановка сервера '{name}'...")
+
+        def on_done(stopped):
+            self.update_servers_panel()
+            self.status_bar.config(text=f"Сервер '{name}' остановлен" if stopped else "Готово")
+
+        self.tasks.submit(f"Остановка сервера '{name}'", lambda task: self.server_manager.stop(name),
+                          priority=PRIORITY_HIGH, cancellable=False, on_done=on_done)
+
+    def update_servers_panel(self):
+        """Перерисовывает список запущенных серверов."""
+        self.servers_tree.delete(*self.servers_tree.get_children())
+        for info in self.server_manager.list():
+            self.servers_tree.insert("", tk.END, iid=info["name"], text=info["name"],
+                                     values=(info["name"] + (" (автообновление)" if info["live_reload"] else ""),
+                                             f"http://localhost:{info['port']}", info["path"],
+                                             info["started"]))
+
+    def get_selected_server_name(self):
+        """Возвращает имя сайта, выбранного в панели серверов, или None."""
+        selection = self.servers_tree.selection()
+        if not selection:
+            messagebox.showwarning("Предупреждение", "Выберите сервер в списке запущенных.")
+            return None
+        return selection[0]
+
+    def open_selected_server(self):
+        """Открывает в браузере сервер, выбранный в панели."""
+        name = self.get_selected_server_name()
+        info = self.server_manager.get(name) if name else None
+        if info:
+            webbrowser.open(f"http://localhost:{info['port']}")
+
+    def stop_selected_server(self):
+        """Останавливает сервер, выбранный в панели."""
+        name = self.get_selected_server_name()
+        if name:
+            self.stop_server_by_name(name)
+
+    def show_server_metrics(self):
+        """Открывает окно с обновляемой статистикой запросов выбранного сервера."""
+        name = self.get_selected_server_name()
+        if not name:
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Статистика сервера '{name}'")
+        window.geometry("640x560")
+        window.configure(bg=BG_COLOR)
+
+        metrics_text = scrolledtext.ScrolledText(window, wrap=tk.NONE,
+                                                 bg=LISTBOX_BG, fg=LISTBOX_FG,
+                                                 font=("Consolas", 10),
+                                                 bd=0, relief="flat")
+        metrics_text.pack(fill=tk.BOTH, expand=1, padx=10, pady=(10, 5))
+
+        btn_export = ttk.Button(window, text="Экспорт в JSON", command=lambda: self.export_server_metrics(name))
+        btn_export.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            info = self.server_manager.get(name)
+            metrics_text.configure(state=tk.NORMAL)
+            metrics_text.delete("1.0", tk.END)
+            if info is None:
+                metrics_text.insert(tk.END, "Сервер остановлен.")
+                metrics_text.configure(state=tk.DISABLED)
+                return
+            metrics_text.insert(tk.END, self.format_server_metrics(info["server"].metrics.snapshot()))
+            metrics_text.configure(state=tk.DISABLED)
+            window.after(1000, refresh)
+
+        refresh()
+
+    def format_server_metrics(self, snapshot):
+        """Формирует текстовое представление метрик сервера."""
+        latency = snapshot["latency_ms"]
+        text = f"Время работы: {snapshot['uptime_s']} с\n"
+        text += f"Запросов: {snapshot['requests']}\n"
+        text += f"Отправлено: {snapshot['bytes_sent'] / 1024:.1f} КБ\n"
+        text += f"Открытых соединений: {snapshot['in_flight']}\n"
+        text += "Коды ответов: " + ", ".join(f"{code}: {count}" for code, count in snapshot["status_codes"].items()) + "\n\n"
+        text += f"Задержка, мс: p50={latency['p50']}  p95={latency['p95']}  p99={latency['p99']}  max={latency['max']}\n\n"
+
+        text += "Гистограмма задержек:\n"
+        peak = max([bucket["count"] for bucket in snapshot["histogram_ms"]] + [1])
+        for bucket in snapshot["histogram_ms"]:
+            bar = "#" * int(30 * bucket["count"] / peak)
+            text += f"  <= {str(bucket['le']):>5} мс {bucket['count']:>8} {bar}\n"
+
+        text += "\nСамые медленные пути (среднее / максимум, мс):\n"
+        for item in snapshot["slowest_paths"]:
+            text += f"  {item['avg_ms']:>8} / {item['max_ms']:>8}  {item['count']:>6}x  {item['path']}\n"
+        text += "\nСамые тяжелые пути (всего отправлено):\n"
+        for item in snapshot["largest_paths"]:
+            text += f"  {item['bytes'] / 1024:>10.1f} КБ  {item['count']:>6}x  {item['path']}\n"
+        return text
+
+    def export_server_metrics(self, name):
+        """Сохраняет метрики сервера в JSON-файл."""
+        info = self.server_manager.get(name)
+        if info is None:
+            messagebox.showwarning("Предупреждение", f"Сервер для '{name}' не запущен.")
+            return
+        file_path = filedialog.asksaveasfilename(title="Сохранить статистику", defaultextension=".json",
+                                                 initialfile=f"{name}_metrics.json",
+                                                 filetypes=[("JSON files", "*.json")])
+        if not file_path:
+            return
+        snapshot = info["server"].metrics.snapshot(top=50)
+        snapshot["site"] = name
+        snapshot["path"] = info["path"]
+        try:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=4, ensure_ascii=False)
+            self.status_bar.config(text=f"Статистика сохранена в {file_path}")
+        except IOError:
+            messagebox.showerror("Ошибка сохранения", "Не удалось сохранить статистику.")
+
+    def stop_all_servers(self):
+        """Останавливает все запущенные серверы в фоне."""
+        self.status_bar.config(text="Остановка серверов...")
+
+        def on_done(result):
+            self.update_servers_panel()
+            self.status_bar.config(text="Все серверы остановлены")
+
+        self.tasks.submit("Остановка всех серверов", lambda task: self.server_manager.stop_all(),
+                          priority=PRIORITY_HIGH, cancellable=False, on_done=on_done)
+
+    def update_tasks_panel(self):
+        """Перерисовывает список фоновых задач, сохраняя выделение."""
+        selection = self.tasks_tree.selection()
+        self.tasks_tree.delete(*self.tasks_tree.get_children())
+        for task in reversed(self.tasks.list()):
+            self.tasks_tree.insert("", tk.END, iid=str(task.id),
+                                   values=(task.title, TASK_STATE_NAMES[task.state], task.describe_progress()))
+        selection = [iid for iid in selection if self.tasks_tree.exists(iid)]
+        if selection:
+            self.tasks_tree.selection_set(selection)
+
+    def cancel_selected_task(self):
+        """Отменяет задачу, выбранную в списке фоновых задач."""
+        selection = self.tasks_tree.selection()
+        if not selection:
+            messagebox.showwarning("Предупреждение", "Выберите задачу в списке.")
+            return
+        task = next((task for task in self.tasks.list() if str(task.id) == selection[0]), None)
+        if task is None or not task.pending:
+            return
+        if not self.tasks.cancel(task):
+            messagebox.showinfo("Информация", "Эту задачу нельзя отменить.")
+
+    def show_task_error(self, error):
+        """Сообщает об ошибке фоновой задачи."""
+        messagebox.showerror("Ошибка", f"Фоновая задача завершилась с ошибкой: {error}")
+
+    def on_close(self):
+        """Отменяет фоновые задачи, дожидается записей в базу, останавливает серверы и сохраняет кэши."""
+        self.tasks.shutdown(timeout=5)
+        if self._server_manager is not None:
+            self.server_manager.stop_all()
+        self.snapshot_cache.save()
+        self.stats_cache.save()
+        self.health_cache.save()
+        self.root.destroy()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,1201 @@
+"""Сервер проектов: пул потоков, HTTP/1.1 keep-alive, кэш, сжатие, диапазоны, автообновление и метрики.
+
+Кроме сервера отдельного проекта здесь же шлюз, раздающий все сайты
+реестра через один порт.
+
+Модуль импортируется только при запуске сервера, чтобы http.server и
+связанные модули не замедляли старт интерфейса и командной строки.
+"""
+import os
+import io
+import re
+import json
+import gzip
+import stat
+import time
+import queue
+import socket
+import bisect
+import contextlib
+import platform
+import functools
+import threading
+import socketserver
+import http.server
+import email.utils
+import html
+import urllib.parse
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from website_core import is_ignored
+
+# Сжатие ответов сервера проектов
+COMPRESSIBLE_TYPES = {"application/javascript", "application/json", "application/xml",
+                      "application/manifest+json", "image/svg+xml"}
+MIN_COMPRESS_SIZE = 256
+MAX_COMPRESS_SIZE = 8 * 1024 * 1024
+
+# Запросы диапазонов (Range): больше частей в одном запросе не обрабатывается
+MAX_RANGES = 16
+
+# Автообновление страниц: адрес потока событий и внедряемый в HTML скрипт
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    '<script>(function(){var s=new EventSource(%s);'
+    's.addEventListener("reload",function(){location.reload();});})();</script>'
+)
+# Поток событий занимает поток пула на все время жизни страницы, поэтому их
+# число ограничено, чтобы открытые вкладки не заняли пул целиком
+MAX_LIVE_RELOAD_STREAMS = 16
+
+# Шлюз: адреса сайтов вида http://<имя>.localhost:<порт>/ и имя шлюза среди запущенных серверов
+GATEWAY_HOST_SUFFIX = ".localhost"
+GATEWAY_NAME = "* Все сайты (шлюз)"
+
+
+class ProjectWatcher:
+    """Отслеживает изменения файлов проекта по снимку stat.
+
+    На каждом такте проверяется mtime всех каталогов и перечитываются только
+    изменившиеся (так находятся добавленные, удаленные и переименованные
+    файлы). Изменение содержимого проверяется у "горячих" файлов, которые
+    отдавал сервер, и у небольшой порции остальных файлов по кругу, поэтому
+    такт остается дешевым даже на десятках тысяч файлов. Серия изменений
+    объединяется в одно событие после паузы debounce.
+    """
+
+    def __init__(self, path, on_change, ignore_patterns=(), interval=0.4, debounce=0.3, sweep_batch=2000):
+        self.path = path
+        self.on_change = on_change
+        self.ignore_patterns = list(ignore_patterns)
+        self.interval = interval
+        self.debounce = debounce
+        self.sweep_batch = sweep_batch
+        self.dirs = {}
+        self.dir_entries = {}
+        self.files = {}
+        self.hot_files = set()
+        self.sweep_order = []
+        self.sweep_position = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Запускает наблюдение в фоновом потоке."""
+        self.thread = threading.Thread(target=self.run, name="project-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Останавливает наблюдение."""
+        self.stop_event.set()
+
+    def watch_file(self, path):
+        """Добавляет файл в число проверяемых на каждом такте."""
+        with self.lock:
+            self.hot_files.add(path)
+
+    def scan_dir(self, dir_path):
+        """Перечитывает каталог и возвращает множество добавленных или удаленных путей."""
+        changes = set()
+        try:
+            dir_mtime = os.stat(dir_path).st_mtime_ns
+            files, subdirs = {}, set()
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if is_ignored(entry.name, self.ignore_patterns):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.add(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            files[entry.path] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue
+        except OSError:
+            return changes | self.forget_dir(dir_path)
+
+        old_files, old_subdirs = self.dir_entries.get(dir_path, (set(), set()))
+        for file_path in old_files - files.keys():
+            self.files.pop(file_path, None)
+            changes.add(file_path)
+        for file_path, signature in files.items():
+            if self.files.get(file_path) != signature:
+                changes.add(file_path)
+            self.files[file_path] = signature
+        for subdir in old_subdirs - subdirs:
+            changes |= self.forget_dir(subdir)
+        self.dirs[dir_path] = dir_mtime
+        self.dir_entries[dir_path] = (set(files), subdirs)
+        for subdir in subdirs - old_subdirs:
+            changes |= self.scan_dir(subdir)
+        return changes
+
+    def forget_dir(self, dir_path):
+        """Удаляет из снимка каталог со всем содержимым и возвращает удаленные пути."""
+        removed = {dir_path}
+        self.dirs.pop(dir_path, None)
+        files, subdirs = self.dir_entries.pop(dir_path, (set(), set()))
+        for file_path in files:
+            self.files.pop(file_path, None)
+            removed.add(file_path)
+        for subdir in subdirs:
+            removed |= self.forget_dir(subdir)
+        return removed
+
+    def check(self):
+        """Выполняет один такт проверки и возвращает множество изменившихся путей."""
+        changes = set()
+        for dir_path, mtime in list(self.dirs.items()):
+            if dir_path not in self.dirs:
+                continue # Каталог уже удален при обработке родителя
+            try:
+                changed = os.stat(dir_path).st_mtime_ns != mtime
+            except OSError:
+                changed = True
+            if changed:
+                changes |= self.scan_dir(dir_path)
+
+        # Горячие файлы + очередная порция остальных файлов по кругу
+        with self.lock:
+            candidates = set(self.hot_files)
+        if self.sweep_position >= len(self.sweep_order):
+            self.sweep_order = list(self.files)
+            self.sweep_position = 0
+        candidates.update(self.sweep_order[self.sweep_position:self.sweep_position + self.sweep_batch])
+        self.sweep_position += self.sweep_batch
+
+        for file_path in candidates:
+            signature = self.files.get(file_path)
+            if signature is None:
+                continue
+            try:
+                st = os.stat(file_path)
+                current = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                current = None
+            if current != signature:
+                changes.add(file_path)
+                if current is None:
+                    self.files.pop(file_path, None)
+                else:
+                    self.files[file_path] = current
+        return changes
+
+    def run(self):
+        """Основной цикл наблюдения с объединением серии изменений."""
+        self.scan_dir(self.path)
+        pending = set()
+        last_change = 0
+        while not self.stop_event.wait(self.interval):
+            changes = self.check()
+            now = time.monotonic()
+            if changes:
+                pending |= changes
+                last_change = now
+            elif pending and now - last_change >= self.debounce:
+                self.on_change(sorted(pending))
+                pending = set()
+
+
+class LiveReloadHub:
+    """Рассылает события перезагрузки страницам, подключенным через Server-Sent Events."""
+
+    def __init__(self):
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        """Регистрирует нового клиента и возвращает его очередь событий."""
+        client = queue.Queue()
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        """Удаляет клиента."""
+        with self.lock:
+            self.clients.discard(client)
+
+    def publish(self, message):
+        """Отправляет событие всем клиентам (None закрывает соединения)."""
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.put(message)
+
+    def close(self):
+        """Завершает все потоки событий."""
+        self.publish(None)
+
+
+class ServerMetrics:
+    """Счетчики и гистограмма задержек запросов одного сервера проекта.
+
+    Перцентили считаются по окну последних запросов, гистограмма и счетчики -
+    за все время работы сервера.
+    """
+
+    # Верхние границы корзин гистограммы задержек, мс
+    LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, window_size=10000, max_paths=5000):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.status_codes = {}
+        self.histogram = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+        self.recent_latencies = deque(maxlen=window_size)
+        self.max_paths = max_paths
+        self.paths = {}
+
+    def connection_opened(self):
+        """Учитывает новое соединение."""
+        with self.lock:
+            self.in_flight += 1
+
+    def connection_closed(self):
+        """Учитывает закрытое соединение."""
+        with self.lock:
+            self.in_flight -= 1
+
+    def record(self, path, status, bytes_sent, seconds):
+        """Учитывает обработанный запрос."""
+        latency_ms = seconds * 1000
+        bucket = bisect.bisect_left(self.LATENCY_BUCKETS_MS, latency_ms)
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += bytes_sent
+            self.status_codes[status] = self.status_codes.get(status, 0) + 1
+            self.histogram[bucket] += 1
+            self.recent_latencies.append(latency_ms)
+            stats = self.paths.get(path)
+            if stats is None:
+                if len(self.paths) >= self.max_paths:
+                    return
+                stats = self.paths[path] = [0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += latency_ms
+            stats[2] = max(stats[2], latency_ms)
+            stats[3] += bytes_sent
+
+    @staticmethod
+    def percentile(sorted_values, fraction):
+        """Возвращает перцентиль отсортированного списка."""
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+        return sorted_values[index]
+
+    def snapshot(self, top=10):
+        """Возвращает сводку метрик в виде словаря, пригодного для JSON."""
+        with self.lock:
+            latencies = sorted(self.recent_latencies)
+            paths = [{"path": path, "count": count, "avg_ms": round(total / count, 2),
+                      "max_ms": round(max_ms, 2), "bytes": size}
+                     for path, (count, total, max_ms, size) in self.paths.items()]
+            snapshot = {
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "bytes_sent": self.bytes_sent,
+                "in_flight": self.in_flight,
+                "status_codes": {str(code): count for code, count in sorted(self.status_codes.items())},
+                "histogram_ms": [{"le": bound, "count": count}
+                                 for bound, count in zip(self.LATENCY_BUCKETS_MS + ("inf",), self.histogram)]
+            }
+        snapshot["latency_ms"] = {
+            "p50": round(self.percentile(latencies, 0.50), 2),
+            "p95": round(self.percentile(latencies, 0.95), 2),
+            "p99": round(self.percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0
+        }
+        snapshot["slowest_paths"] = sorted(paths, key=lambda item: item["avg_ms"], reverse=True)[:top]
+        snapshot["largest_paths"] = sorted(paths, key=lambda item: item["bytes"], reverse=True)[:top]
+        return snapshot
+
+
+class FileCache:
+    """Ограниченный по объему LRU-кэш содержимого файлов в памяти.
+
+    Записи проверяются по отметке (mtime_ns, размер) исходного файла, поэтому
+    измененный файл никогда не отдается из кэша.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, stamp):
+        """Возвращает содержимое из кэша или None, если его нет или оно устарело."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != stamp:
+                self.total_bytes -= len(entry[1])
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, stamp, body):
+        """Кладет содержимое в кэш, вытесняя давно не использованные записи."""
+        if len(body) > self.max_entry_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old[1])
+            self.entries[key] = (stamp, body)
+            self.total_bytes += len(body)
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+
+def inject_live_reload_script(markup, path=LIVE_RELOAD_PATH):
+    """Вставляет скрипт автообновления с адресом потока событий path перед </body> (или в конец документа)."""
+    script = (LIVE_RELOAD_SCRIPT % json.dumps(path)).encode("utf-8")
+    position = markup.lower().rfind(b"</body>")
+    if position == -1:
+        return markup + script
+    return markup[:position] + script + markup[position:]
+
+
+def is_compressible(ctype):
+    """Проверяет, имеет ли смысл сжимать ответ с данным Content-Type."""
+    return ctype.startswith("text/") or ctype in COMPRESSIBLE_TYPES
+
+
+def parse_accept_encoding(header):
+    """Возвращает множество кодировок из Accept-Encoding, которые клиент не запретил (q=0)."""
+    encodings = set()
+    for part in header.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                pass
+        if name.strip() and quality > 0:
+            encodings.add(name.strip())
+    return encodings
+
+
+def parse_byte_ranges(header, size, max_ranges=MAX_RANGES):
+    """Разбирает заголовок Range и возвращает список диапазонов (начало, конец) включительно.
+
+    None означает, что заголовок нужно проигнорировать (ошибка синтаксиса,
+    другая единица или слишком много частей) и отдать файл целиком; пустой
+    список - ни один диапазон не попадает в файл (ответ 416). Пересекающиеся
+    и соседние диапазоны объединяются.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    parts = spec.split(",")
+    if len(parts) > max_ranges:
+        return None
+    ranges = []
+    for part in parts:
+        first, dash, last = part.strip().partition("-")
+        first, last = first.strip(), last.strip()
+        if not dash or not (first.isdigit() or (not first and last.isdigit())) or (last and not last.isdigit()):
+            return None
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+        else:
+            # Суффикс "-N": последние N байт
+            if int(last) == 0:
+                continue
+            start, end = max(0, size - int(last)), size - 1
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeBody:
+    """Тело ответа 206: части файла и служебные строки multipart.
+
+    Части файла задаются как (смещение, длина) и отправляются через sendfile
+    прямо с диска, поэтому память не зависит от размера файла.
+    """
+
+    def __init__(self, path, parts):
+        self.file = open(path, "rb")
+        self.parts = parts
+
+    def length(self):
+        return sum(len(part) if isinstance(part, bytes) else part[1] for part in self.parts)
+
+    def close(self):
+        self.file.close()
+
+
+class ProjectRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Обработчик статики проекта.
+
+    Поддерживает HTTP/1.1 keep-alive, ETag/Last-Modified с ответами 304,
+    запросы диапазонов (206, в том числе multipart/byteranges), gzip/brotli
+    для текстовых файлов и кэш небольших файлов в памяти. Крупные файлы и
+    диапазоны отправляются с диска через sendfile.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Сколько секунд держать простаивающее keep-alive соединение
+    timeout = 15
+    disable_nagle_algorithm = True
+
+    def copyfile(self, source, outputfile):
+        """Отправляет тело ответа; для файлов на диске используется os.sendfile (zero-copy)."""
+        if isinstance(source, RangeBody):
+            for part in source.parts:
+                if isinstance(part, bytes):
+                    outputfile.write(part)
+                    self.response_bytes += len(part)
+                else:
+                    offset, count = part
+                    self.response_bytes += self.connection.sendfile(source.file, offset, count)
+            return
+        self.response_bytes += self.connection.sendfile(source)
+
+    def handle_one_request(self):
+        """Обрабатывает один запрос и записывает его в метрики сервера."""
+        self.request_started = None
+        self.response_status = None
+        self.response_bytes = 0
+        super().handle_one_request()
+        # При неразобранной строке запроса command остается None, а path может быть не задан
+        if self.request_started is not None and self.response_status is not None and self.command:
+            self.server.metrics.record(urllib.parse.urlsplit(getattr(self, "path", "")).path, self.response_status,
+                                       self.response_bytes, time.perf_counter() - self.request_started)
+
+    def parse_request(self):
+        """Засекает время начала запроса (после чтения строки запроса, без учета простоя keep-alive)."""
+        self.request_started = time.perf_counter()
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        """Запоминает код ответа для метрик."""
+        self.response_status = int(code)
+        super().send_response(code, message)
+
+    def log_message(self, format, *args):
+        """Журнал в stderr не ведется: активность сервера видна в метриках."""
+
+    @property
+    def reload_hub(self):
+        """Хаб автообновления обслуживаемого сайта или None, если автообновление выключено."""
+        return self.server.reload_hub
+
+    @property
+    def watcher(self):
+        """Наблюдатель за файлами обслуживаемого сайта или None."""
+        return self.server.watcher
+
+    @property
+    def live_reload_path(self):
+        """Адрес потока событий автообновления для текущего запроса."""
+        return LIVE_RELOAD_PATH
+
+    def send_head(self):
+        """Отправляет заголовки ответа; обычные файлы обрабатываются с учетом кэша и сжатия."""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not urllib.parse.urlsplit(self.path).path.endswith("/"):
+                return super().send_head()
+            for index in ("index.html", "index.htm"):
+                index_path = os.path.join(path, index)
+                if os.path.isfile(index_path):
+                    path = index_path
+                    break
+            else:
+                return super().send_head()
+        if path.endswith("/"):
+            return super().send_head()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return super().send_head()
+        if not stat.S_ISREG(st.st_mode):
+            return super().send_head()
+        return self.send_file_head(path, st)
+
+    def send_file_head(self, path, st):
+        """Отправляет заголовки для файла и возвращает объект с телом ответа."""
+        ctype = self.guess_type(path)
+        # Вместо флага передается адрес потока событий: он входит в ключ кэша и во вставляемый скрипт
+        inject_reload = self.live_reload_path if ctype == "text/html" and self.reload_hub is not None else None
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-lr" if inject_reload else ""}"'
+        if self.is_not_modified(etag, st):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return None
+
+        watcher = self.watcher
+        if watcher is not None:
+            watcher.watch_file(path)
+        # Диапазоны относятся к файлу как он есть, поэтому страницы со вставленным скриптом отдаются целиком
+        ranges = None if inject_reload else self.requested_ranges(etag, st)
+        if ranges is not None:
+            return self.send_range_head(path, ctype, etag, st, ranges)
+
+        compressible = is_compressible(ctype)
+        encoding = self.choose_encoding(st.st_size) if compressible else None
+        stamp = (st.st_mtime_ns, st.st_size)
+        body = self.get_body(path, stamp, encoding, inject_reload)
+        if body is None and encoding:
+            encoding = None
+            body = self.get_body(path, stamp, None, inject_reload)
+
+        source = io.BytesIO(body) if body is not None else open(path, "rb")
+        # Файл закрывается при ошибке отправки заголовков; после успеха им владеет вызывающий код
+        with contextlib.ExitStack() as cleanup:
+            cleanup.callback(source.close)
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-type", ctype)
+            self.send_header("Content-Length", str(len(body) if body is not None else st.st_size))
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            self.send_header("ETag", etag[:-1] + f'-{encoding}"' if encoding else etag)
+            self.send_header("Cache-Control", "no-cache")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            if compressible:
+                self.send_header("Vary", "Accept-Encoding")
+            if not inject_reload:
+                self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            cleanup.pop_all()
+        return source
+
+    def requested_ranges(self, etag, st):
+        """Возвращает диапазоны из заголовка Range или None, если отдавать нужно весь файл.
+
+        If-Range с другим ETag или датой означает, что файл изменился, и
+        вместо части клиент должен получить его целиком.
+        """
+        header = self.headers.get("Range")
+        if header is None:
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range is not None:
+            if_range = if_range.strip()
+            if if_range.startswith(("\"", "W/")):
+                if if_range != etag:
+                    return None
+            else:
+                try:
+                    since = email.utils.parsedate_to_datetime(if_range)
+                except (TypeError, IndexError, OverflowError, ValueError):
+                    return None
+                if int(st.st_mtime) != int(since.timestamp()):
+                    return None
+        return parse_byte_ranges(header, st.st_size)
+
+    def send_range_head(self, path, ctype, etag, st, ranges):
+        """Отправляет заголовки ответа 206 (или 416) и возвращает тело с частями файла."""
+        size = st.st_size
+        if not ranges:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            parts = [(start, end - start + 1)]
+            content_type = ctype
+        else:
+            boundary = os.urandom(12).hex()
+            parts = []
+            for start, end in ranges:
+                parts.append(f"--{boundary}\r\nContent-Type: {ctype}\r\n"
+                             f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n".encode("latin-1"))
+                parts.append((start, end - start + 1))
+                parts.append(b"\r\n")
+            parts.append(f"--{boundary}--\r\n".encode("latin-1"))
+            content_type = f"multipart/byteranges; boundary={boundary}"
+
+        source = RangeBody(path, parts)
+        with contextlib.ExitStack() as cleanup:
+            cleanup.callback(source.close)
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-type", content_type)
+            self.send_header("Content-Length", str(source.length()))
+            if len(ranges) == 1:
+                self.send_header("Content-Range", f"bytes {ranges[0][0]}-{ranges[0][1]}/{size}")
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            cleanup.pop_all()
+        return source
+
+    def is_not_modified(self, etag, st):
+        """Проверяет условные заголовки If-None-Match / If-Modified-Since."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # Сжатые варианты имеют ETag вида "<базовый>-gzip"
+            valid_tags = {"*", etag, etag[:-1] + '-gzip"', etag[:-1] + '-br"'}
+            for tag in if_none_match.split(","):
+                tag = tag.strip()
+                if tag.startswith("W/"):
+                    tag = tag[2:]
+                if tag in valid_tags:
+                    return True
+            return False
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        return int(st.st_mtime) <= since.timestamp()
+
+    def choose_encoding(self, size):
+        """Выбирает кодировку сжатия, поддерживаемую клиентом."""
+        if size < MIN_COMPRESS_SIZE:
+            return None
+        accepted = parse_accept_encoding(self.headers.get("Accept-Encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def get_body(self, path, stamp, encoding, inject_reload):
+        """Возвращает тело ответа из кэша в памяти или готовит его.
+
+        None означает, что файл слишком велик и должен отправляться с диска.
+        """
+        file_cache = self.server.file_cache
+        key = (path, encoding, inject_reload)
+        body = file_cache.get(key, stamp)
+        if body is not None:
+            return body
+
+        if encoding is None and not inject_reload:
+            if stamp[1] > file_cache.max_entry_bytes:
+                return None
+            with open(path, "rb") as f:
+                body = f.read()
+            file_cache.put(key, stamp, body)
+            return body
+
+        if encoding and not inject_reload:
+            # Заранее сжатый файл рядом с исходным (например, после сборки)
+            precompressed_path = path + (".br" if encoding == "br" else ".gz")
+            try:
+                if os.stat(precompressed_path).st_mtime_ns >= stamp[0]:
+                    with open(precompressed_path, "rb") as f:
+                        body = f.read()
+            except OSError:
+                pass
+
+        if body is None:
+            if stamp[1] > MAX_COMPRESS_SIZE:
+                return None
+            with open(path, "rb") as f:
+                body = f.read()
+            if inject_reload:
+                body = inject_live_reload_script(body, inject_reload)
+            if encoding == "br":
+                body = brotli.compress(body, quality=5)
+            elif encoding == "gzip":
+                body = gzip.compress(body, compresslevel=6, mtime=0)
+        file_cache.put(key, stamp, body)
+        return body
+
+    def do_GET(self):
+        """Обрабатывает GET; адрес live_reload_path открывает поток событий перезагрузки."""
+        if urllib.parse.urlsplit(self.path).path == self.live_reload_path and self.reload_hub is not None:
+            # Долгоживущий поток событий не учитывается в задержках
+            self.request_started = None
+            self.serve_live_reload_events()
+            return
+        super().do_GET()
+
+    def serve_live_reload_events(self):
+        """Держит соединение Server-Sent Events и отправляет события перезагрузки.
+
+        Сверх max_live_reload_streams сервера отвечает 503.
+        """
+        if not self.server.open_live_reload_stream():
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Too many live reload streams")
+            return
+        hub = self.reload_hub
+        client = hub.subscribe()
+        self.close_connection = True
+        try:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(b"retry: 1000\n\n")
+            while True:
+                try:
+                    message = client.get(timeout=10)
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")
+                    continue
+                if message is None:
+                    break
+                self.wfile.write(f"event: reload\ndata: {json.dumps(message)}\n\n".encode("utf-8"))
+        except OSError:
+            pass # Страница закрыта
+        finally:
+            hub.unsubscribe(client)
+            self.server.close_live_reload_stream()
+
+
+class ProjectHTTPServer(http.server.HTTPServer):
+    """HTTP-сервер проекта, обрабатывающий соединения в ограниченном пуле потоков.
+
+    Каталог передается обработчику напрямую, поэтому рабочая папка процесса
+    не меняется.
+    """
+
+    request_queue_size = 128
+    # На Windows SO_REUSEADDR позволяет двум серверам занять один порт
+    allow_reuse_address = platform.system() != "Windows"
+    handler_class = ProjectRequestHandler
+    max_live_reload_streams = MAX_LIVE_RELOAD_STREAMS
+
+    def __init__(self, server_address, directory, max_workers=32, file_cache=None,
+                 live_reload=False, ignore_patterns=()):
+        self.directory = directory
+        self.file_cache = file_cache if file_cache is not None else FileCache()
+        self.metrics = ServerMetrics()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="project-server")
+        self.active_connections = set()
+        self.connections_lock = threading.Lock()
+        self.live_reload_streams = 0
+        self.reload_hub = None
+        self.watcher = None
+        handler = functools.partial(self.handler_class, directory=directory)
+        super().__init__(server_address, handler)
+        if live_reload:
+            self.reload_hub = LiveReloadHub()
+            self.watcher = ProjectWatcher(directory, self.publish_reload, ignore_patterns)
+            self.watcher.start()
+
+    def publish_reload(self, changed_paths):
+        """Сообщает открытым страницам об изменившихся файлах."""
+        self.reload_hub.publish([os.path.relpath(path, self.directory) for path in changed_paths])
+
+    def open_live_reload_stream(self):
+        """Учитывает новый поток событий; False, если открыто уже max_live_reload_streams."""
+        with self.connections_lock:
+            if self.live_reload_streams >= self.max_live_reload_streams:
+                return False
+            self.live_reload_streams += 1
+            return True
+
+    def close_live_reload_stream(self):
+        """Учитывает закрытый поток событий."""
+        with self.connections_lock:
+            self.live_reload_streams -= 1
+
+    def server_bind(self):
+        """Привязывает сокет без медленного socket.getfqdn() из HTTPServer."""
+        socketserver.TCPServer.server_bind(self)
+        host, port = self.server_address[:2]
+        self.server_name = host
+        self.server_port = port
+
+    def process_request(self, request, client_address):
+        """Передает соединение в пул потоков."""
+        with self.connections_lock:
+            self.active_connections.add(request)
+        self.metrics.connection_opened()
+        future = self.executor.submit(self.process_request_thread, request, client_address)
+        future.add_done_callback(functools.partial(self.close_cancelled_request, request))
+
+    def process_request_thread(self, request, client_address):
+        """Обслуживает соединение (включая все его keep-alive запросы) в потоке пула."""
+        try:
+            self.finish_request(request, client_address)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Клиент оборвал загрузку, например при перемотке видео
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self.connections_lock:
+                self.active_connections.discard(request)
+            self.metrics.connection_closed()
+            self.shutdown_request(request)
+
+    def close_cancelled_request(self, request, future):
+        """Закрывает соединение, ждавшее в очереди пула, если server_close отменил его обработку.
+
+        Отмененная задача не запускает process_request_thread, поэтому
+        соединение и счетчик метрик освобождаются здесь ровно один раз.
+        """
+        if not future.cancelled():
+            return
+        with self.connections_lock:
+            self.active_connections.discard(request)
+        self.metrics.connection_closed()
+        self.shutdown_request(request)
+
+    def server_close(self):
+        """Закрывает слушающий сокет, обрывает keep-alive соединения и закрывает ждущие в очереди пула."""
+        super().server_close()
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.reload_hub.close()
+        with self.connections_lock:
+            connections = list(self.active_connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def gateway_host_label(name):
+    """Переводит название сайта в имя хоста для адреса <имя>.localhost (пустая строка, если не получилось)."""
+    return re.sub(r"[\W_]+", "-", name.casefold()).strip("-")
+
+
+class GatewayRoute:
+    """Маршрут шлюза к одному сайту.
+
+    Автообновление сайта (наблюдатель за файлами и хаб событий) запускается
+    при первом запросе его страницы, чтобы шлюз с сотнями сайтов не следил
+    за папками, которые никто не открывал.
+    """
+
+    def __init__(self, name, path, main_file=""):
+        self.name = name
+        self.path = path
+        self.directory = os.path.abspath(path)
+        self.main_file = main_file
+        self.prefix = "/" + urllib.parse.quote(name, safe="")
+        self.host = gateway_host_label(name)
+        self.reload_hub = None
+        self.watcher = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def start_live_reload(self, ignore_patterns):
+        """Запускает автообновление сайта, если оно еще не запущено, и возвращает хаб событий."""
+        with self.lock:
+            if self.reload_hub is None and not self.closed:
+                hub = LiveReloadHub()
+                directory = self.directory
+                watcher = ProjectWatcher(directory, lambda paths: hub.publish(
+                    [os.path.relpath(path, directory) for path in paths]), ignore_patterns)
+                watcher.start()
+                self.reload_hub = hub
+                self.watcher = watcher
+            return self.reload_hub
+
+    def close(self):
+        """Останавливает автообновление сайта."""
+        with self.lock:
+            self.closed = True
+            hub, watcher = self.reload_hub, self.watcher
+        if watcher is not None:
+            watcher.stop()
+            hub.close()
+
+
+class GatewayRequestHandler(ProjectRequestHandler):
+    """Обработчик шлюза: сайт выбирается по заголовку Host или первому сегменту пути.
+
+    Адрес http://<имя>.localhost:<порт>/ отдает сайт от корня, поэтому в нем
+    работают и абсолютные ссылки вида /css/style.css; адрес
+    http://localhost:<порт>/<имя>/ подходит для сайтов с относительными
+    ссылками. Корень шлюза без имени сайта показывает список сайтов.
+    """
+
+    route = None
+    prefix = ""
+
+    def parse_request(self):
+        """После разбора заголовков выбирает маршрут сайта для запроса."""
+        if not super().parse_request():
+            return False
+        self.resolve_route()
+        return True
+
+    def resolve_route(self):
+        """Находит маршрут по таблице шлюза и устанавливает каталог и префикс запроса."""
+        by_name, by_host = self.server.routes
+        self.route = None
+        self.prefix = ""
+        host = self.headers.get("Host", "")
+        if not host.startswith("["):
+            host = host.rsplit(":", 1)[0]
+        host = host.rstrip(".").lower()
+        if host.endswith(GATEWAY_HOST_SUFFIX):
+            label = host[:-len(GATEWAY_HOST_SUFFIX)]
+            if "xn--" in label:
+                # Браузер передает кириллические имена хостов в punycode
+                try:
+                    label = label.encode("ascii").decode("idna")
+                except UnicodeError:
+                    pass
+            self.route = by_host.get(label)
+        if self.route is None:
+            segment = urllib.parse.urlsplit(self.path).path.split("/", 2)[1:2]
+            if segment:
+                self.route = by_name.get(urllib.parse.unquote(segment[0]))
+                # Префикс берется в том виде, в каком его прислал браузер
+                self.prefix = "/" + segment[0] if self.route is not None else ""
+        if self.route is not None:
+            self.directory = self.route.directory
+
+    @property
+    def reload_hub(self):
+        """Хаб автообновления выбранного сайта; запускается при первом обращении."""
+        if self.route is None or not self.server.live_reload:
+            return None
+        return self.route.start_live_reload(self.server.ignore_patterns)
+
+    @property
+    def watcher(self):
+        """Наблюдатель за файлами выбранного сайта или None."""
+        return self.route.watcher if self.route is not None else None
+
+    @property
+    def live_reload_path(self):
+        """Адрес потока событий автообновления с префиксом сайта."""
+        return self.prefix + LIVE_RELOAD_PATH
+
+    def translate_path(self, path):
+        """Переводит адрес в путь внутри папки выбранного сайта, отбрасывая префикс."""
+        if self.prefix and path.startswith(self.prefix):
+            path = path[len(self.prefix):]
+        return super().translate_path(path)
+
+    def send_head(self):
+        """Отправляет список сайтов, перенаправление на адрес со слэшем или файл сайта."""
+        parts = urllib.parse.urlsplit(self.path)
+        if self.route is None:
+            if parts.path == "/":
+                return self.send_index_head()
+            self.send_error(HTTPStatus.NOT_FOUND, "Site not found")
+            return None
+        if self.prefix and parts.path == self.prefix:
+            # Без завершающего слэша относительные ссылки страницы вели бы в корень шлюза
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", urllib.parse.urlunsplit(("", "", parts.path + "/", parts.query, "")))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        return super().send_head()
+
+    def send_index_head(self):
+        """Отправляет заголовки страницы со списком сайтов шлюза и возвращает ее тело."""
+        port = self.server.server_address[1]
+        rows = []
+        for route in sorted(self.server.routes[0].values(), key=lambda route: route.name.casefold()):
+            main_file = urllib.parse.quote(route.main_file.replace(os.sep, "/")) if route.main_file else ""
+            row = (f'<li><a href="{route.prefix}/{main_file}">{html.escape(route.name)}</a>')
+            if route.host:
+                row += (f' &mdash; <a href="http://{html.escape(route.host)}{GATEWAY_HOST_SUFFIX}:{port}/'
+                        f'{main_file}">{html.escape(route.host)}{GATEWAY_HOST_SUFFIX}</a>')
+            rows.append(row + "</li>")
+        body = ('<!DOCTYPE html><html><head><meta charset="utf-8"><title>Сайты</title></head><body>'
+                f'<h1>Сайты ({len(rows)})</h1><ul>{"".join(rows)}</ul></body></html>').encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        return io.BytesIO(body)
+
+
+class GatewayHTTPServer(ProjectHTTPServer):
+    """Шлюз: все сайты реестра на одном порту с общим пулом потоков и кэшем файлов.
+
+    Таблица маршрутов (по имени сайта и по имени хоста) строится заранее в
+    set_sites и заменяется целиком, поэтому потоки запросов читают ее без
+    блокировок. Ключи кэша - абсолютные пути файлов, так что один FileCache
+    делится между сайтами без пересечений.
+    """
+
+    handler_class = GatewayRequestHandler
+
+    def __init__(self, server_address, websites=None, max_workers=64, file_cache=None,
+                 live_reload=False, ignore_patterns=()):
+        self.live_reload = live_reload
+        self.ignore_patterns = list(ignore_patterns)
+        self.routes = ({}, {})
+        self.routes_lock = threading.Lock()
+        super().__init__(server_address, None, max_workers, file_cache)
+        self.set_sites(websites or {})
+
+    def set_sites(self, websites):
+        """Перестраивает таблицу маршрутов по словарю сайтов {название: данные сайта}.
+
+        Маршруты с прежней папкой сохраняются вместе с запущенным
+        автообновлением; у удаленных и перемещенных сайтов оно
+        останавливается. Возвращает число сайтов в таблице.
+        """
+        with self.routes_lock:
+            old_routes = self.routes[0]
+            by_name = {}
+            by_host = {}
+            for name, site_data in websites.items():
+                path = site_data.get("path")
+                if not path:
+                    continue
+                route = old_routes.get(name)
+                if route is None or route.path != path:
+                    route = GatewayRoute(name, path, site_data.get("main_file", ""))
+                else:
+                    route.main_file = site_data.get("main_file", "")
+                by_name[name] = route
+                if route.host:
+                    by_host.setdefault(route.host, route)
+            self.routes = (by_name, by_host)
+        for name, route in old_routes.items():
+            if by_name.get(name) is not route:
+                route.close()
+        return len(by_name)
+
+    def server_close(self):
+        """Закрывает сервер и останавливает автообновление всех сайтов."""
+        super().server_close()
+        for route in self.routes[0].values():
+            route.close()
+
+
+class ServerManager:
+    """Управляет несколькими серверами проектов, запущенными одновременно.
+
+    Каждый сервер привязан к своему каталогу и порту; порт выбирается
+    попыткой привязки, а не предварительной проверкой, поэтому занятые
+    порты просто пропускаются.
+    """
+
+    def __init__(self, host="", first_port=8000, port_attempts=100):
+        self.host = host
+        self.first_port = first_port
+        self.port_attempts = port_attempts
+        self.servers = {}
+        self.lock = threading.Lock()
+
+    def create_server(self, folder_path, port=None, server_class=ProjectHTTPServer, **server_options):
+        """Создает сервер на указанном или первом свободном порту.
+
+        Для шлюза (server_class=GatewayHTTPServer) вместо папки передается словарь сайтов.
+        """
+        if port is not None:
+            return server_class((self.host, port), folder_path, **server_options)
+        with self.lock:
+            used_ports = {info["port"] for info in self.servers.values()}
+        last_error = None
+        for candidate in range(self.first_port, self.first_port + self.port_attempts):
+            if candidate in used_ports:
+                continue
+            try:
+                return server_class((self.host, candidate), folder_path, **server_options)
+            except OSError as e:
+                last_error = e
+        raise OSError(f"Нет свободных портов в диапазоне {self.first_port}-"
+                      f"{self.first_port + self.port_attempts - 1}: {last_error}")
+
+    def start(self, name, folder_path, port=None, live_reload=False, ignore_patterns=()):
+        """Запускает сервер проекта в фоновом потоке и возвращает сведения о нем."""
+        with self.lock:
+            if name in self.servers:
+                return self.servers[name]
+        httpd = self.create_server(folder_path, port, live_reload=live_reload, ignore_patterns=ignore_patterns)
+        return self.run(name, httpd, folder_path, live_reload)
+
+    def start_gateway(self, websites, port=None, live_reload=False, ignore_patterns=()):
+        """Запускает шлюз для всех сайтов из словаря {название: данные сайта} под именем GATEWAY_NAME."""
+        with self.lock:
+            if GATEWAY_NAME in self.servers:
+                return self.servers[GATEWAY_NAME]
+        httpd = self.create_server(websites, port, server_class=GatewayHTTPServer,
+                                   live_reload=live_reload, ignore_patterns=ignore_patterns)
+        return self.run(GATEWAY_NAME, httpd, "все сайты", live_reload)
+
+    def update_gateway(self, websites):
+        """Перестраивает таблицу маршрутов запущенного шлюза. Возвращает False, если шлюз не запущен."""
+        info = self.get(GATEWAY_NAME)
+        if info is None:
+            return False
+        info["server"].set_sites(websites)
+        return True
+
+    def run(self, name, httpd, path, live_reload):
+        """Запускает цикл созданного сервера в фоновом потоке и регистрирует его под именем name."""
+        thread = threading.Thread(target=httpd.serve_forever, name=f"server-{name}", daemon=True)
+        info = {
+            "name": name,
+            "path": path,
+            "port": httpd.server_address[1],
+            "live_reload": live_reload,
+            "server": httpd,
+            "thread": thread,
+            "started": datetime.now().strftime("%H:%M:%S")
+        }
+        with self.lock:
+            self.servers[name] = info
+        thread.start()
+        return info
+
+    def get(self, name):
+        """Возвращает сведения о сервере сайта или None."""
+        with self.lock:
+            return self.servers.get(name)
+
+    def list(self):
+        """Возвращает сведения обо всех запущенных серверах."""
+        with self.lock:
+            return list(self.servers.values())
+
+    def stop(self, name):
+        """Останавливает сервер сайта. Возвращает False, если он не был запущен."""
+        with self.lock:
+            info = self.servers.pop(name, None)
+        if info is None:
+            return False
+        info["server"].shutdown()
+        info["server"].server_close()
+        return True
+
+    def stop_all(self):
+        """Останавливает все серверы."""
+        for name in [info["name"] for info in self.list()]:
+            self.stop(name)